@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
-import maze.grid
-import maze.rectgrid
+from maze.rectgrid import RectGrid
 import time
 
 SIZE = 50
@@ -12,15 +11,21 @@ def line_print(data: list[str]) -> None:
     print("".join(f"{x: >8}" for x in data))
 
 line_print([str(x) for x in range(1, 5)] + ['ms', ' algorithm'])
-for algorithm in grid.rectgrid.RectGrid.algorithms.keys():
+g = RectGrid(SIZE, SIZE)
+for algorithm in RectGrid.algorithms.keys():
     start = time.time()
     all_data: dict[int, int] = {k: 0 for k in range(5)}
-    for _ in range(SAMPLES):
-        g = grid.rectgrid.RectGrid(SIZE, SIZE)
-        g.generate_maze(algorithm)
-        analysis = g.node_analysis()
-        for k, v in analysis.items():
-            all_data[k] += v
+    try:
+        for _ in range(SAMPLES):
+            g.reset()
+            g.generate_maze(algorithm)
+            analysis = g.node_analysis()
+            for k, v in analysis.items():
+                all_data[k] += v
+    except (ImportError, ValueError) as e:
+        # the numpy algorithms need numpy and a whole grid
+        print(f"{'':>32}{'skipped':>8} {algorithm}: {e}")
+        continue
     span = (time.time() - start) * 1000 / SAMPLES
     analysis_per_algorithm[algorithm] = {
         k: 100 * v / (SAMPLES * SIZE * SIZE) for k, v in all_data.items()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# time ghostscript rendering of the same mazes in different output modes
+from maze.grid import BaseGrid
+from maze.rectgrid import RectGrid
+from maze.hexgrid import HexGrid, TriGrid
+from maze.circlegrid import CircleGrid, PolygonGrid
+import argparse
+import os
+import random
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+GridMaker = Callable[..., BaseGrid]
+
+grid_makers: dict[str, GridMaker] = {
+    'rect': lambda size, **kwargs: RectGrid(size, size, **kwargs),
+    'hex': lambda size, **kwargs: HexGrid(size // 2, **kwargs),
+    'tri': lambda size, **kwargs: TriGrid(size, **kwargs),
+    'circle': lambda size, **kwargs: CircleGrid(size // 2, **kwargs),
+    'polygon': lambda size, **kwargs: PolygonGrid(size // 2, 7, **kwargs),
+}
+
+def line_print(data: list[str]) -> None:
+    print("".join(f"{x: >12}" for x in data))
+
+def gs_time(grid: BaseGrid, print_args: dict[str, Any], prologue: Optional[str] = None) -> tuple[float, int]:
+    with tempfile.NamedTemporaryFile('w', suffix='.ps', delete=False) as f:
+        f.write(grid.ps_prologue if prologue is None else prologue)
+        f.write("%%EndProlog\n")
+        f.write(grid.ps_alignment + "\n")
+        f.write(grid.ps_instructions(**print_args))
+        f.write("\nshowpage\n")
+        filename = f.name
+    try:
+        start = time.time()
+        subprocess.run(
+            ['gs', '-q', '-dNOPAUSE', '-dBATCH', '-sDEVICE=ppmraw', '-r150', '-sOutputFile=/dev/null', filename],
+            check=True,
+        )
+        return time.time() - start, os.path.getsize(filename)
+    finally:
+        os.unlink(filename)
+
+def render_benchmark(args: argparse.Namespace) -> None:
+    line_print(['grid', 'size', 'mode', 'ps bytes', 'gs ms'])
+    for grid_name in args.grids:
+        grid_size = args.sizes.get(grid_name, args.size)
+        for mode, mode_kwargs in args.modes.items():
+            random.seed(args.seed)
+            grid = grid_makers[grid_name](grid_size, **mode_kwargs)
+            grid.generate_maze(args.algorithm)
+            path = grid.longest_path()
+            print_args: dict[str, Any] = {'field': grid.dijkstra(path[0])}
+            if args.path:
+                print_args['path'] = path
+            span, size = gs_time(grid, print_args)
+            line_print([grid_name, str(grid_size), mode, str(size), str(int(span * 1000))])
+
+def bands_benchmark(args: argparse.Namespace) -> None:
+    from maze.ghostscript import banded_png
+    random.seed(args.seed)
+    grid = grid_makers[args.grid](args.size, drawlist=args.drawlist)
+    grid.generate_maze(args.algorithm)
+    path = grid.longest_path()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = directory + '/maze.ps'
+        with open(filename, 'w') as f:
+            f.write(grid.ps_prologue)
+            f.write("/maze {")
+            f.write(grid.ps_instructions(field=grid.dijkstra(path[0])))
+            f.write("\n } def\n")
+            f.write("%%EndProlog\n")
+        alignment = [float(a) for a in grid.png_alignment]
+        line_print(['grid', 'size', 'pixels', 'bands', 'gs ms'])
+        for bands in args.bands:
+            start = time.time()
+            banded_png(filename, 'maze', alignment, args.pixels, directory + '/maze.png', bands, jobs=bands)
+            span = time.time() - start
+            line_print([args.grid, str(args.size), str(args.pixels), str(bands), str(int(span * 1000))])
+
+def sizes_benchmark(args: argparse.Namespace) -> None:
+    from maze.ghostscript import banded_png
+    from maze.downscale import downscale_png
+    random.seed(args.seed)
+    grid = grid_makers[args.grid](args.size, drawlist=args.drawlist)
+    grid.generate_maze(args.algorithm)
+    path = grid.longest_path()
+    pixel_sizes = sorted(args.pixels, reverse=True)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = directory + '/maze.ps'
+        with open(filename, 'w') as f:
+            f.write(grid.ps_prologue)
+            f.write("/maze {")
+            f.write(grid.ps_instructions(path=path, field=grid.dijkstra(path[0])))
+            f.write("\n } def\n")
+            f.write("%%EndProlog\n")
+        alignment = [float(a) for a in grid.png_alignment]
+        span = (alignment[2] - alignment[0], alignment[3] - alignment[1])
+        line_print(['grid', 'size', 'sizes', 'mode', 'ms'])
+        start = time.time()
+        for pixels in pixel_sizes:
+            banded_png(filename, 'maze', alignment, pixels, f"{directory}/maze_{pixels:g}.png", 1)
+        line_print([args.grid, str(args.size), str(len(pixel_sizes)), 'separate', str(int((time.time() - start) * 1000))])
+        start = time.time()
+        banded_png(filename, 'maze', alignment, pixel_sizes[0], directory + '/maze.png', 1)
+        targets = [(f"{directory}/maze_{pixels:g}.png", pixels) for pixels in pixel_sizes[1:]]
+        downscale_png(directory + '/maze.png', pixel_sizes[0], targets, span)
+        line_print([args.grid, str(args.size), str(len(pixel_sizes)), 'downscaled', str(int((time.time() - start) * 1000))])
+
+def batch_benchmark(args: argparse.Namespace) -> None:
+    from maze.ghostscript import banded_png, GhostscriptPool
+    from maze.batch import batch_png
+    random.seed(args.seed)
+    grids = [grid_makers[args.grid](args.size) for _ in range(args.count)]
+    for grid in grids:
+        grid.generate_maze(args.algorithm)
+    line_print(['grid', 'size', 'count', 'mode', 'ms'])
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.time()
+        for i, grid in enumerate(grids):
+            filename = f"{directory}/maze{i}.ps"
+            with open(filename, 'w') as f:
+                f.write(grid.ps_prologue)
+                f.write("/maze {")
+                f.write(grid.ps_instructions())
+                f.write("\n } def\n")
+                f.write("%%EndProlog\n")
+            alignment = [float(a) for a in grid.png_alignment]
+            banded_png(filename, 'maze', alignment, grid.pixels, f"{directory}/maze{i}.png", 1)
+        line_print([args.grid, str(args.size), str(args.count), 'separate', str(int((time.time() - start) * 1000))])
+        start = time.time()
+        batch_png([(grid, {}, f"{directory}/batch{i}") for i, grid in enumerate(grids)])
+        line_print([args.grid, str(args.size), str(args.count), 'batch', str(int((time.time() - start) * 1000))])
+        start = time.time()
+        with GhostscriptPool(workers=args.workers):
+            for i, grid in enumerate(grids):
+                grid.print('png', maze_name=f"{directory}/pool{i}")
+        line_print([args.grid, str(args.size), str(args.count), 'pool', str(int((time.time() - start) * 1000))])
+
+def prologue_benchmark(args: argparse.Namespace) -> None:
+    with open(os.path.dirname(os.path.abspath(__file__)) + '/includes/draw_maze.ps', 'r') as f:
+        full_prologue = f.read()
+    line_print(['grid', 'size', 'count', 'prologue', 'ps bytes', 'gs ms'])
+    for grid_name in args.grids:
+        random.seed(args.seed)
+        grids = [grid_makers[grid_name](args.size) for _ in range(args.count)]
+        for grid in grids:
+            grid.generate_maze(args.algorithm)
+        for mode, prologue in (('full', full_prologue), ('minimal', None)):
+            total_span = 0.0
+            for grid in grids:
+                span, size = gs_time(grid, {}, prologue)
+                total_span += span
+            line_print([grid_name, str(args.size), str(args.count), mode, str(size), str(int(total_span * 1000))])
+
+def memory_benchmark(args: argparse.Namespace) -> None:
+    import tracemalloc
+    line_print(['grid', 'cells', 'cell', 'bytes/cell', 'ms'])
+    for grid_name in args.grids:
+        for mode, options in (('set', {}), ('compact', {'compact_cells': True})):
+            random.seed(args.seed)
+            tracemalloc.start()
+            start = time.time()
+            grid = grid_makers[grid_name](args.size, **options)
+            grid.generate_maze(args.algorithm)
+            span = time.time() - start
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            line_print([grid_name, str(len(grid)), mode, str(size // len(grid)), str(int(span * 1000))])
+
+def mmap_benchmark(args: argparse.Namespace) -> None:
+    import numpy as np
+    from maze.mmapgrid import MmapGrid, generate_file
+    line_print(['mode', 'cells', 'MB', 's', 'MB/s'])
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        filename = directory + '/maze.bits'
+
+        def report(mode: str, span: float) -> None:
+            megabytes = os.path.getsize(filename) / 1e6
+            line_print([mode, str(args.size * args.size), f"{megabytes:.1f}", f"{span:.2f}", f"{megabytes / span:.1f}"])
+
+        # the floor: writing bytes that are already packed
+        start = time.time()
+        with MmapGrid.create(filename, args.size, args.size) as grid:
+            packed = np.zeros((grid.band_rows, grid.stride), dtype=np.uint8)
+            for band_start, band_stop in grid.bands():
+                grid.write_packed(band_start, packed[:band_stop - band_start])
+        report('write', time.time() - start)
+        for algorithm in args.algorithms:
+            random.seed(args.seed)
+            start = time.time()
+            generate_file(filename, args.size, args.size, algorithm).close()
+            report(algorithm, time.time() - start)
+        start = time.time()
+        with MmapGrid(filename) as grid:
+            for band in grid.bands():
+                grid.read_rows(*band)
+        report('read', time.time() - start)
+        if args.pixels:
+            start = time.time()
+            with MmapGrid(filename) as grid:
+                grid.write_png(directory + '/maze.png', args.pixels)
+            report('png', time.time() - start)
+
+def numpy_benchmark(args: argparse.Namespace) -> None:
+    # so the first numpy algorithm doesn't pay for the import
+    import numpy  # noqa: F401
+    line_print(['algorithm', 'size', 'grid', 'python ms', 'numpy ms', 'speedup'])
+    for algorithm in args.algorithms:
+        for mode, options in (('cells', {}), ('implicit', {'implicit': True})):
+            spans = []
+            for name in (algorithm, 'numpy_' + algorithm):
+                random.seed(args.seed)
+                grid = grid_makers['rect'](args.size, **options)
+                start = time.time()
+                grid.generate_maze(name)
+                spans.append(time.time() - start)
+            line_print([algorithm, str(args.size), mode, str(int(spans[0] * 1000)), str(int(spans[1] * 1000)),
+                f"{spans[0] / spans[1]:.0f}x"])
+
+parser = argparse.ArgumentParser(description="benchmark maze rendering and storage")
+subparsers = parser.add_subparsers(required=True)
+
+render_parser = subparsers.add_parser('render', help="ghostscript time for the drawing engine and the python draw list")
+render_parser.add_argument('--size', type=int, default=50)
+render_parser.add_argument('--seed', type=int, default=97)
+render_parser.add_argument('-a', '--algorithm', default='backtrack')
+render_parser.add_argument('--grids', nargs='+', default=list(grid_makers.keys()), choices=grid_makers)
+render_parser.set_defaults(func=render_benchmark, sizes={}, path=True, modes={
+    'engine': {},
+    'drawlist': {'drawlist': True},
+})
+
+cells_parser = subparsers.add_parser('cells', help="ghostscript time for text and encoded cell tables")
+cells_parser.add_argument('--size', type=int, default=200)
+cells_parser.add_argument('--seed', type=int, default=97)
+cells_parser.add_argument('-a', '--algorithm', default='backtrack')
+cells_parser.add_argument('--grids', nargs='+', default=['rect', 'circle'], choices=grid_makers)
+cells_parser.set_defaults(func=render_benchmark, sizes={}, path=True, modes={
+    'comments': {'cell_comments': True},
+    'text': {},
+    'hex': {'cell_encoding': 'hex'},
+    'ascii85': {'cell_encoding': 'ascii85'},
+})
+
+shapes_parser = subparsers.add_parser('shapes', help="ghostscript time with and without the cell shape cache")
+shapes_parser.add_argument('--size', type=int, default=500, help="size of rect grids, circle grids get 200 rings")
+shapes_parser.add_argument('--seed', type=int, default=97)
+shapes_parser.add_argument('-a', '--algorithm', default='backtrack')
+shapes_parser.add_argument('--grids', nargs='+', default=['rect', 'circle'], choices=grid_makers)
+# no solution path, whose long stroke would swamp the cell drawing time
+shapes_parser.set_defaults(func=render_benchmark, sizes={'circle': 400}, path=False, modes={
+    'engine': {},
+    'shapecache': {'shape_cache': True},
+})
+
+bands_parser = subparsers.add_parser('bands', help="wall clock time of banded png rendering for different numbers of bands")
+bands_parser.add_argument('--size', type=int, default=200)
+bands_parser.add_argument('--pixels', type=float, default=40.0)
+bands_parser.add_argument('--seed', type=int, default=97)
+bands_parser.add_argument('-a', '--algorithm', default='backtrack')
+bands_parser.add_argument('--grid', default='rect', choices=grid_makers)
+bands_parser.add_argument('--drawlist', action='store_true')
+bands_parser.add_argument('--bands', type=int, nargs='+', default=[1, 2, 4, 8])
+bands_parser.set_defaults(func=bands_benchmark)
+
+sizes_parser = subparsers.add_parser('sizes', help="wall clock time of a png at several pixel sizes, rendered separately or scaled down from the largest")
+sizes_parser.add_argument('--size', type=int, default=100)
+sizes_parser.add_argument('--pixels', type=float, nargs='+', default=[40.0, 10.0, 4.0])
+sizes_parser.add_argument('--seed', type=int, default=97)
+sizes_parser.add_argument('-a', '--algorithm', default='backtrack')
+sizes_parser.add_argument('--grid', default='rect', choices=grid_makers)
+sizes_parser.add_argument('--drawlist', action='store_true')
+sizes_parser.set_defaults(func=sizes_benchmark)
+
+batch_parser = subparsers.add_parser('batch', help="wall clock time of many small pngs from separate gs runs, one batch or a gs pool")
+batch_parser.add_argument('--size', type=int, default=8)
+batch_parser.add_argument('--count', type=int, default=50)
+batch_parser.add_argument('--seed', type=int, default=97)
+batch_parser.add_argument('-a', '--algorithm', default='backtrack')
+batch_parser.add_argument('--grid', default='rect', choices=grid_makers)
+batch_parser.add_argument('--workers', type=int, default=1, help="gs processes in the pool")
+batch_parser.set_defaults(func=batch_benchmark)
+
+prologue_parser = subparsers.add_parser('prologue', help="ghostscript time for many small mazes with all of draw_maze.ps or a trimmed prologue")
+prologue_parser.add_argument('--size', type=int, default=4)
+prologue_parser.add_argument('--count', type=int, default=50)
+prologue_parser.add_argument('--seed', type=int, default=97)
+prologue_parser.add_argument('-a', '--algorithm', default='backtrack')
+prologue_parser.add_argument('--grids', nargs='+', default=list(grid_makers.keys()), choices=grid_makers)
+prologue_parser.set_defaults(func=prologue_benchmark)
+
+memory_parser = subparsers.add_parser('memory', help="memory per cell of a generated maze with links in sets or compact cells")
+memory_parser.add_argument('--size', type=int, default=100)
+memory_parser.add_argument('--seed', type=int, default=97)
+memory_parser.add_argument('-a', '--algorithm', default='backtrack')
+memory_parser.add_argument('--grids', nargs='+', default=['rect', 'hex', 'circle'], choices=grid_makers)
+memory_parser.set_defaults(func=memory_benchmark)
+
+mmap_parser = subparsers.add_parser('mmap', help="throughput of generating and reading a maze file two bits a cell, against just writing the file")
+mmap_parser.add_argument('--size', type=int, default=16384, help="cells on a side, 65536 makes a 1GB file")
+mmap_parser.add_argument('--seed', type=int, default=97)
+mmap_parser.add_argument('--algorithms', nargs='+', default=['binary', 'sidewinder'], help="eller is a python loop per row, give a smaller size for it")
+mmap_parser.add_argument('--directory', help="where to put the file, on the disk to measure")
+mmap_parser.add_argument('--pixels', type=int, help="also draw a png with cells this many pixels across")
+mmap_parser.set_defaults(func=mmap_benchmark)
+
+numpy_parser = subparsers.add_parser('numpy', help="generation time of binary and sidewinder on a RectGrid in python and with numpy")
+numpy_parser.add_argument('--size', type=int, default=1000)
+numpy_parser.add_argument('--seed', type=int, default=97)
+numpy_parser.add_argument('--algorithms', nargs='+', default=['binary', 'sidewinder'], choices=['binary', 'sidewinder'])
+numpy_parser.set_defaults(func=numpy_benchmark)
+
+args = parser.parse_args()
+args.func(args)
@@ -5,24 +5,31 @@ from maze.rectgrid import RectBaseGrid, RectGrid, ZetaGrid, UpsilonGrid
 from maze.circlegrid import CircleGrid, PolygonGrid
 from maze.hexgrid import HexGrid, TriGrid
 from maze.complex_maze import complex_grid
+from maze.multigrid import MultiGrid
 import argparse
 import random
 import re
 import os
-from typing import Any
+from typing import Any, Optional
 
 parser = argparse.ArgumentParser(
         prog="multimaze",
         description="Generate a maze with a variety of algorithms and a variety of outputs",
     )
-parser.add_argument('size', help="either a string like '8x10', '10@', '7s', '7d', or the filename of a text or image mask")
+parser.add_argument('size', help="either a string like '8x10', '10@', '7s', '7d', the filename of a text or image mask, or a .maze file to load")
 
 parser.add_argument('-a', '--algorithm', default="backtrack", help="the maze algorithm to use")
 parser.add_argument('-s', '--seed', help="if provided, the seed for the rng")
 parser.add_argument('-f', '--field', action='store_true', help="whether to include a field of distances from the far point")
 parser.add_argument('-p', '--path', action='store_true', help="whether to include the path from the far point to the other far point")
 parser.add_argument('-w', '--weave', action='store_true', help="whether to weave links above and below other links")
+parser.add_argument('--parallel', action='store_true', help="generate each subgrid of a complex maze in its own process")
+parser.add_argument('--blocks', type=int, help="generate a rectangular maze as this many blocks across and down, each in its own process")
+parser.add_argument('--random-doors', action='store_true', help="with --blocks, scatter the doors between blocks along their edges")
 parser.add_argument('-b', '--braid', type=float, help="the proportion of dead ends to braid")
+parser.add_argument('--compact-cells', action='store_true', help="keep each cell's links as bits over its neighbors, using about half the memory")
+parser.add_argument('--implicit', action='store_true', help="decide which cells are in rectangular, hex and triangular grids by formula, making cells only once they are linked")
+parser.add_argument('--wall-file', help="generate a rectangular maze straight into this file with binary, sidewinder or eller, for mazes too big for memory")
 parser.add_argument('--room_size', type=int, help="the size of rooms in fractal mazes")
 parser.add_argument('--firstring', type=int, help="cells in the first non-trivial ring of a circular maze")
 parser.add_argument('--slices', type=int, help="number of slices of a polygon maze to include")
@@ -30,13 +37,27 @@ parser.add_argument('--degrees', type=float, help="angles to include in a circle
 parser.add_argument('-y', '--hyper', type=int, action='append', help="number of planes in each hyper dimension, repeat for more dimensions")
 
 parser.add_argument('-o', '--output', default="png", help="the output format", choices=RectGrid.outputs)
+parser.add_argument('--count', type=int, default=1, help="how many mazes to make, for book or png output")
+parser.add_argument('--nup', type=int, help="how many mazes to put on each page of book output")
 parser.add_argument('-n', '--name', help="the name to use for the output if generating a png")
 parser.add_argument('--bg', action='store_true', help="whether to draw a black background")
 parser.add_argument('--pathcolor', help="string of rgb float values for path, if no field")
 parser.add_argument('--linewidth', type=float, help="thickness of line, where 1 is the cell width")
 parser.add_argument('--inset', type=float, help="depth of inset when weave is true, where 1 is the cell width")
 parser.add_argument('--pixels', type=float, help="how many pixels to map one maze height to, when printing to png")
+parser.add_argument('--scaled-pixels', type=float, action='append', help="a smaller pixel size to scale the png down to as well, repeat for more")
+parser.add_argument('--bands', type=int, help="render the png in this many horizontal bands in parallel")
+parser.add_argument('--jobs', type=int, help="how many bands to render at once, defaults to the number of cores")
+parser.add_argument('--gs-option', action='append', help="extra ghostscript option for png output, such as -dNumRenderingThreads=4, repeat for more")
+parser.add_argument('--topology-cache', help="directory to keep built complex maze grids in, so the same layout loads instead of being built again")
+parser.add_argument('--layer-cache', help="directory to cache the fill, wall and path layers of png output in, so they can be reused")
+parser.add_argument('--json-format', choices=['nested', 'columnar'], help="nested cells as structured_data gives them, or parallel arrays of cell columns")
+parser.add_argument('--gzip', action='store_true', help="whether to gzip json output")
 parser.add_argument('--noflat', action='store_true', help="whether to call out to draw_maze rather than inlining it")
+parser.add_argument('--drawlist', action='store_true', help="whether to resolve all geometry in python so ghostscript only strokes and fills")
+parser.add_argument('--cell-encoding', choices=['hex', 'ascii85'], help="pack the ps cell table into encoded strings")
+parser.add_argument('--shape-cache', action='store_true', help="whether ghostscript should trace each distinct cell shape once and reuse it")
+parser.add_argument('--cell-comments', action='store_true', help="whether to note each cell's links in the ps cell table")
 
 args = parser.parse_args()
 
@@ -47,7 +68,6 @@ if args.seed:
         seed = args.seed
     random.seed(seed)
 
-grid: BaseGrid
 
 ssg_for_char: dict[str, type[SingleSizeGrid]] = {
     's': HexGrid,
@@ -69,6 +89,14 @@ if args.bg:
     option_kwargs['bg'] = True
 if args.noflat:
     option_kwargs['noflat'] = True
+if args.drawlist:
+    option_kwargs['drawlist'] = True
+if args.cell_encoding:
+    option_kwargs['cell_encoding'] = args.cell_encoding
+if args.cell_comments:
+    option_kwargs['cell_comments'] = True
+if args.shape_cache:
+    option_kwargs['shape_cache'] = True
 if args.pathcolor:
     option_kwargs['pathcolor'] = [float(c) for c in args.pathcolor.split()]
 if args.inset:
@@ -77,59 +105,139 @@ if args.linewidth:
     option_kwargs['linewidth'] = args.linewidth
 if args.pixels:
     option_kwargs['pixels'] = args.pixels
+if args.scaled_pixels:
+    if max(args.scaled_pixels) >= (args.pixels or 20):
+        parser.error("--scaled-pixels must be smaller than --pixels")
+    option_kwargs['scaled_pixels'] = sorted(set(args.scaled_pixels), reverse=True)
+if args.bands:
+    option_kwargs['bands'] = args.bands
+if args.jobs:
+    option_kwargs['jobs'] = args.jobs
+if args.gs_option:
+    option_kwargs['gs_options'] = args.gs_option
+if args.layer_cache:
+    option_kwargs['layer_cache'] = args.layer_cache
+if args.json_format:
+    option_kwargs['json_format'] = args.json_format
+if args.gzip:
+    option_kwargs['json_gzip'] = True
 if args.room_size:
     option_kwargs['room_size'] = args.room_size
+if args.compact_cells:
+    option_kwargs['compact_cells'] = True
+if args.implicit:
+    option_kwargs['implicit'] = True
 if args.hyper:
     option_kwargs['hyper'] = args.hyper
 
-if m := re.match(r'(\d+)x(\d+)([guz]?)$', args.size):
-    height, width = [int(x) for x in m.groups()[:2]]
-    rect_grid_type = rg_for_char[m.group(3)]
-    grid = rect_grid_type(height, width, **option_kwargs)
-elif m := re.match(r'(\d+)([sd])$', args.size):
-    size = int(m.group(1))
-    single_size_grid_type = ssg_for_char[m.group(2)]
-    grid = single_size_grid_type(size, **option_kwargs)
-elif m := re.match(r'(\d+)([\@o])(\d*)$', args.size):
-    size = int(m.group(1))
-    center_cell = (m.group(2) == '@')
-    if len(m.group(3)):
-        sides = int(m.group(3))
-        if args.slices:
-            option_kwargs['slices'] = args.slices
-        grid = PolygonGrid(size, sides, firstring=args.firstring, center_cell=center_cell, **option_kwargs)
+def make_grid() -> BaseGrid:
+    grid: BaseGrid
+    if m := re.match(r'(\d+)x(\d+)([guz]?)$', args.size):
+        height, width = [int(x) for x in m.groups()[:2]]
+        rect_grid_type = rg_for_char[m.group(3)]
+        grid = rect_grid_type(height, width, **option_kwargs)
+    elif m := re.match(r'(\d+)([sd])$', args.size):
+        size = int(m.group(1))
+        single_size_grid_type = ssg_for_char[m.group(2)]
+        grid = single_size_grid_type(size, **option_kwargs)
+    elif m := re.match(r'(\d+)([\@o])(\d*)$', args.size):
+        size = int(m.group(1))
+        center_cell = (m.group(2) == '@')
+        if len(m.group(3)):
+            sides = int(m.group(3))
+            if args.slices:
+                option_kwargs['slices'] = args.slices
+            grid = PolygonGrid(size, sides, firstring=args.firstring, center_cell=center_cell, **option_kwargs)
+        else:
+            if args.degrees:
+                option_kwargs['degrees'] = args.degrees
+            grid = CircleGrid(size, firstring=args.firstring, center_cell=center_cell, **option_kwargs)
+    elif args.size.endswith('.maze'):
+        grid = BaseGrid.load(args.size, **option_kwargs)
+    elif ':' in args.size:
+        complex_type, size = args.size.split(':')
+        grid = complex_grid(complex_type, int(size), topology_cache=args.topology_cache, **option_kwargs)
+    elif os.access(args.size, os.R_OK):
+        mask_filename = args.size
+        if mask_filename[-4:] == '.png':
+            grid = RectGrid.from_mask_png(mask_filename, **option_kwargs)
+        else:
+            grid = RectGrid.from_mask_txt(mask_filename, **option_kwargs)
     else:
-        if args.degrees:
-            option_kwargs['degrees'] = args.degrees
-        grid = CircleGrid(size, firstring=args.firstring, center_cell=center_cell, **option_kwargs)
-elif ':' in args.size:
-    complex_type, size = args.size.split(':')
-    grid = complex_grid(complex_type, int(size), **option_kwargs)
-elif os.access(args.size, os.R_OK):
-    mask_filename = args.size
-    if mask_filename[-4:] == '.png':
-        grid = RectGrid.from_mask_png(mask_filename, **option_kwargs)
-    else:
-        grid = RectGrid.from_mask_txt(mask_filename, **option_kwargs)
-else:
-    raise ValueError(f"invalid size {args.size}")
-
-grid.generate_maze(args.algorithm)
-if args.braid:
-    grid.braid(args.braid)
-
-print_args: dict[str, Any] = {}
-
-if args.path or args.field:
-    path = grid.longest_path()
-    if args.path:
-        print_args['path'] = path
-    if args.field:
-        print_args['field'] = grid.dijkstra(path[0])
+        raise ValueError(f"invalid size {args.size}")
+    return grid
+
+def make_maze(template: Optional[BaseGrid] = None) -> tuple[BaseGrid, dict[str, Any]]:
+    grid = template.fresh_copy() if template else make_grid()
+    if args.drawlist and not grid.has_flat_geometry:
+        parser.error("--drawlist doesn't work with this maze; leave it out to draw with draw_maze.ps")
+    if args.parallel:
+        if not isinstance(grid, MultiGrid):
+            parser.error("--parallel only works with complex mazes")
+        grid.generate_parallel(args.algorithm, jobs=args.jobs)
+    elif args.blocks is not None:
+        if not isinstance(grid, RectGrid):
+            parser.error("--blocks only works with rectangular mazes")
+        if not 1 <= args.blocks <= min(grid.width, grid.height):
+            parser.error(f"--blocks must be between 1 and {min(grid.width, grid.height)}")
+        grid.generate_tiled(args.algorithm, args.blocks, jobs=args.jobs, random_doors=args.random_doors)
+    elif not args.size.endswith('.maze'):
+        grid.generate_maze(args.algorithm)
+        if args.braid:
+            grid.braid(args.braid)
+
+    print_args: dict[str, Any] = {}
+
+    if args.path or args.field:
+        path = grid.longest_path()
+        if args.path:
+            print_args['path'] = path
+        if args.field:
+            print_args['field'] = grid.dijkstra(path[0])
+    return grid, print_args
 
 if args.name:
     if '.' in args.name:
         args.name = args.name[:args.name.index('.')]
-    print_args['maze_name'] = args.name
 
-grid.print(args.output, **print_args)
+if args.wall_file:
+    from maze.mmapgrid import MmapGrid, generate_file
+    from maze.textmaze import text_lines
+    if not (m := re.match(r'(\d+)x(\d+)$', args.size)):
+        parser.error("--wall-file only works with rectangular sizes like 8x10")
+    if args.algorithm not in MmapGrid.algorithms:
+        parser.error(f"--wall-file only works with {', '.join(MmapGrid.algorithms)}")
+    if args.output not in ('png', 'ascii', 'unicode'):
+        parser.error("--wall-file only works with png, ascii or unicode output")
+    if args.pixels and not (args.pixels.is_integer() and args.pixels >= 2):
+        parser.error("--wall-file takes a whole number of --pixels, at least 2")
+    if args.scaled_pixels:
+        parser.error("--wall-file doesn't scale, leave out --scaled-pixels")
+    height, width = [int(x) for x in m.groups()]
+    with generate_file(args.wall_file, height, width, args.algorithm) as wall_grid:
+        if args.output == 'png':
+            wall_grid.write_png((args.name or 'temp') + '.png', int(args.pixels) if args.pixels else 4)
+        else:
+            for line in text_lines(wall_grid.text_rows(), width, style=args.output):
+                print(line)
+elif args.count > 1:
+    if args.output not in ('book', 'png'):
+        parser.error("--count only works with book or png output")
+    # build the grid once and copy it for each maze
+    template = None if args.size.endswith('.maze') else make_grid()
+    mazes = [make_maze(template) for _ in range(args.count)]
+    name = args.name or 'temp'
+    if args.output == 'book':
+        from maze.book import write_book
+        write_book(mazes, name, nup=args.nup or 1, gs_options=mazes[0][0].gs_options)
+    else:
+        from maze.batch import batch_png
+        batch_png([(grid, print_args, f"{name}-{i}") for i, (grid, print_args) in enumerate(mazes, start=1)],
+            gs_options=mazes[0][0].gs_options)
+else:
+    grid, print_args = make_maze()
+    if args.name:
+        print_args['maze_name'] = args.name
+    if args.nup:
+        print_args['nup'] = args.nup
+    grid.print(args.output, **print_args)
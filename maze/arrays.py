@@ -0,0 +1,80 @@
+# mazes as numpy arrays: cells by index, links in csr form, wall bitmasks
+# and cell centers, with the same names and header as maze files
+
+from typing import Any, TYPE_CHECKING
+
+from .mazefile import LINK_KIND, INT_KIND, grid_header, build_grid
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+def grid_arrays(maze: 'BaseGrid') -> dict[str, Any]:
+    '''
+    coordinates, kind and grid (an index into header['gridnames']) for
+    each cell; cell i links to link_cells[link_start[i]:link_start[i + 1]];
+    walls has bit j set for a wall to the j-th of pos_adjacents, and
+    wall_grid lays those out by coordinates minus origin when the maze
+    has no subgrids, with every bit set where there is no cell
+    '''
+    import numpy as np
+    positions = list(maze._grid)
+    cells = list(maze._grid.values())
+    count = len(positions)
+    index = {position: i for i, position in enumerate(positions)}
+    gridnames = sorted({p.gridname for p in positions if p.gridname is not None})
+    grid_index = {name: i for i, name in enumerate(gridnames)}
+
+    header = grid_header(maze)
+    header['gridnames'] = gridnames
+    arrays: dict[str, Any] = {'header': header}
+    arrays['coordinates'] = np.array([p.coordinates for p in positions], dtype=np.int32)
+    arrays['kind'] = np.fromiter(
+        (LINK_KIND if p.position_type == 'link' else INT_KIND for p in positions),
+        dtype=np.uint8, count=count)
+    arrays['grid'] = np.fromiter(
+        (grid_index[p.gridname] if p.gridname is not None else 0 for p in positions),
+        dtype=np.uint16, count=count)
+    link_start = np.zeros(count + 1, dtype=np.uint32)
+    np.cumsum(np.fromiter((len(cell.links) for cell in cells), dtype=np.uint32, count=count),
+        out=link_start[1:])
+    arrays['link_start'] = link_start
+    arrays['link_cells'] = np.fromiter(
+        (i for cell in cells for i in sorted(index[link] for link in cell.links)),
+        dtype=np.uint32, count=int(link_start[-1]))
+
+    try:
+        centers = maze.cell_centers()
+        arrays['centers'] = np.array([centers[p] for p in positions], dtype=float)
+    except NotImplementedError:
+        pass
+
+    walls = [maze.walls_for_cell(cell) for cell in cells]
+    if all(len(w) <= 64 for w in walls):
+        arrays['walls'] = np.fromiter(
+            (sum(1 << j for j, wall in enumerate(w) if wall) for w in walls),
+            dtype=np.uint64, count=count)
+        if not gridnames and count:
+            ints = arrays['kind'] == INT_KIND
+            coordinates = arrays['coordinates'][ints]
+            origin = coordinates.min(axis=0)
+            shape = coordinates.max(axis=0) - origin + 1
+            wall_grid = np.full(tuple(shape), np.iinfo(np.uint64).max, dtype=np.uint64)
+            wall_grid[tuple((coordinates - origin).T)] = arrays['walls'][ints]
+            arrays['origin'] = origin
+            arrays['wall_grid'] = wall_grid
+    return arrays
+
+def grid_from_arrays(arrays: dict[str, Any], **kwargs: Any) -> 'BaseGrid':
+    'build a maze from grid_arrays or MazeView.to_arrays output'
+    header = arrays['header']
+    gridnames = header['gridnames']
+    count = len(arrays['kind'])
+    return build_grid(
+        header,
+        [tuple(c) for c in arrays['coordinates'].tolist()],
+        arrays['kind'].tolist(),
+        [gridnames[g] for g in arrays['grid'].tolist()] if gridnames else [None] * count,
+        arrays['link_start'].tolist(),
+        arrays['link_cells'].tolist(),
+        **kwargs,
+    )
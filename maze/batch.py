@@ -0,0 +1,52 @@
+# many mazes to png from one gs run: the prologue once, a procedure for each
+# maze, and a page each sized as pstopng would size it
+
+from collections.abc import Sequence
+from typing import Any, TYPE_CHECKING
+
+from .book import shared_prologue
+from .ghostscript import stream_pages
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+# (maze, print args such as path and field, output name without .png)
+BatchEntry = tuple['BaseGrid', dict[str, Any], str]
+
+def batch_ps(entries: Sequence[BatchEntry]) -> tuple[str, list[tuple[tuple[int, int], str]]]:
+    'prologue defining maze1, maze2... and the page that draws each one'
+    output = [shared_prologue([maze for maze, _, _ in entries])]
+    pages: list[tuple[tuple[int, int], str]] = []
+    for i, (maze, print_args, _) in enumerate(entries, start=1):
+        output.append(f"/maze{i} {{")
+        output.append(maze.ps_instructions(**print_args))
+        output.append("} def")
+        pages.append(png_page(maze, f"maze{i}"))
+    return "\n".join(output) + "\n", pages
+
+def png_page(maze: 'BaseGrid', drawing: str) -> tuple[tuple[int, int], str]:
+    'size and ps of the page pstopng would draw the maze on'
+    left, bottom, right, top = [float(a) for a in maze.png_alignment]
+    pixels = maze.pixels
+    size = (int((right - left) * pixels) + 1, int((top - bottom) * pixels) + 1)
+    return size, "\n".join([
+        f"1 {pixels} div setlinewidth",
+        f"{pixels} dup scale",
+        f"{left} neg {bottom} neg translate",
+        drawing,
+    ])
+
+def batch_png(entries: Sequence[BatchEntry], gs_options: Sequence[str] = ()) -> None:
+    'write each name.png, and its scaled copies, the way png_print would'
+    from .grid import write_scaled_pngs
+    # banded and layered mazes are drawn their own way, one at a time
+    batched = [entry for entry in entries if not (entry[0].bands or entry[0].layer_cache)]
+    if batched:
+        prologue, pages = batch_ps(batched)
+        for (maze, _, name), data in zip(batched, stream_pages(prologue, pages, gs_options)):
+            with open(name + '.png', 'wb') as f:
+                f.write(data)
+            write_scaled_pngs(maze, name)
+    for maze, print_args, name in entries:
+        if maze.bands or maze.layer_cache:
+            maze.print('png', maze_name=name, **print_args)
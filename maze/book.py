@@ -0,0 +1,84 @@
+# many mazes in one dsc document, with the draw_maze prologue written once
+
+from collections.abc import Sequence
+from math import ceil, sqrt
+from typing import Any, TYPE_CHECKING
+
+from .psprologue import minimal_prologue
+from .ghostscript import ps_to_pdf
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+# (maze, print args such as path and field)
+BookEntry = tuple['BaseGrid', dict[str, Any]]
+
+# letter paper, in inches
+PAGE_SIZE = (8.5, 11)
+MARGIN = 0.25
+GUTTER = 0.25
+
+def layout_boxes(nup: int) -> list[tuple[float, float, float, float]]:
+    'boxes for nup mazes on a page, left to right and top to bottom'
+    rows = ceil(sqrt(nup))
+    columns = ceil(nup / rows)
+    width = (PAGE_SIZE[0] - 2 * MARGIN - (columns - 1) * GUTTER) / columns
+    height = (PAGE_SIZE[1] - 2 * MARGIN - (rows - 1) * GUTTER) / rows
+    return [
+        (
+            MARGIN + column * (width + GUTTER),
+            PAGE_SIZE[1] - MARGIN - height - row * (height + GUTTER),
+            width, height,
+        )
+        for row in range(rows) for column in range(columns)
+    ][:nup]
+
+def shared_prologue(mazes: Sequence['BaseGrid']) -> str:
+    'prologue with the procedures every one of the mazes needs'
+    if mazes[0].noflat:
+        return mazes[0].ps_prologue
+    entry_points: set[str] = set()
+    for maze in mazes:
+        entry_points |= maze.ps_entry_points
+    return minimal_prologue(frozenset(entry_points))
+
+def book_ps(entries: Sequence[BookEntry], nup: int = 1, title: str = 'mazebook') -> str:
+    boxes = layout_boxes(nup)
+    pages = [entries[i:i + nup] for i in range(0, len(entries), nup)]
+    width, height = (int(72 * size) for size in PAGE_SIZE)
+    output: list[str] = [
+        "%!PS-Adobe-3.0",
+        f"%%Title: {title}",
+        "%%Creator: mazebook",
+        f"%%Pages: {len(pages)}",
+        "%%PageOrder: Ascend",
+        f"%%BoundingBox: 0 0 {width} {height}",
+        "%%EndComments",
+        "%%BeginProlog",
+        shared_prologue([maze for maze, _ in entries]).removeprefix("%!\n"),
+        "%%EndProlog",
+    ]
+    for page_number, page in enumerate(pages, start=1):
+        output.append(f"%%Page: {page_number} {page_number}")
+        output.append("save")
+        for box, (maze, print_args) in zip(boxes, page):
+            output.append("gsave")
+            output.append(maze.page_alignment(box))
+            output.append(maze.ps_instructions(**print_args))
+            output.append("grestore")
+        output.append("showpage")
+        output.append("restore")
+    output.append("%%Trailer")
+    output.append("%%EOF")
+    return "\n".join(output) + "\n"
+
+def write_book(
+        entries: Sequence[BookEntry],
+        name: str,
+        nup: int = 1,
+        gs_options: Sequence[str] = (),
+) -> None:
+    'write name.ps and convert it to name.pdf in one gs run'
+    with open(name + '.ps', 'w') as f:
+        f.write(book_ps(entries, nup=nup, title=name))
+    ps_to_pdf(name + '.ps', name + '.pdf', gs_options)
@@ -1,56 +1,83 @@
 # grids with or without a central node surrounded by rings of cells
 
 from .positions import Position, Direction, add_direction
-from typing import Optional, Any, Sequence
-from math import pi
+from typing import Optional, Any, Sequence, NamedTuple
+from math import pi, cos, sin, radians, ceil, floor
 from functools import cache
 from sys import stderr
 import random
 
-from .grid import SingleSizeGrid, BaseGrid, Division, Edge
+from .grid import SingleSizeGrid, BaseGrid, Division, Edge, Point, dot_outline
 
 def warn(*args: Any, **kwargs: Any) -> None:
     print(*args, file=stderr, **kwargs)
 
+class RingLayout(NamedTuple):
+    widths: tuple[int, ...]     # width of ring r
+    ratios: tuple[int, ...]     # width of ring r / width of ring r-1
+    counts: tuple[int, ...]     # cells of ring r that fit in the degrees
+    offsets: tuple[int, ...]    # cells before ring r, then the total
+
+    def cell_index(self, r: int, theta: int) -> int:
+        'where cell (r, theta) is when the cells are numbered ring by ring'
+        return self.offsets[r] + theta
+
+@cache
+def ring_layout(radius: int, firstring: Optional[int] = None, center_cell: bool = True, degrees: float = 360.0) -> RingLayout:
+    'the rings of a circle grid, without building the grid'
+    widths: list[int] = []
+    ratios: list[int] = []
+    if center_cell:
+        physical_radius_offset = 0.0
+        starting_r = 1
+        widths.append(1)
+        ratios.append(0)
+    else:
+        physical_radius_offset = 0.5
+        starting_r = 0
+    for r in range(starting_r, starting_r + radius):
+        if r == starting_r and firstring is not None:
+            width = firstring
+            ratio = width
+        else:
+            # for now, use algorithm from book
+            circumference = (r + physical_radius_offset) * pi * 2
+            last_width = 1 if r == 0 else widths[r - 1]
+            estimated_cell_width = circumference / last_width
+            ratio = round(estimated_cell_width)
+            width = last_width * ratio
+        widths.append(width)
+        ratios.append(ratio)
+    # the center cell is there whatever the degrees
+    counts = [1] if center_cell else []
+    counts += [
+        next((theta for theta in range(width) if (theta + 0.5) * 360 / width >= degrees), width)
+        for width in widths[starting_r:]
+    ]
+    offsets = [0]
+    for count in counts:
+        offsets.append(offsets[-1] + count)
+    return RingLayout(tuple(widths), tuple(ratios), tuple(counts), tuple(offsets))
+
 class CircleGrid(SingleSizeGrid):
     maze_type = "circlemaze"
+    copy_shared = SingleSizeGrid.copy_shared + ('_adjacents',)
 
     def __init__(self, radius: int, firstring: Optional[int] = None, center_cell: bool = True, degrees: float = 360.0, **kwargs: Any) -> None:
+        self._adjacents: dict[Position, Sequence[Position]] = {}
         super().__init__(radius, **kwargs)
         self.radius = radius
         self.center_cell = center_cell
         self.degrees = degrees
 
+        self.layout = ring_layout(radius, firstring, center_cell, degrees)
         # width of ring r
-        self.widths: list[int] = []
+        self.widths: list[int] = list(self.layout.widths)
         # for convenience: width of ring r / width of ring r-1
-        self.ratios: list[int] = []
+        self.ratios: list[int] = list(self.layout.ratios)
         # positions in CircleGrid are (r, theta)
-        if center_cell:
-            physical_radius_offset = 0.0
-            self._add_column((0, 0))
-            starting_r = 1
-            self.widths.append(1)
-            self.ratios.append(0)
-        else:
-            physical_radius_offset = 0.5
-            starting_r = 0
-        for r in range(starting_r, starting_r + radius):
-            if r == starting_r and firstring is not None:
-                width = firstring
-                ratio = width
-            else:
-                # for now, use algorithm from book
-                circumference = (r + physical_radius_offset) * pi * 2
-                last_width = 1 if r == 0 else self.widths[r - 1]
-                estimated_cell_width = circumference / last_width
-                ratio = round(estimated_cell_width)
-                width = last_width * ratio
-            self.widths.append(width)
-            self.ratios.append(ratio)
-            for theta in range(width):
-                if (theta + 0.5) * 360 / width >= degrees:
-                    break
+        for r, count in enumerate(self.layout.counts):
+            for theta in range(count):
                 self._add_column((r, theta))
 
     @property
@@ -73,12 +100,25 @@ class CircleGrid(SingleSizeGrid):
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         return {'radius': self.radius, 'widths':  self.widths, 'center_cell': self.center_cell, 'degrees': self.degrees}
 
+    @property
+    def firstring(self) -> int:
+        return self.widths[1 if self.center_cell else 0]
+
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.radius,), {'firstring': self.firstring, 'center_cell': self.center_cell, 'degrees': self.degrees}
+
     @property
     def edges(self) -> tuple[Edge, ...]:
         return ()
 
-    @cache
     def pos_adjacents(self, start: Position) -> Sequence[Position]:
+        adjacents = self._adjacents.get(start)
+        if adjacents is None:
+            adjacents = self._adjacents[start] = self.ring_adjacents(start)
+        return adjacents
+
+    def ring_adjacents(self, start: Position) -> Sequence[Position]:
         # cw and ccw around ring
         r, theta, *remainder = start.coordinates
         neighbors: list[Position] = []
@@ -108,6 +148,108 @@ class CircleGrid(SingleSizeGrid):
             neighbors.append(self._pos((-1, 0)))
         return self.adjust_adjacents(start, neighbors)
 
+    def polar_point(self, r: float, theta: float) -> Point:
+        # convert_from_polar in draw_maze.ps
+        return (r * cos(radians(theta)), r * sin(radians(theta)))
+
+    def polar_arc(self, r: float, start: float, end: float) -> list[Point]:
+        # points along a ring after start, up to end
+        steps = max(1, ceil(abs(end - start) / 5))
+        return [self.polar_point(r, start + (end - start) * i / steps) for i in range(1, steps + 1)]
+
+    def polar_center(self, position: Position) -> tuple[float, float]:
+        ring, cell = position.coordinates[:2]
+        r = ring if self.center_cell else ring + 0.5
+        if self.center_cell and ring == 0:
+            return (r, 0.0)
+        return (r, 360 / self.widths[ring] * (cell + 0.5))
+
+    def cell_box(self, position: Position) -> tuple[float, float, float, float]:
+        # ccw, in, cw, out, as getbox in draw_maze.ps
+        ring, cell = position.coordinates[:2]
+        out = ring + (0.5 if self.center_cell else 1)
+        turn = 360 / self.widths[ring]
+        return (cell * turn, out - 1, (cell + 1) * turn, out)
+
+    @property
+    def has_flat_geometry(self) -> bool:
+        return not self.weave
+
+    def flat_center(self, position: Position) -> Point:
+        return self.polar_point(*self.polar_center(position))
+
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        if self.weave:
+            raise NotImplementedError("drawlist with weave")
+        if self.center_cell and position.coordinates[0] == 0:
+            points = [self.polar_point(0.5, 0)] + self.polar_arc(0.5, 0, self.degrees)
+            if self.degrees < 360:
+                points.append((0.0, 0.0))
+            return points
+        ccw, inner, cw, outer = self.cell_box(position)
+        points = [self.polar_point(inner, ccw), self.polar_point(outer, ccw)]
+        points += self.polar_arc(outer, ccw, cw)
+        points.append(self.polar_point(inner, cw))
+        points += self.polar_arc(inner, cw, ccw)
+        return points
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        if self.weave:
+            raise NotImplementedError("drawlist with weave")
+        ring = position.coordinates[0]
+        lines: list[list[Point]] = []
+        if self.center_cell and ring == 0:
+            outer = 0.5
+            door_width = 360 / self.widths[1]
+            center_sides = int(self.degrees * self.widths[1] / 360 + 1e-9)
+            out_walls = walls[:center_sides]
+            start = 0.0
+            if self.degrees < 360 and walls[-1]:
+                lines.append([self.polar_point(outer, 0), (0.0, 0.0), self.polar_point(outer, self.degrees)])
+        else:
+            ccw, inner, cw, outer = self.cell_box(position)
+            outstart = 3 if ring > 0 else 2
+            if walls[0]:
+                lines.append([self.polar_point(outer, cw), self.polar_point(inner, cw)])
+            if ring > 0 and walls[1]:
+                lines.append([self.polar_point(inner, cw)] + self.polar_arc(inner, cw, ccw))
+            if walls[outstart - 1]:
+                lines.append([self.polar_point(inner, ccw), self.polar_point(outer, ccw)])
+            out_walls = walls[outstart:]
+            door_width = (cw - ccw) / len(out_walls) if out_walls else 0.0
+            start = ccw
+        for i, wall in enumerate(out_walls):
+            if wall:
+                door_start = start + i * door_width
+                lines.append([self.polar_point(outer, door_start)] + self.polar_arc(outer, door_start, door_start + door_width))
+        return lines
+
+    def path_points(self, path: list[Position]) -> list[Point]:
+        # like mgoto in draw_maze.ps, curve around rings between cells
+        if not path:
+            return []
+        points = [self.cell_center(path[0])]
+        for first, second in zip(path, path[1:]):
+            old_r, old_t = self.polar_center(first)
+            new_r, new_t = self.polar_center(second)
+            new_t -= 360 * floor((new_t - old_t) / 360 + 0.5)
+            dx, dy = self.hyper_offset(second)
+            if old_r == 0 or new_r == 0 or new_t == old_t or self.hyper_offset(first) != (dx, dy):
+                points.append(self.cell_center(second))
+                continue
+            if old_r == new_r:
+                step = self.polar_arc(old_r, old_t, new_t)
+            elif new_r > old_r:
+                step = self.polar_arc(old_r, old_t, new_t) + [self.polar_point(new_r, new_t)]
+            else:
+                step = [self.polar_point(new_r, old_t)] + self.polar_arc(new_r, old_t, new_t)
+            points += [(x + dx, y + dy) for x, y in step]
+        return points
+
+    @property
+    def background_outline(self) -> list[Point]:
+        return dot_outline((0.0, 0.0), 2 * len(self.widths), 64)
+
     def find_link_pos(self, first: Position, second: Position) -> Position:
         # special case for center
         if first.coordinates[0] == 1 and second.coordinates[0] == 1 and self.center_cell:
@@ -190,6 +332,10 @@ class SemiCircleGrid(CircleGrid):
             firstring = 6
         super().__init__(parent_radius, center_cell=center_cell, firstring=firstring, degrees=180.0, **kwargs)
 
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.radius * 2 + self.center_cell,), {'firstring': self.firstring}
+
     @property
     def external_points(self) -> Sequence[tuple[float, ...]]:
         from math import cos, sin, tau
@@ -247,6 +393,34 @@ class PolygonGrid(CircleGrid):
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         return {'radius': self.radius, 'sides': self.sides, 'widths':  self.widths, 'center_cell': self.center_cell, 'slices': self.slices}
 
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.radius, self.sides), {'firstring': self.firstring, 'center_cell': self.center_cell, 'slices': self.slices}
+
+    def polar_point(self, r: float, theta: float) -> Point:
+        # polypolar in draw_maze.ps
+        big_angle = 360 / self.sides
+        pre = floor(theta / big_angle) * big_angle
+        post = pre + big_angle
+        sub_angle = (theta % big_angle) / big_angle
+        start = (cos(radians(pre)) * r, sin(radians(pre)) * r)
+        end = (cos(radians(post)) * r, sin(radians(post)) * r)
+        return (
+            start[0] + (end[0] - start[0]) * sub_angle,
+            start[1] + (end[1] - start[1]) * sub_angle,
+        )
+
+    def polar_arc(self, r: float, start: float, end: float) -> list[Point]:
+        # straight along each face, with a point at each corner crossed
+        big_angle = 360 / self.sides
+        old_face = floor(start / big_angle)
+        new_face = floor(end / big_angle)
+        if old_face < new_face:
+            faces = range(old_face + 1, new_face + 1)
+        else:
+            faces = range(old_face, new_face, -1)
+        return [self.polar_point(r, face * big_angle) for face in faces] + [self.polar_point(r, end)]
+
     @property
     def external_points(self) -> Sequence[tuple[float, ...]]:
         from math import cos, sin, tau
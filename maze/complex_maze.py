@@ -1,8 +1,10 @@
 from .grid import BaseGrid, SingleSizeGrid
 from .multigrid import MultiGrid, GridSpec, EdgeSpec
 from .rectgrid import RectBaseGrid, RectGrid, ZetaGrid, UpsilonGrid
-from .circlegrid import SemiCircleGrid, PolygonGrid
+from .circlegrid import SemiCircleGrid, PolygonGrid, ring_layout
 from .hexgrid import HexGrid, TriGrid
+from .topology import cached_topology
+from typing import Optional
 from typing_extensions import Protocol
 
 class ComplexMaze(Protocol):
@@ -17,8 +19,10 @@ def complex(cmf: ComplexMaze) -> ComplexMaze:
     complex_mazes[cmf.__name__] = cmf   # type: ignore [attr-defined] # fixed in next mypy version
     return cmf
 
-def complex_grid(mazetype: str, size: int, **kwargs: str) -> MultiGrid:
-    return complex_mazes[mazetype](size, **kwargs)
+def complex_grid(mazetype: str, size: int, topology_cache: Optional[str] = None, **kwargs: str) -> MultiGrid:
+    'build a complex maze grid, or copy it if built before in this process or into topology_cache'
+    return cached_topology(mazetype, size, kwargs,
+        lambda: complex_mazes[mazetype](size, **kwargs), topology_cache)
 
 @complex
 def slender_star(size: int, **kwargs: str) -> MultiGrid:
@@ -28,11 +32,10 @@ def slender_star(size: int, **kwargs: str) -> MultiGrid:
     point_kwargs = {'slices': 1, "center_cell": center_cell}
     point_size = None
 
-    drop_grid = PolygonGrid(*polygon_args, **polygon_kwargs)    # type: ignore [arg-type]
-    triangle_width = drop_grid.widths[-1] // 5
+    # point grids have firstring 10 like the center, being 10-sided
+    triangle_width = ring_layout(size, 10, center_cell).widths[-1] // 5
     for i in range(size, size * 3):
-        drop_grid = PolygonGrid(i, 10, **point_kwargs)   # type: ignore [arg-type]
-        outer_width = drop_grid.widths[-1] // 10
+        outer_width = ring_layout(i, 10, center_cell).widths[-1] // 10
         if outer_width == triangle_width:
             point_size = i
         if outer_width > triangle_width:
@@ -0,0 +1,98 @@
+# derive smaller pngs from one large one, averaging the area each output
+# pixel covers, in a single streaming pass over the source rows
+
+from collections.abc import Sequence
+from math import ceil
+from typing import Any
+
+def png_size(span: float, pixels: float) -> int:
+    'image size along one axis for span maze units, as pstopng works it out'
+    return int(span * pixels) + 1
+
+class AreaScaler:
+    'accumulate source rows into output rows ratio times smaller'
+    def __init__(self, size: tuple[int, int], ratio: float, source_height: int) -> None:
+        import numpy as np
+        self.np = np
+        self.width, self.height = size
+        self.ratio = ratio
+        # source columns each output column starts at, padded with white
+        self.padded_width = ceil(self.width * ratio) + 1
+        edges = np.arange(self.width + 1) * ratio
+        self.edge_index = np.floor(edges).astype(int)
+        self.edge_fraction = (edges - self.edge_index)[:, None]
+        self.filled = 0.0
+        self.accumulator = np.zeros((self.width, 3))
+        self.rows: list[Any] = []
+        # pngs line up at the bottom edge, so the top rows may not match up
+        self.skip = source_height - self.height * ratio
+        if self.skip < 0:
+            self.add(self.white(), -self.skip)
+
+    def scale_row(self, row: Any) -> Any:
+        np = self.np
+        padded = np.full((self.padded_width, 3), 255.0)
+        used = min(len(row), self.padded_width)
+        padded[:used] = row[:used]
+        total = np.zeros((self.padded_width + 1, 3))
+        np.cumsum(padded, axis=0, out=total[1:])
+        at_edges = total[self.edge_index] + self.edge_fraction * padded[self.edge_index]
+        return (at_edges[1:] - at_edges[:-1]) / self.ratio
+
+    def white(self) -> Any:
+        return self.np.full((self.padded_width, 3), 255.0)
+
+    def add(self, row: Any, amount: float = 1.0) -> None:
+        if self.skip > 0:
+            skipped = min(amount, self.skip)
+            self.skip -= skipped
+            amount -= skipped
+        scaled = None
+        while amount > 1e-9 and len(self.rows) < self.height:
+            if scaled is None:
+                scaled = self.scale_row(row)
+            step = min(amount, self.ratio - self.filled)
+            self.accumulator += scaled * step
+            self.filled += step
+            amount -= step
+            if self.filled >= self.ratio - 1e-9:
+                self.emit()
+
+    def emit(self) -> None:
+        np = self.np
+        out = np.clip(np.rint(self.accumulator / self.ratio), 0, 255).astype(np.uint8)
+        self.rows.append(out.reshape(-1))
+        self.accumulator[:] = 0
+        self.filled = 0.0
+
+    def finish(self) -> list[Any]:
+        while len(self.rows) < self.height:
+            self.add(self.white(), self.ratio - self.filled)
+        return self.rows
+
+def downscale_png(
+        source: str,
+        pixels: float,
+        targets: Sequence[tuple[str, float]],
+        span: tuple[float, float],
+) -> None:
+    'write (filename, pixels) targets from the source png drawn at pixels'
+    import png
+    import numpy as np
+    reader = png.Reader(filename=source)
+    width, height, rows, _ = reader.asRGB8()
+    scalers = [
+        (filename, AreaScaler(
+            (png_size(span[0], target), png_size(span[1], target)),
+            pixels / target,
+            height,
+        ))
+        for filename, target in targets
+    ]
+    for row in rows:
+        source_row = np.frombuffer(bytes(row), dtype=np.uint8).reshape(-1, 3).astype(float)
+        for _, scaler in scalers:
+            scaler.add(source_row)
+    for filename, scaler in scalers:
+        with open(filename, 'wb') as f:
+            png.Writer(scaler.width, scaler.height, greyscale=False).write(f, scaler.finish())
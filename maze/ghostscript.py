@@ -0,0 +1,304 @@
+# render ps with ghostscript: big pages to png in horizontal bands that
+# render in parallel and are stitched back together as they finish, many
+# small pages to png from one gs run, or whole documents to pdf
+
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+from typing import IO, Optional
+
+# same supersampling as pstopng
+ANTIALIAS = 4
+
+def band_ranges(height: int, bands: int) -> list[tuple[int, int]]:
+    'split rows 0 to height into bands of nearly equal size, top first'
+    bands = max(1, min(bands, height))
+    edges = [height * i // bands for i in range(bands + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+def render_band(
+        filename: str,
+        object_name: str,
+        alignment: Sequence[float],
+        pixels: float,
+        size: tuple[int, int],
+        rows: tuple[int, int],
+        gs_options: Sequence[str] = (),
+        device: str = 'png16m',
+) -> bytes:
+    'png data for the given rows of the page pstopng would draw'
+    left, bottom = alignment[:2]
+    width, height = size
+    top_row, bottom_row = rows
+    setup = " ".join([
+        # shift the page so this band lands in the device
+        f"0 {(bottom_row - height) * ANTIALIAS} translate",
+        f"1 {pixels} div setlinewidth",
+        f"{ANTIALIAS} dup scale",
+        f"{pixels} dup scale",
+        f"{left} neg {bottom} neg translate",
+        f"{object_name} showpage",
+    ])
+    command = [
+        'gs', '-q', '-dNOPAUSE', '-dBATCH', '-dSAFER',
+        f'-sDEVICE={device}',
+        f'-g{width * ANTIALIAS}x{(bottom_row - top_row) * ANTIALIAS}',
+        f'-dDownScaleFactor={ANTIALIAS}',
+        *gs_options,
+        '-sOutputFile=-',
+        filename,
+        '-c', setup,
+    ]
+    return subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
+
+def banded_png(
+        filename: str,
+        object_name: str,
+        alignment: Sequence[float],
+        pixels: float,
+        output: str,
+        bands: int,
+        jobs: Optional[int] = None,
+        gs_options: Sequence[str] = (),
+) -> None:
+    'draw object_name from the ps file into output, as pstopng would'
+    import png
+    left, bottom, right, top = alignment
+    size = (int((right - left) * pixels) + 1, int((top - bottom) * pixels) + 1)
+
+    def band_png(rows: tuple[int, int]) -> bytes:
+        return render_band(filename, object_name, alignment, pixels, size, rows, gs_options)
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        def stitched_rows() -> Iterator[bytearray]:
+            # map yields bands in order while later ones are still rendering
+            for data in executor.map(band_png, band_ranges(size[1], bands)):
+                yield from png.Reader(bytes=data).asRGB8()[2]
+
+        with open(output, 'wb') as f:
+            png.Writer(size[0], size[1], greyscale=False).write(f, stitched_rows())
+
+def read_png(stream: IO[bytes], signature: bytes = b'') -> Optional[bytes]:
+    'the next png file from a stream of them, or None at the end'
+    signature += stream.read(8 - len(signature))
+    if not signature:
+        return None
+    chunks = [signature]
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            raise EOFError("png stream ended inside a file")
+        length = int.from_bytes(header[:4], 'big')
+        body = stream.read(length + 4)
+        if len(body) < length + 4:
+            raise EOFError("png stream ended inside a chunk")
+        chunks += [header, body]
+        if header[4:] == b'IEND':
+            return b''.join(chunks)
+
+def page_ps(size: tuple[int, int], page: str) -> str:
+    'ps for a page of size pixels, drawn at ANTIALIAS times that and scaled down'
+    width, height = size
+    return "\n".join([
+        f"<< /PageSize [{width * ANTIALIAS} {height * ANTIALIAS}] >> setpagedevice",
+        f"{ANTIALIAS} dup scale",
+        page,
+        "showpage",
+    ])
+
+def stream_pages(
+        prologue: str,
+        pages: Sequence[tuple[tuple[int, int], str]],
+        gs_options: Sequence[str] = (),
+) -> Iterator[bytes]:
+    'render each (size, ps code) page in one gs run, yielding pngs as they finish'
+    with tempfile.NamedTemporaryFile('w', suffix='.ps') as f:
+        f.write(prologue)
+        f.write("%%EndProlog\n")
+        for size, page in pages:
+            f.write(f"save\n{page_ps(size, page)}\nrestore\n")
+        f.flush()
+        command = [
+            'gs', '-q', '-dNOPAUSE', '-dBATCH', '-dSAFER',
+            '-sDEVICE=png16m',
+            f'-dDownScaleFactor={ANTIALIAS}',
+            *gs_options,
+            '-sOutputFile=-',
+            f.name,
+        ]
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+            assert process.stdout is not None
+            while (data := read_png(process.stdout)) is not None:
+                yield data
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
+
+def ps_to_pdf(filename: str, output: str, gs_options: Sequence[str] = ()) -> None:
+    'convert a whole ps document to pdf'
+    command = [
+        'gs', '-q', '-dNOPAUSE', '-dBATCH', '-dSAFER',
+        '-sDEVICE=pdfwrite',
+        *gs_options,
+        '-sOutputFile=' + output,
+        filename,
+    ]
+    subprocess.run(command, check=True)
+
+# long-running gs interpreters that take pages on stdin and return pngs on
+# stdout, so small mazes don't pay for starting gs and reading the prologue
+
+# markers gs prints instead of a png, the same length as the png signature
+PONG = b'MAZEPONG'
+ERROR = b'MAZEERR\n'
+
+class GhostscriptWorker:
+    def __init__(self, prologue: str, gs_options: Sequence[str] = ()) -> None:
+        self.prologue = prologue
+        self.gs_options = gs_options
+        self.start()
+
+    def start(self) -> None:
+        command = [
+            'gs', '-q', '-dNOPAUSE', '-dNOPROMPT', '-dSAFER',
+            '-sDEVICE=png16m',
+            f'-dDownScaleFactor={ANTIALIAS}',
+            *self.gs_options,
+            '-sOutputFile=-',
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.send(self.prologue)
+
+    def stop(self) -> None:
+        if self.process.poll() is None:
+            try:
+                self.send("quit")
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def send(self, text: str) -> None:
+        assert self.process.stdin is not None
+        self.process.stdin.write(text.encode() + b"\n")
+        self.process.stdin.flush()
+
+    def healthy(self, timeout: float = 5.0) -> bool:
+        'whether gs is still running and answering'
+        import select
+        if self.process.poll() is not None:
+            return False
+        assert self.process.stdout is not None
+        try:
+            self.send(f"({PONG.decode()}) print flush")
+        except OSError:
+            return False
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        return bool(ready) and self.process.stdout.read(len(PONG)) == PONG
+
+    def render(self, size: tuple[int, int], page: str) -> bytes:
+        'png of the page, raising RuntimeError if the ps fails'
+        assert self.process.stdout is not None
+        # a failing page leaves the interpreter as it was
+        self.send("\n".join([
+            "/mazejob save def {",
+            page_ps(size, page),
+            "} stopped {",
+            f"    clear cleardictstack ({ERROR.decode().strip()}\\n) print",
+            "    $error /errorname get =string cvs print (\\n) print flush",
+            "} if mazejob restore",
+        ]))
+        header = self.process.stdout.read(len(ERROR))
+        if header == ERROR:
+            raise RuntimeError(f"ghostscript error {self.process.stdout.readline().decode().strip()}")
+        if not header.startswith(b'\x89PNG'):
+            raise EOFError("ghostscript stopped answering")
+        data = read_png(self.process.stdout, header)
+        if data is None:
+            raise EOFError("ghostscript stopped answering")
+        return data
+
+class GhostscriptPool:
+    '''up to `workers` gs interpreters with the prologue loaded, used by
+    png_print while the pool is open as a context manager'''
+    def __init__(self,
+            workers: Optional[int] = None,
+            prologue: Optional[str] = None,
+            gs_options: Sequence[str] = (),
+    ) -> None:
+        self.size = workers or os.cpu_count() or 1
+        if prologue is None:
+            with open(os.path.dirname(__file__) + '/../includes/draw_maze.ps') as f:
+                prologue = f.read()
+        self.prologue = prologue
+        self.gs_options = gs_options
+        self.idle: queue.LifoQueue[GhostscriptWorker] = queue.LifoQueue()
+        self.workers: list[GhostscriptWorker] = []
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> 'GhostscriptPool':
+        active_pools.append(self)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        active_pools.remove(self)
+        self.close()
+
+    def close(self) -> None:
+        with self.lock:
+            for worker in self.workers:
+                worker.stop()
+            self.workers = []
+            self.idle = queue.LifoQueue()
+
+    def acquire(self) -> GhostscriptWorker:
+        with self.lock:
+            if self.idle.empty() and len(self.workers) < self.size:
+                worker = GhostscriptWorker(self.prologue, self.gs_options)
+                self.workers.append(worker)
+                return worker
+        worker = self.idle.get()
+        if worker.process.poll() is not None:
+            worker.restart()
+        return worker
+
+    def check(self) -> int:
+        'restart idle workers that stopped answering, returning how many'
+        restarted = 0
+        workers = []
+        while not self.idle.empty():
+            workers.append(self.idle.get())
+        for worker in workers:
+            if not worker.healthy():
+                worker.restart()
+                restarted += 1
+            self.idle.put(worker)
+        return restarted
+
+    def render(self, size: tuple[int, int], page: str) -> bytes:
+        'png of a page, retried once on a fresh gs if the worker crashed'
+        worker = self.acquire()
+        try:
+            try:
+                return worker.render(size, page)
+            except (EOFError, OSError):
+                worker.restart()
+                return worker.render(size, page)
+        except (EOFError, OSError):
+            worker.restart()
+            raise
+        finally:
+            self.idle.put(worker)
+
+active_pools: list[GhostscriptPool] = []
+
+def active_pool() -> Optional[GhostscriptPool]:
+    'the innermost pool in use, if any'
+    return active_pools[-1] if active_pools else None
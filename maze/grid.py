@@ -1,14 +1,18 @@
 from .positions import Position, LinkPosition, IntPosition, Direction, cardinal_directions, add_direction, Coordinates
+from .psprologue import minimal_prologue
 import random
 import os
 from collections import defaultdict
-from collections.abc import Iterable
+from copy import deepcopy
+from collections.abc import Iterable, Iterator, Set
 from typing import Any, Optional, Callable, NamedTuple, Sequence
 from typing_extensions import Protocol
-from itertools import product
+from itertools import product, islice
+from math import dist, prod
 from numbers import Real
 from dataclasses import dataclass
-import json
+
+Point = tuple[float, float]
 
 class Cell():
     def __init__(self, location: Position) -> None:
@@ -21,11 +25,176 @@ class Cell():
     def remove_link(self, link: Position) -> None:
         self.links.discard(link)
 
+    def clear_links(self) -> None:
+        self.links.clear()
+
     @property
     def flat_links(self) -> set[tuple[Optional[str], Coordinates]]:
         # for weaving it can be useful to ignore the position type
         return set([p.flattened for p in self.links])
 
+class CompactCell():
+    '''
+    a cell keeping its links as bits over its grid's pos_adjacents: bit j
+    of mask for a link to the j-th adjacent cell, bit j of link_mask for a
+    link to the weave link cell there, and any other links in extra
+    '''
+    __slots__ = ('position', 'grid', 'mask', 'link_mask', 'extra')
+
+    def __init__(self, location: Position, grid: 'BaseGrid') -> None:
+        self.position = location
+        self.grid = grid
+        self.mask = 0
+        self.link_mask = 0
+        self.extra: Optional[set[Position]] = None
+
+    def _bits(self, link: Position) -> int:
+        'bits for the adjacent cells at link, ignoring its position type'
+        bits = 0
+        for j, adjacent in enumerate(self.grid.pos_adjacents(self.position)):
+            # equal positions can be in different grids
+            if adjacent.coordinates == link.coordinates and adjacent.gridname == link.gridname:
+                bits |= 1 << j
+        return bits
+
+    def add_link(self, link: Position) -> None:
+        bits = self._bits(link)
+        if not bits:
+            if self.extra is None:
+                self.extra = set()
+            self.extra.add(link)
+        elif link.position_type == 'link':
+            self.link_mask |= bits
+        else:
+            self.mask |= bits
+
+    def remove_link(self, link: Position) -> None:
+        if self.extra is not None:
+            self.extra.discard(link)
+        bits = self._bits(link)
+        if link.position_type == 'link':
+            self.link_mask &= ~bits
+        else:
+            self.mask &= ~bits
+
+    def clear_links(self) -> None:
+        self.mask = self.link_mask = 0
+        self.extra = None
+
+    def has_link(self, direction: int) -> bool:
+        'whether there is a link towards the adjacent cell at index direction'
+        return bool((self.mask | self.link_mask) >> direction & 1)
+
+    # made afresh from the bits on each read, so changing it does nothing
+    @property
+    def links(self) -> set[Position]:
+        links: set[Position] = set(self.extra or ())
+        if self.mask or self.link_mask:
+            for j, adjacent in enumerate(self.grid.pos_adjacents(self.position)):
+                if self.mask >> j & 1:
+                    links.add(adjacent)
+                if self.link_mask >> j & 1:
+                    links.add(LinkPosition.from_position(adjacent))
+        return links
+
+    @links.setter
+    def links(self, links: set[Position]) -> None:
+        self.clear_links()
+        for link in links:
+            self.add_link(link)
+
+    @property
+    def flat_links(self) -> set[tuple[Optional[str], Coordinates]]:
+        return set([p.flattened for p in self.links])
+
+GridCell = Cell | CompactCell
+
+class ImplicitCells(dict[Position, GridCell]):
+    '''
+    the cells of a grid that works out which coordinates are in it rather
+    than making a cell for each: cells are kept once they're linked or
+    added, the rest are made up empty each time they're looked up
+    '''
+    def __init__(self, grid: 'BaseGrid') -> None:
+        super().__init__()
+        self.grid = grid
+        self.hyper_count = prod(grid.hyper)
+        self.column_count = grid.column_count
+        # cells kept that aren't columns of the grid, like weave link cells
+        self.added = 0
+
+    def in_grid(self, position: Position) -> bool:
+        coordinates = position.coordinates
+        hyper = self.grid.hyper
+        return (
+            position.position_type == 'int'
+            and position.gridname == self.grid._gridname
+            and len(coordinates) == 2 + len(hyper)
+            and all(0 <= c < size for c, size in zip(coordinates[2:], hyper))
+            and self.grid.has_column(coordinates[:2])
+        )
+
+    def __contains__(self, position: object) -> bool:
+        return dict.__contains__(self, position) or (
+            isinstance(position, Position) and self.in_grid(position))
+
+    def __missing__(self, position: Position) -> GridCell:
+        if not self.in_grid(position):
+            raise KeyError(position)
+        return self.grid._new_cell(position)
+
+    def __setitem__(self, position: Position, cell: GridCell) -> None:
+        if not dict.__contains__(self, position) and not self.in_grid(position):
+            self.added += 1
+        super().__setitem__(position, cell)
+
+    def __delitem__(self, position: Position) -> None:
+        super().__delitem__(position)
+        if not self.in_grid(position):
+            self.added -= 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.added = 0
+
+    def keep(self, position: Position) -> GridCell:
+        'the cell at position, kept from now on'
+        cell = dict.get(self, position)
+        if cell is None:
+            cell = self[position]
+            self[position] = cell
+        return cell
+
+    def __len__(self) -> int:
+        return self.column_count * self.hyper_count + self.added
+
+    # in the order the cells would have been added
+    def __iter__(self) -> Iterator[Position]:
+        gridname = self.grid._gridname
+        hyper_ranges = [range(size) for size in self.grid.hyper]
+        for coordinates in self.grid.column_coordinates():
+            for addend in product(*hyper_ranges):
+                yield IntPosition(coordinates + addend, gridname)
+        yield from [p for p in dict.keys(self) if not self.in_grid(p)]
+
+    def keys(self) -> Iterator[Position]:                  # type: ignore [override]
+        return iter(self)
+
+    def values(self) -> Iterator[GridCell]:                # type: ignore [override]
+        return (self[p] for p in self)
+
+    def items(self) -> Iterator[tuple[Position, GridCell]]:    # type: ignore [override]
+        return ((p, self[p]) for p in self)
+
+    def position_at(self, index: int) -> Position:
+        'the index-th position, not counting added cells'
+        column, hyper_index = divmod(index, self.hyper_count)
+        addend: list[int] = []
+        for size in reversed(self.grid.hyper):
+            hyper_index, c = divmod(hyper_index, size)
+            addend.insert(0, c)
+        return IntPosition(self.grid.column_at(column) + tuple(addend), self.grid._gridname)
+
 # convenience for ps printing
 def ps_list(iterable: Iterable[Any]) -> str:
     return '[' + ' '.join([str(x) for x in iterable]) + ']'
@@ -33,6 +202,88 @@ def ps_list(iterable: Iterable[Any]) -> str:
 def toppath():
     return os.path.dirname(__file__) + '/..'
 
+# compact number formatting for generated ps
+def ps_number(value: float) -> str:
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+def rotate_point(point: Point, angle: float) -> Point:
+    from math import cos, sin, radians
+    cos_t = cos(radians(angle))
+    sin_t = sin(radians(angle))
+    return (point[0] * cos_t - point[1] * sin_t, point[0] * sin_t + point[1] * cos_t)
+
+# rgb equivalent of setsinebowcolor in draw_maze.ps
+def sinebow(angle: float) -> tuple[float, float, float]:
+    from math import cos, radians
+    half_angle = angle / 2
+    return (
+        cos(radians(half_angle)) ** 2,
+        cos(radians(half_angle + 120)) ** 2,
+        cos(radians(half_angle - 120)) ** 2,
+    )
+
+def dot_outline(center: Point, radius: float, steps: int = 16) -> list[Point]:
+    from math import cos, sin, tau
+    return [
+        (center[0] + cos(tau * i / steps) * radius, center[1] + sin(tau * i / steps) * radius)
+        for i in range(steps)
+    ]
+
+def merge_segments(polylines: Iterable[Sequence[Point]]) -> list[list[Point]]:
+    'deduplicate wall segments and chain them into as few polylines as possible'
+    def key(point: Point) -> Point:
+        return (round(point[0], 6) + 0.0, round(point[1], 6) + 0.0)
+    segments: set[tuple[Point, Point]] = set()
+    for polyline in polylines:
+        for a, b in zip(polyline, polyline[1:]):
+            start, end = sorted((key(a), key(b)))
+            if start != end:
+                segments.add((start, end))
+    segments_for_point: dict[Point, list[tuple[Point, Point]]] = defaultdict(list)
+    for segment in sorted(segments):
+        for point in segment:
+            segments_for_point[point].append(segment)
+    unused = set(segments)
+
+    def walk(start: Point) -> list[Point]:
+        chain = [start]
+        while True:
+            options = [s for s in segments_for_point[chain[-1]] if s in unused]
+            if not options:
+                return chain
+            segment = options[0]
+            unused.remove(segment)
+            chain.append(segment[1] if segment[0] == chain[-1] else segment[0])
+
+    chains: list[list[Point]] = []
+    # start from endpoints and junctions, then pick up closed loops
+    starts = [p for p, s in segments_for_point.items() if len(s) != 2]
+    for start in starts + sorted(segments_for_point.keys()):
+        while any(s in unused for s in segments_for_point[start]):
+            chains.append(walk(start))
+    # drop points in the middle of straight runs
+    result: list[list[Point]] = []
+    for chain in chains:
+        simple = [chain[0]]
+        for i in range(1, len(chain) - 1):
+            a, b, c = simple[-1], chain[i], chain[i + 1]
+            cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+            dot = (b[0] - a[0]) * (c[0] - b[0]) + (b[1] - a[1]) * (c[1] - b[1])
+            if abs(cross) > 1e-9 or dot < 0:
+                simple.append(b)
+        simple.append(chain[-1])
+        result.append(simple)
+    return result
+
+# where each position is in the field, split up by the grid it's in
+def field_by_grid(field: list[set[Position]]) -> dict[Optional[str], dict[Position, int]]:
+    by_grid: defaultdict[Optional[str], dict[Position, int]] = defaultdict(dict)
+    for i, frontier in enumerate(field):
+        for position in frontier:
+            by_grid[position.gridname][position] = i
+    return by_grid
+
 class PrinterFunction(Protocol): 
     def __call__(self,
         maze: 'BaseGrid',
@@ -63,23 +314,72 @@ class GridPosition:
 NullPosition = GridPosition()
 
 class BaseGrid():
-    _grid: dict[Position, Cell]
+    _grid: dict[Position, GridCell]
     _gridname: Optional[str]
     _edge_map: dict[Position, Position]
+    # the cells of _grid again, by the name of the grid they're in
+    _cells_for_grid: dict[Optional[str], dict[Position, GridCell]]
+    # what fresh copies share rather than copy, as it only depends on the positions
+    copy_shared: tuple[str, ...] = ('_edge_map',)
 
     def __init__(self, **kwargs: Any) -> None:
         if 'grid' in kwargs:
             self._grid = kwargs.pop('grid')
             self._gridname = kwargs.pop('gridname')
+            self._cells_for_grid = kwargs.pop('cells_for_grid', {})
         else:
             self._grid = {}
             self._gridname = None
+            self._cells_for_grid = {}
 
         self._edge_map = kwargs.pop('edge_map', {})
         self.set_options(**kwargs)
 
+    # every grid class by name, for rebuilding saved mazes
+    grid_types: dict[str, type['BaseGrid']] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        BaseGrid.grid_types[cls.__name__] = cls
+
+    @staticmethod
+    def grid_type(name: str) -> type['BaseGrid']:
+        'the grid class called name, wherever it is defined'
+        # importing the grid modules registers their classes
+        from . import rectgrid, circlegrid, hexgrid, multigrid  # noqa: F401
+        return BaseGrid.grid_types[name]
+
+    # implicit grids work out their columns from these rather than keeping
+    # a cell for each one
+    def column_coordinates(self) -> Iterator[Coordinates]:
+        raise NotImplementedError('column_coordinates')
+
+    def has_column(self, coordinates: Coordinates) -> bool:
+        raise NotImplementedError('has_column')
+
+    @property
+    def column_count(self) -> int:
+        return sum(1 for _ in self.column_coordinates())
+
+    def column_at(self, index: int) -> Coordinates:
+        return next(islice(self.column_coordinates(), index, None))
+
+    def _add_columns(self) -> None:
+        'add a column for each of column_coordinates, or leave them implicit'
+        if not self.implicit:
+            for coordinates in self.column_coordinates():
+                self._add_column(coordinates)
+            return
+        if self._gridname is not None:
+            raise ValueError("subgrids can't be implicit")
+        cells = ImplicitCells(self)
+        self._grid = cells
+        self._cells_for_grid = {None: cells}
+
     def _add_column(self, coordinates: Coordinates) -> None:
         'Add a cell to the grid on every hyper plane'
+        if self.implicit:
+            raise ValueError(f"{type(self).__name__} can't be implicit")
         ranges: list[range] = []
         for width in self.hyper:
             ranges.append(range(width))
@@ -91,7 +391,59 @@ class BaseGrid():
             position = p_or_c
         else:
             position = IntPosition(p_or_c, gridname=self._gridname)
-        self._grid[position] = Cell(position)
+        cell = self._new_cell(position)
+        self._grid[position] = cell
+        self._cells_for_grid.setdefault(position.gridname, {})[position] = cell
+
+    def _new_cell(self, position: Position) -> GridCell:
+        return CompactCell(position, self) if self.compact_cells else Cell(position)
+
+    def _cell(self, position: Position) -> GridCell:
+        'the cell at position, to be linked'
+        if isinstance(self._grid, ImplicitCells):
+            return self._grid.keep(position)
+        return self._grid[position]
+
+    def _clear(self) -> None:
+        'remove every cell, from every grid sharing this one'
+        self._grid.clear()
+        self._cells_for_grid.clear()
+
+    def reset(self) -> None:
+        '''
+        remove every link, and the link cells made for weaving, from every
+        grid sharing this one, leaving the grid as it was built
+        '''
+        if isinstance(self._grid, ImplicitCells):
+            self._grid.clear()
+            return
+        for position in [p for p in self._grid if p.position_type == 'link']:
+            del self._grid[position]
+            del self._cells_for_grid[position.gridname][position]
+        for cell in self._grid.values():
+            cell.clear_links()
+
+    def fresh_copy(self) -> 'BaseGrid':
+        'a copy of the grid as it was built, with new cells but the same positions and edge map'
+        # subgrids share these, so the copies of them have to be shared too
+        memo = {
+            id(self._grid): {},
+            id(self._cells_for_grid): {},
+            **{id(getattr(self, name)): getattr(self, name) for name in self.copy_shared},
+        }
+        copy = deepcopy(self, memo)
+        if self.implicit:
+            copy._add_columns()
+            return copy
+        for position in self._grid:
+            if position.position_type != 'link':
+                copy._add_cell(position)
+        return copy
+
+    @property
+    def _own_cells(self) -> dict[Position, GridCell]:
+        'cells of this grid, leaving out those of other subgrids'
+        return self._cells_for_grid.get(self._gridname, {})
 
     algorithms: dict[str, MazeFunction] = {}
 
@@ -110,7 +462,7 @@ class BaseGrid():
     def __contains__(self, position: Position) -> bool:
         return position in self._grid
 
-    def __getitem__(self, position: Position) -> Cell:
+    def __getitem__(self, position: Position) -> GridCell:
         return self._grid[position]
 
     def __len__(self) -> int:
@@ -125,8 +477,21 @@ class BaseGrid():
         linewidth: Optional[float] = None,
         inset: Optional[float] = None,
         pixels: Optional[float] = None,
+        scaled_pixels: Optional[list[float]] = None,
         room_size: Optional[int] = None,
         grid_position: GridPosition = NullPosition,
+        drawlist: Optional[bool] = None,
+        cell_encoding: Optional[str] = None,
+        cell_comments: Optional[bool] = None,
+        shape_cache: Optional[bool] = None,
+        bands: Optional[int] = None,
+        jobs: Optional[int] = None,
+        gs_options: Optional[list[str]] = None,
+        layer_cache: Optional[str] = None,
+        json_format: Optional[str] = None,
+        json_gzip: Optional[bool] = None,
+        compact_cells: Optional[bool] = None,
+        implicit: Optional[bool] = None,
     ) -> None:
         self.weave = weave
         self.hyper = hyper or []
@@ -136,8 +501,27 @@ class BaseGrid():
         self.linewidth = linewidth
         self.inset = inset
         self.pixels = pixels or 20.0
+        self.scaled_pixels = scaled_pixels or []
+        if any(p >= self.pixels for p in self.scaled_pixels):
+            raise ValueError("scaled pixel sizes must be smaller than pixels")
         self.room_size = room_size or 1
         self.grid_position = grid_position
+        self.drawlist = drawlist
+        if cell_encoding not in (None, 'hex', 'ascii85'):
+            raise ValueError(f"unknown cell encoding {cell_encoding}")
+        self.cell_encoding = cell_encoding
+        self.cell_comments = cell_comments
+        self.shape_cache = shape_cache
+        self.bands = bands
+        self.jobs = jobs
+        self.gs_options = gs_options or []
+        self.layer_cache = layer_cache
+        if json_format not in (None, 'nested', 'columnar'):
+            raise ValueError(f"unknown json format {json_format}")
+        self.json_format = json_format or 'nested'
+        self.json_gzip = json_gzip
+        self.compact_cells = compact_cells
+        self.implicit = implicit
 
     # quick way to get a position for coordinates in this grid
     def _pos(self, coordinates: Coordinates) -> Position:
@@ -146,8 +530,8 @@ class BaseGrid():
     def connect(self, first: Position, second: Position) -> None:
         # what if there's a distance between the two cells?
         if IntPosition(second.coordinates, second.gridname) in self.pos_adjacents(first):
-            self._grid[first].add_link(second)
-            self._grid[second].add_link(first)
+            self._cell(first).add_link(second)
+            self._cell(second).add_link(first)
             return
         # link square is between both, add link entry
         link_pos = self.find_link_pos(first, second)
@@ -156,8 +540,8 @@ class BaseGrid():
         self.connect(second, link_pos)
 
     def disconnect(self, first: Position, second: Position) -> None:
-        self._grid[first].remove_link(second)
-        self._grid[second].remove_link(first)
+        self._cell(first).remove_link(second)
+        self._cell(second).remove_link(first)
 
     def find_link_pos(self, first: Position, second: Position) -> Position:
         # general solution
@@ -173,6 +557,9 @@ class BaseGrid():
         return LinkPosition.from_position(intersection_positions.pop())
 
     def random_point(self) -> Position:
+        if isinstance(self._grid, ImplicitCells) and not self._grid.added:
+            # the same choice as from a list of every position
+            return self._grid.position_at(random.randrange(len(self._grid)))
         return (random.choice(list(self._grid.keys())))
 
     def pos_neighbors(self, start: Position) -> list[Position]:
@@ -319,6 +706,32 @@ class BaseGrid():
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         raise NotImplementedError("size_dict")
 
+    # args and kwargs to build this grid again, before any cells are linked
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        raise NotImplementedError("init_args")
+
+    def to_arrays(self) -> dict[str, Any]:
+        from .arrays import grid_arrays
+        return grid_arrays(self)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, Any], **kwargs: Any) -> 'BaseGrid':
+        'rebuild a maze from to_arrays output, with kwargs for the drawing options'
+        from .arrays import grid_from_arrays
+        return grid_from_arrays(arrays, **kwargs)
+
+    def save(self, filename: str) -> None:
+        from .mazefile import save_maze
+        save_maze(self, filename)
+
+    @classmethod
+    def load(cls, filename: str, **kwargs: Any) -> 'BaseGrid':
+        'rebuild a maze written by save, with kwargs for the drawing options'
+        from .mazefile import MazeView
+        with MazeView(filename) as view:
+            return view.grid(**kwargs)
+
     ### Printing support 
 
     def transform_point(self, point: tuple[float, ...]) -> tuple[float, ...]:
@@ -368,28 +781,38 @@ class BaseGrid():
         return tuple(bbox)
 
     # start of ps code
+    # procedures in draw_maze.ps called by ps_alignment and ps_instructions
+    @property
+    def ps_entry_points(self) -> set[str]:
+        if self.drawlist:
+            return {'softscale'}
+        return {'softscale', 'draw' + self.maze_type}
+
     @property
     def ps_prologue(self) -> str:
-        draw_maze = toppath() + '/includes/draw_maze.ps'
         if self.noflat:
+            draw_maze = toppath() + '/includes/draw_maze.ps'
             return f"%!\n({draw_maze}) run\n"
         else:
-            with open(draw_maze, 'r') as f:
-                include = f.read()
-                return include
+            return minimal_prologue(frozenset(self.ps_entry_points))
 
     # ps command to align ps output
     @property
     def ps_alignment(self) -> str:
+        return self.page_alignment((0.25, 0.25, 8, 10.5))
+
+    # ps command to fit the maze into a (left, bottom, width, height) box in inches
+    def page_alignment(self, box: tuple[float, float, float, float]) -> str:
         bbox = self.true_bounding_box
         corners = ( (bbox[0], bbox[1]), (bbox[2], bbox[3]) )
-        target_sizes = (8, 10.5)
+        target_sizes = box[2:]
         box_sizes = (corners[1][c] - corners[0][c] for c in range(2))
         scale = min([t / b for t, b in zip(target_sizes, box_sizes)])
         box_centers = ( (corners[0][c] + corners[1][c]) / 2 for c in range(2))
         translate = ' '. join([str(-f) for f in box_centers])
+        target_center = ' '.join(ps_number(box[c] + box[c + 2] / 2) for c in range(2))
         return " ".join([
-            "72 softscale 4.25 5.5 translate", 
+            f"72 softscale {target_center} translate",
             f"{scale} dup scale",
             f"{translate} translate", 
         ])
@@ -405,20 +828,45 @@ class BaseGrid():
         ]
         return [str(border) for border in borders]
 
-    def ps_instructions(self,
-            path: list[Position] = [],
-            field: list[set[Position]] = [],
-    ) -> str:
+    # ps commands to move into the coordinates of this grid
+    @property
+    def ps_grid_transform(self) -> list[str]:
         output: list[str] = []
         grid_position = self.grid_position
         grid_offset = grid_position.location
         translation = ' '.join([str(f) for f in grid_offset])
-        output.append('gsave')
         if grid_position.rotation:
             output.append(f"{grid_position.rotation} rotate")
         output.append(f"{translation} translate")
         if grid_position.scale and grid_position.scale != 1.0:
             output.append(f"{grid_position.scale} softscale")
+        return output
+
+    # positions of this grid to draw, in drawing order, limited to only if given
+    def ps_positions(self, only: Optional[Set[Position]] = None) -> list[Position]:
+        if only is None:
+            return sorted(self._own_cells)
+        # only may be a few cells of a huge grid, as for a tile
+        own_cells = self._own_cells
+        return sorted(k for k in only if k.gridname == self._gridname and k in own_cells)
+
+    def ps_instructions(self,
+            path: list[Position] = [],
+            field: list[set[Position]] = [],
+            only: Optional[Set[Position]] = None,
+            layer: Optional[str] = None,
+            field_for_position: Optional[dict[Position, int]] = None,
+    ) -> str:
+        if layer not in (None, 'fill', 'walls', 'path'):
+            raise ValueError(f"unknown layer {layer}")
+        if field_for_position is None:
+            field_for_position = field_by_grid(field).get(self._gridname, {})
+        if self.drawlist:
+            return self.ps_drawlist(path=path, field=field, only=only, layer=layer,
+                field_for_position=field_for_position)
+        output: list[str] = []
+        output.append('gsave')
+        output += self.ps_grid_transform
 
         output.append("<<")
         # size
@@ -431,13 +879,6 @@ class BaseGrid():
                 output.append(f"/{size_key} {size_value}")
             else:
                 raise ValueError(f"strange type in size_dict: {size_key} ({type(size_value)}")
-        # make field lookup
-        field_for_position: dict[Position, int] = {}
-        if field:
-            for i, frontier in enumerate(field):
-                for position in frontier:
-                    if position.gridname == self._gridname:
-                        field_for_position[position] = i
         if self.hyper:
             output.append("/hyperstep " + ps_list([
                 ps_list(step) for step in self.hypersteps
@@ -446,43 +887,339 @@ class BaseGrid():
             output.append("/weave true")
         if self.pathcolor:
             output.append("/pathcolor " + ps_list(self.pathcolor))
-        if self.bg:
+        if self.bg and layer in (None, 'fill'):
             output.append("/bg true")
+        if layer:
+            output.append(f"/layer /{layer}")
         if self.linewidth:
             output.append(f"/linewidth {self.linewidth}")
         if self.inset:
             output.append(f"/inset {self.inset}")
+        if self.shape_cache:
+            output.append("/shapecache true")
         # cells
-        output.append("/cells [")
-        # draw link cells first
-        for k in sorted(self._grid.keys()):
-            if k.gridname != self._gridname:
-                continue
-            v = self._grid[k]
-            walls = self.walls_for_cell(v)
-            walls_text = ps_list([str(w).lower() for w in walls])
-            field_text = str(field_for_position.get(k, 0))
-            links_text = ps_list(sorted(v.links))
-            output.append(ps_list([ k.ps_rep, walls_text, field_text ]) + f" % {links_text}")
-        output.append("]")
+        if self.cell_encoding:
+            output += self.ps_cell_table(field_for_position, only)
+        else:
+            output.append("/cells [")
+            # draw link cells first
+            for k in self.ps_positions(only):
+                v = self._grid[k]
+                walls = self.walls_for_cell(v)
+                walls_text = ps_list([str(w).lower() for w in walls])
+                field_text = str(field_for_position.get(k, 0))
+                cell_text = ps_list([ k.ps_rep, walls_text, field_text ])
+                if self.cell_comments:
+                    cell_text += f" % {ps_list(sorted(v.links))}"
+                output.append(cell_text)
+            output.append("]")
         if path:
             output.append("/path ")
             output.append(ps_list([
                 position.ps_rep for position in path
             ]))
         if field:
-            output.append("/field ")
-            output.append(ps_list([
-                ps_list([
-                    position.ps_rep for position in frontier
-                ]) for frontier in field
-            ]))
+            # draw_maze.ps only needs the number of frontiers
+            output.append(f"/field {len(field)} array")
         output.append(f">> draw{self.maze_type}")
         output.append('grestore')
         return "\n".join(output)
 
-    def walls_for_cell(self, cell: Cell) -> list[bool]:
-        return [npos.flattened not in cell.flat_links for npos in self.pos_adjacents(cell.position)]
+    # the cells as packed records for decodecells in draw_maze.ps: a link
+    # flag byte, then the coordinates, wall count, wall bits and field index
+    # as big-endian unsigned integers, with byte widths given in /cellformat
+    def ps_cell_table(self,
+            field_for_position: dict[Position, int],
+            only: Optional[Set[Position]] = None,
+    ) -> list[str]:
+        from base64 import a85encode
+        positions = self.ps_positions(only)
+        walls_for_position = {k: self.walls_for_cell(self._grid[k]) for k in positions}
+        coordinates = [c for k in positions for c in k.coordinates] or [0]
+        offset = max(0, -min(coordinates))
+
+        def byte_width(largest: int) -> int:
+            return max(1, (largest.bit_length() + 7) // 8)
+
+        dimensions = len(positions[0].coordinates) if positions else 0
+        coordinate_bytes = byte_width(max(coordinates) + offset)
+        count_bytes = byte_width(max((len(w) for w in walls_for_position.values()), default=0))
+        field_bytes = byte_width(max(field_for_position.values(), default=0))
+
+        # ps strings are limited to 64k, so split at record boundaries
+        chunks: list[bytes] = []
+        chunk = bytearray()
+        for k in positions:
+            walls = walls_for_position[k]
+            record = bytearray([k.position_type == 'link'])
+            for c in k.coordinates:
+                record += (c + offset).to_bytes(coordinate_bytes, 'big')
+            record += len(walls).to_bytes(count_bytes, 'big')
+            wall_bytes = (len(walls) + 7) // 8
+            wall_bits = sum(1 << (wall_bytes * 8 - 1 - i) for i, w in enumerate(walls) if w)
+            record += wall_bits.to_bytes(wall_bytes, 'big')
+            record += field_for_position.get(k, 0).to_bytes(field_bytes, 'big')
+            if len(chunk) + len(record) > 65535:
+                chunks.append(bytes(chunk))
+                chunk = bytearray()
+            chunk += record
+        chunks.append(bytes(chunk))
+
+        output = ["/cellformat " + ps_list([dimensions, coordinate_bytes, offset, count_bytes, field_bytes])]
+        output.append("/cellcode [")
+        for data in chunks:
+            if self.cell_encoding == 'ascii85':
+                output.append(a85encode(data, adobe=True, wrapcol=76).decode('ascii'))
+            else:
+                text = data.hex()
+                output.append("<" + "\n".join(text[i:i + 76] for i in range(0, len(text), 76)) + ">")
+        output.append("]")
+        return output
+
+    def walls_for_cell(self, cell: GridCell) -> list[bool]:
+        flat_links = cell.flat_links
+        return [npos.flattened not in flat_links for npos in self.pos_adjacents(cell.position)]
+
+    ### Resolved geometry, for drawing without the draw_maze.ps engine
+    # flat_* methods work in the coordinates of the first hyper plane
+
+    @property
+    def has_flat_geometry(self) -> bool:
+        'whether the flat_* methods can draw this grid, for drawlist'
+        return type(self).flat_outline is not BaseGrid.flat_outline
+
+    def flat_center(self, position: Position) -> Point:
+        raise NotImplementedError("flat_center")
+
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        raise NotImplementedError("flat_outline")
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        raise NotImplementedError("flat_walls")
+
+    def flat_marks(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        # small filled shapes drawn in the wall color
+        return []
+
+    @property
+    def weave_inset(self) -> float:
+        # draw_maze.ps only insets cells when weaving
+        if not self.weave:
+            return 0.0
+        return self.inset or 0.1
+
+    def path_points(self, path: list[Position]) -> list[Point]:
+        return [self.cell_center(p) for p in path]
+
+    def path_lines(self, path: list[Position], only: Optional[Set[Position]] = None) -> list[list[Point]]:
+        '''
+        the runs of path through this grid, touching only if given; where a
+        multigrid's path crosses into another subgrid, the run goes on to
+        the middle of the edge between them
+        '''
+        lines: list[list[Point]] = []
+        run: list[Position] = []
+        start: list[Point] = []
+
+        def finish(end: list[Point]) -> None:
+            nonlocal run, start
+            points = start + self.path_points(run) + end
+            if len(points) > 1:
+                lines.append(points)
+            run, start = [], []
+
+        for previous, current in zip(path, path[1:]):
+            own_previous = previous.gridname == self._gridname
+            own_current = current.gridname == self._gridname
+            if own_previous and own_current and (only is None or previous in only or current in only):
+                run = run or [previous]
+                run.append(current)
+            elif own_previous and not own_current and (only is None or previous in only):
+                run = run or [previous]
+                finish(self.edge_point(previous, current))
+            else:
+                if run:
+                    finish([])
+                if own_current and not own_previous and (only is None or current in only):
+                    start = self.edge_point(current, previous)
+                    run = [current]
+        finish([])
+        return lines
+
+    def edge_point(self, position: Position, neighbor: Position) -> list[Point]:
+        'the middle of the wall between position and a neighbor in another subgrid, if they meet'
+        adjacents = self.pos_adjacents(position)
+        base_sides = len(adjacents) - 2 * len(self.hyper)
+        sides = [i for i, adjacent in enumerate(adjacents[:base_sides])
+            if adjacent == neighbor and adjacent.gridname == neighbor.gridname]
+        if not sides:
+            return []
+        wall = self.flat_walls(position, [i == sides[0] for i in range(base_sides)])[0]
+        # halfway along the wall, which may be an arc
+        remaining = sum(dist(a, b) for a, b in zip(wall, wall[1:])) / 2
+        x, y = wall[0]
+        for a, b in zip(wall, wall[1:]):
+            length = dist(a, b)
+            if length and length >= remaining:
+                x, y = (a[0] + (b[0] - a[0]) * remaining / length, a[1] + (b[1] - a[1]) * remaining / length)
+                break
+            remaining -= length
+        dx, dy = self.hyper_offset(position)
+        return [(x + dx, y + dy)]
+
+    def hyper_offset(self, position: Position) -> Point:
+        x, y = 0.0, 0.0
+        hyper_n = len(self.hyper)
+        if hyper_n:
+            hyper_coordinates = position.coordinates[-hyper_n:]
+            for step, z in zip(self.hypersteps, hyper_coordinates):
+                x += step[0] * z
+                y += step[1] * z
+        return (x, y)
+
+    def cell_center(self, position: Position) -> Point:
+        dx, dy = self.hyper_offset(position)
+        x, y = self.flat_center(position)
+        return (x + dx, y + dy)
+
+    def cell_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        dx, dy = self.hyper_offset(position)
+        base_walls = walls[:len(walls) - 2 * len(self.hyper)]
+        return [(x + dx, y + dy) for x, y in self.flat_outline(position, base_walls)]
+
+    def cell_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        from math import atan2, degrees
+        dx, dy = self.hyper_offset(position)
+        hyper_n = len(self.hyper)
+        base_walls = walls[:len(walls) - 2 * hyper_n]
+        lines = [
+            [(x + dx, y + dy) for x, y in line]
+            for line in self.flat_walls(position, base_walls)
+        ]
+        # chevrons for open doors to other hyper planes, as in hyperwalls
+        center = self.cell_center(position)
+        for i, wall in enumerate(walls[len(base_walls):]):
+            if wall:
+                continue
+            step = self.hypersteps[i // 2]
+            angle = degrees(atan2(step[1], step[0]))
+            if i % 2 == 0:
+                angle += 180
+            chevron = [(0.375 - 1 / 9, 1 / 9), (0.375, 0.0), (0.375 - 1 / 9, -1 / 9)]
+            lines.append([
+                (center[0] + x, center[1] + y)
+                for x, y in (rotate_point(p, angle) for p in chevron)
+            ])
+        return lines
+
+    def cell_color(self, position: Position, field_index: int, field_length: int) -> tuple[float, ...]:
+        color: tuple[float, ...]
+        if field_length:
+            fieldstep = 1 / (field_length - 1) if field_length > 1 else 0.0
+            color = sinebow(field_index * fieldstep * 360)
+        elif self.pathcolor:
+            color = tuple(self.pathcolor)
+        else:
+            color = (1.0, 1.0, 1.0)
+        if position.position_type == "link":
+            color = tuple(c / 1.5 for c in color)
+        return color
+
+    @property
+    def background_outline(self) -> list[Point]:
+        return []
+
+    def ps_drawlist(self,
+            path: list[Position] = [],
+            field: list[set[Position]] = [],
+            only: Optional[Set[Position]] = None,
+            layer: Optional[str] = None,
+            field_for_position: Optional[dict[Position, int]] = None,
+    ) -> str:
+        'ps that only fills and strokes precomputed paths'
+        def show(name: str) -> bool:
+            return layer is None or layer == name
+
+        def ps_polyline(points: Sequence[Point]) -> str:
+            coordinates = [f"{ps_number(x)} {ps_number(y)}" for x, y in points]
+            commands = [coordinates[0] + " moveto"]
+            for previous, current in zip(coordinates, coordinates[1:]):
+                if current != previous:
+                    commands.append(current + " lineto")
+            return ' '.join(commands)
+
+        linewidth = self.linewidth or 0.1
+        output: list[str] = ['gsave']
+        output += self.ps_grid_transform
+        output.append(f"1 setlinecap 1 setlinejoin {ps_number(linewidth)} setlinewidth")
+        if self.bg and self.background_outline and show('fill'):
+            output.append("0 setgray " + ps_polyline(self.background_outline) + " closepath fill")
+
+        if field_for_position is None:
+            field_for_position = field_by_grid(field).get(self._gridname, {})
+        wall_lines: list[list[Point]] = []
+        marks: list[list[Point]] = []
+        last_color: tuple[float, ...] = ()
+        for k in self.ps_positions(only) if show('fill') or show('walls') else []:
+            walls = self.walls_for_cell(self._grid[k])
+            if show('fill'):
+                color = self.cell_color(k, field_for_position.get(k, 0), len(field))
+                if color != last_color:
+                    output.append(' '.join(ps_number(c) for c in color) + " setrgbcolor")
+                    last_color = color
+                output.append(ps_polyline(self.cell_outline(k, walls)) + " closepath fill")
+            if show('walls'):
+                wall_lines += self.cell_walls(k, walls)
+                offset = self.hyper_offset(k)
+                marks += [
+                    [(x + offset[0], y + offset[1]) for x, y in mark]
+                    for mark in self.flat_marks(k, walls[:len(walls) - 2 * len(self.hyper)])
+                ]
+
+        output.append("0 setgray")
+        for line in merge_segments(wall_lines):
+            output.append(ps_polyline(line) + " stroke")
+        for mark in marks:
+            output.append(ps_polyline(mark) + " closepath fill")
+
+        if path and show('path'):
+            output.append("1 setgray" if field else "1 0 0 setrgbcolor")
+            for line in self.path_lines(path, only):
+                output.append(ps_polyline(line) + " stroke")
+            for end in (path[0], path[-1]):
+                if end.gridname == self._gridname and (only is None or end in only):
+                    end_point = self.path_points([end])[0]
+                    output.append(ps_polyline(dot_outline(end_point, linewidth * 1.5)) + " closepath fill")
+        output.append('grestore')
+        return "\n".join(output)
+
+    # subgrids of a multigrid are moved, scaled and turned onto the page
+    def page_point(self, point: Point) -> Point:
+        'where grid_position puts a point of this grid'
+        grid_position = self.grid_position
+        return rotate_point((
+            grid_position.location[0] + grid_position.scale * point[0],
+            grid_position.location[1] + grid_position.scale * point[1],
+        ), grid_position.rotation)
+
+    def cell_centers(self) -> dict[Position, Point]:
+        return {k: self.page_point(self.cell_center(k)) for k in self._own_cells}
+
+    # bounding box of each cell on the page, as (left, bottom, right, top)
+    def cell_bounds(self) -> dict[Position, tuple[float, float, float, float]]:
+        bounds: dict[Position, tuple[float, float, float, float]] = {}
+        for k in self.ps_positions():
+            try:
+                points = self.cell_outline(k, self.walls_for_cell(self._grid[k]))
+            except NotImplementedError:
+                # no outline for this grid, cells are never much wider than 1
+                x, y = self.cell_center(k)
+                points = [(x - 1.5, y - 1.5), (x + 1.5, y + 1.5)]
+            page_points = [self.page_point(point) for point in points]
+            xs = [x for x, _ in page_points]
+            ys = [y for _, y in page_points]
+            bounds[k] = (min(xs), min(ys), max(xs), max(ys))
+        return bounds
 
     def structured_data(self,
         path: list[Position] = [],
@@ -490,12 +1227,17 @@ class BaseGrid():
         **kwargs: str
     ) -> dict[str, Any]:
         output_data: dict[str, Any] = {}
-        # size
-        output_data.update(self.size_dict)
+        # size, which complex mazes don't have
+        try:
+            output_data.update(self.size_dict)
+        except NotImplementedError:
+            pass
         if self.weave:
             output_data['weave'] = True
         output_cells: list[dict[str, Position | list[Position]]] = []
-        for k, v in self._grid.items():
+        # a multigrid at the top has no cells of its own, only its subgrids'
+        cells = self._grid if self._gridname is None else self._own_cells
+        for k, v in cells.items():
             cell_info: dict[str, Position| list[Position]] = {
                 "position": k.json_rep,
                 "links": [p.json_rep for p in sorted(v.links)]
@@ -677,8 +1419,7 @@ def kruskal(maze: BaseGrid) -> None:
                 continue
             weaveable_points -= neighborset
             link_pos = LinkPosition.from_position(weave_pos)
-            link_cell = Cell(link_pos)
-            maze._grid[link_pos] = link_cell
+            maze._add_cell(link_pos)
             top_mod = random.randrange(2)
 
             top_group = next_group
@@ -888,18 +1629,66 @@ def png_print(maze: BaseGrid,
 ) -> None:
     import subprocess
     import os
+    from .ghostscript import active_pool
     filename = '.temp.ps'
     maze_name = str(kwargs.get('maze_name', 'temp'))
-    with open(filename, 'w') as f:
-        f.write(maze.ps_prologue)
-        f.write("/%s {" % (maze_name, ))
-        f.write(maze.ps_instructions(path=path, field=field))
-        f.write("\n } def\n")
-        f.write("%%EndProlog\n")
-    pstopng = toppath() + '/bin/pstopng'
-    command = [pstopng] + maze.png_alignment + [str(maze.pixels), filename, maze_name]
-    subprocess.run(command, check=True)
-    os.unlink(filename)
+    pool = active_pool()
+    if maze.layer_cache:
+        from .layers import layered_png
+        layered_png(maze, maze_name + '.png', maze.layer_cache, path=path, field=field)
+    elif pool:
+        from .batch import png_page
+        size, page = png_page(maze, maze.ps_instructions(path=path, field=field))
+        with open(maze_name + '.png', 'wb') as f:
+            f.write(pool.render(size, page))
+    else:
+        with open(filename, 'w') as f:
+            f.write(maze.ps_prologue)
+            f.write("/%s {" % (maze_name, ))
+            f.write(maze.ps_instructions(path=path, field=field))
+            f.write("\n } def\n")
+            f.write("%%EndProlog\n")
+        if maze.bands:
+            from .ghostscript import banded_png
+            alignment = [float(a) for a in maze.png_alignment]
+            banded_png(filename, maze_name, alignment, maze.pixels, maze_name + '.png',
+                maze.bands, jobs=maze.jobs, gs_options=maze.gs_options)
+        else:
+            pstopng = toppath() + '/bin/pstopng'
+            gs_options = ['-G' + option for option in maze.gs_options]
+            command = [pstopng] + maze.png_alignment + [str(maze.pixels), filename] + gs_options + [maze_name]
+            subprocess.run(command, check=True)
+        os.unlink(filename)
+    write_scaled_pngs(maze, maze_name)
+
+def write_scaled_pngs(maze: BaseGrid, maze_name: str) -> None:
+    'the smaller name_pixels.png copies of name.png for scaled_pixels'
+    if maze.scaled_pixels:
+        from .downscale import downscale_png
+        left, bottom, right, top = [float(a) for a in maze.png_alignment]
+        targets = [(f"{maze_name}_{p:g}.png", p) for p in maze.scaled_pixels]
+        downscale_png(maze_name + '.png', maze.pixels, targets, (right - left, top - bottom))
+
+@BaseGrid.printer
+def tiles_print(maze: BaseGrid,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        **kwargs: str
+) -> None:
+    from .tiles import write_tile_pyramid
+    maze_name = str(kwargs.get('maze_name', 'temp'))
+    write_tile_pyramid(maze, maze_name, path=path, field=field)
+
+@BaseGrid.printer
+def book_print(maze: BaseGrid,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        **kwargs: str
+) -> None:
+    from .book import write_book
+    maze_name = str(kwargs.get('maze_name', 'temp'))
+    write_book([(maze, {'path': path, 'field': field})], maze_name,
+        nup=int(kwargs.get('nup', 1)), gs_options=maze.gs_options)
 
 @BaseGrid.printer
 def ps_print(maze: BaseGrid,
@@ -913,10 +1702,20 @@ def ps_print(maze: BaseGrid,
     print(maze.ps_instructions(path=path, field=field))
     print("showpage")
 
+@BaseGrid.printer
+def maze_print(maze: BaseGrid,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        **kwargs: str
+) -> None:
+    maze_name = str(kwargs.get('maze_name', 'temp'))
+    maze.save(maze_name + '.maze')
+
 @BaseGrid.printer
 def json_print(maze: BaseGrid,
         path: list[Position] = [],
         field: list[set[Position]] = [],
         **kwargs: str
 ) -> None:
-    print(json.dumps(maze.structured_data(path, field, **kwargs)))
+    from .jsonstream import print_json
+    print_json(maze, path=path, field=field)
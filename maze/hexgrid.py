@@ -1,14 +1,18 @@
 # grids that use hexagonal geometry
 
-from .positions import Position, IntPosition, Direction, add_direction
+from .positions import Position, IntPosition, Direction, add_direction, Coordinates
 from typing import Optional, Any, Sequence
+from collections.abc import Iterator
 
-from .grid import BaseGrid, SingleSizeGrid, Edge
+from .grid import BaseGrid, SingleSizeGrid, Edge, Point, rotate_point
+from math import sqrt
 
 hex_directions: tuple[Direction, ...] = ( 
     (1, 1), (0, 1), (-1, 0), (-1, -1), (0, -1), (1, 0)
 )
 
+S3H = sqrt(3) / 2
+
 class HexBaseGrid(SingleSizeGrid):
     neighbor_directions: tuple[tuple[Direction, ...], ...] = ()
 
@@ -24,14 +28,40 @@ class HexBaseGrid(SingleSizeGrid):
             raise ValueError(f"why no neighbors of {start}?")
         return self.adjust_adjacents(start, neighbors)
 
+    def hex_center(self, position: Position) -> Point:
+        # h2c in draw_maze.ps
+        ese, n = position.coordinates[:2]
+        return (ese * S3H, n - ese / 2)
+
 class HexGrid(HexBaseGrid):
     def __init__(self, radius: int, **kwargs: Any) -> None:
         super().__init__(radius, **kwargs)
         self.radius = radius
+        self._add_columns()
+
+    def column_coordinates(self) -> Iterator[Coordinates]:
+        for i in range(-self.radius, self.radius + 1):
+            for j in range(-self.radius, self.radius + 1):
+                if abs(i - j) <= self.radius:
+                    yield (i, j)
+
+    def has_column(self, coordinates: Coordinates) -> bool:
+        i, j = coordinates
+        return abs(i) <= self.radius and abs(j) <= self.radius and abs(i - j) <= self.radius
+
+    @property
+    def column_count(self) -> int:
+        return 3 * self.radius * (self.radius + 1) + 1
+
+    def column_at(self, index: int) -> Coordinates:
+        # row i has 2 * radius + 1 - |i| columns, from j = max(-radius, i - radius)
+        radius = self.radius
         for i in range(-radius, radius + 1):
-            for j in range(-radius, radius + 1):
-                if abs(i - j) <= radius:
-                    self._add_column((i, j))
+            count = 2 * radius + 1 - abs(i)
+            if index < count:
+                return (i, max(-radius, i - radius) + index)
+            index -= count
+        raise IndexError(index)
 
     neighbor_directions: tuple[tuple[Direction, ...], ...] = (hex_directions,)
 
@@ -39,8 +69,30 @@ class HexGrid(HexBaseGrid):
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         return {"radius": self.radius}
 
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.radius,), {}
+
     maze_type = "hexmaze"
 
+    def flat_center(self, position: Position) -> Point:
+        return self.hex_center(position)
+
+    def place(self, position: Position, points: list[Point], angle: float = 0.0) -> list[Point]:
+        cx, cy = self.flat_center(position)
+        return [(cx + x, cy + y) for x, y in (rotate_point(p, angle) for p in points)]
+
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        corner = (1 / sqrt(3), 0.0)
+        return [self.place(position, [corner], 60 * i)[0] for i in range(6)]
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        half_side = 1 / (2 * sqrt(3))
+        return [
+            self.place(position, [(0.5, -half_side), (0.5, half_side)], (i + 0.5) * 60)
+            for i, wall in enumerate(walls) if wall
+        ]
+
     @property
     def external_points(self) -> Sequence[tuple[float, ...]]:
         # "physical" radius
@@ -53,13 +105,28 @@ class TriGrid(HexBaseGrid):
     def __init__(self, width: int, **kwargs: Any) -> None:
         super().__init__(width, **kwargs)
         self.width = width
-        max_sum = 3 * (width - 1)
+        self._add_columns()
+
+    def column_coordinates(self) -> Iterator[Coordinates]:
+        max_sum = 3 * (self.width - 1)
         for sum in range( max_sum + 1):
             if sum % 3 != 1:
                 start_i = (sum + 1) // 3
                 for i in range(start_i, sum - start_i + 1):
                     j = sum - i
-                    self._add_column((i, j))
+                    yield (i, j)
+
+    def has_column(self, coordinates: Coordinates) -> bool:
+        i, j = coordinates
+        start_i = (i + j + 1) // 3
+        return 0 <= i + j <= 3 * (self.width - 1) and (i + j) % 3 != 1 and start_i <= i <= i + j - start_i
+
+    @property
+    def column_count(self) -> int:
+        return sum(
+            s - 2 * ((s + 1) // 3) + 1
+            for s in range(3 * (self.width - 1) + 1) if s % 3 != 1
+        )
 
     neighbor_directions: tuple[tuple[Direction, ...], ...] = (
             ((1, 1), (-1, 0), (0, -1),),
@@ -71,8 +138,51 @@ class TriGrid(HexBaseGrid):
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         return {"width": self.width}
 
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.width,), {}
+
     maze_type = "trimaze"
 
+    # drawtrimaze scales so that triangles have a side of 1
+    tri_scale = 1 / sqrt(3)
+
+    def flat_center(self, position: Position) -> Point:
+        x, y = self.hex_center(position)
+        return (self.tri_scale * (x + S3H), self.tri_scale * (y + 0.5))
+
+    def place(self, position: Position, points: list[Point], angle: float = 0.0) -> list[Point]:
+        cx, cy = self.flat_center(position)
+        scale = self.tri_scale
+        return [(cx + x * scale, cy + y * scale) for x, y in (rotate_point(p, angle) for p in points)]
+
+    def tri_angle(self, position: Position) -> float:
+        # triangles point one of two ways
+        return 90.0 if sum(position.coordinates[:2]) % 3 == 2 else 30.0
+
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        inset_mul = 1 - 2 * self.weave_inset
+        points: list[Point] = []
+        for i, wall in enumerate(walls):
+            side = [(0.5 * inset_mul, -S3H * inset_mul)]
+            if not wall:
+                side += [(0.5, -S3H * inset_mul), (0.5, S3H * inset_mul)]
+            side.append((0.5 * inset_mul, S3H * inset_mul))
+            points += self.place(position, side, self.tri_angle(position) + 120 * i)
+        return points
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        inset_mul = 1 - 2 * self.weave_inset
+        lines: list[list[Point]] = []
+        for i, wall in enumerate(walls):
+            angle = self.tri_angle(position) + 120 * i
+            if wall:
+                lines.append(self.place(position, [(0.5 * inset_mul, -S3H * inset_mul), (0.5 * inset_mul, S3H * inset_mul)], angle))
+            else:
+                lines.append(self.place(position, [(0.5 * inset_mul, -S3H * inset_mul), (0.5, -S3H * inset_mul)], angle))
+                lines.append(self.place(position, [(0.5, S3H * inset_mul), (0.5 * inset_mul, S3H * inset_mul)], angle))
+        return lines
+
     @property
     def external_points(self) -> Sequence[tuple[float, ...]]:
         from math import sqrt
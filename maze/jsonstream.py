@@ -0,0 +1,136 @@
+# json output written a cell at a time, so large mazes never have the whole
+# document in memory, in the nested schema of structured_data or a columnar one
+
+from collections.abc import Iterable
+import gzip
+import json
+import sys
+from typing import Any, IO, TYPE_CHECKING
+
+from .positions import Position
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+FORMATS = ('nested', 'columnar')
+# array items per write
+CHUNK_SIZE = 4096
+
+def write_array(stream: IO[str], values: Iterable[Any]) -> None:
+    stream.write("[")
+    chunk: list[str] = []
+    first = True
+    for value in values:
+        chunk.append(json.dumps(value))
+        if len(chunk) == CHUNK_SIZE:
+            stream.write(("" if first else ", ") + ", ".join(chunk))
+            chunk = []
+            first = False
+    if chunk:
+        stream.write(("" if first else ", ") + ", ".join(chunk))
+    stream.write("]")
+
+def write_fields(stream: IO[str], fields: Iterable[tuple[str, Any]]) -> None:
+    'write an object, with generator values written as arrays as they go'
+    stream.write("{")
+    for i, (key, value) in enumerate(fields):
+        stream.write((", " if i else "") + json.dumps(key) + ": ")
+        if isinstance(value, Iterable) and not isinstance(value, (str, list, dict)):
+            write_array(stream, value)
+        else:
+            stream.write(json.dumps(value))
+    stream.write("}\n")
+
+def size_fields(maze: 'BaseGrid') -> Iterable[tuple[str, Any]]:
+    try:
+        yield from maze.size_dict.items()
+    except NotImplementedError:
+        # complex mazes have no single size
+        pass
+
+def nested_fields(
+        maze: 'BaseGrid',
+        path: list[Position],
+        field: list[set[Position]],
+) -> Iterable[tuple[str, Any]]:
+    'the same document as structured_data'
+    yield from size_fields(maze)
+    if maze.weave:
+        yield 'weave', True
+    yield 'cells', (
+        {"position": k.json_rep, "links": [p.json_rep for p in sorted(v.links)]}
+        for k, v in maze._grid.items()
+    )
+    if path:
+        yield 'path', (p.json_rep for p in path)
+    if field:
+        yield 'field', ([p.json_rep for p in frontier] for frontier in field)
+    yield 'self', maze.maze_type
+
+def columnar_fields(
+        maze: 'BaseGrid',
+        path: list[Position],
+        field: list[set[Position]],
+) -> Iterable[tuple[str, Any]]:
+    '''
+    one array per column, with cells referred to by their index: links as
+    the indices of each cell's neighbors, starting at link_start[i] in
+    link_cells, and the field as each cell's distance, or -1 if not reached
+    '''
+    index = {position: i for i, position in enumerate(maze._grid)}
+    yield from size_fields(maze)
+    if maze.weave:
+        yield 'weave', True
+    yield 'format', 'columnar'
+    yield 'cell_count', len(index)
+    dimensions = max(len(p.coordinates) for p in index)
+    for d in range(dimensions):
+        yield f'coordinate_{d}', (p.coordinates[d] for p in index)
+    if any(p.position_type == 'link' for p in index):
+        yield 'link', (int(p.position_type == 'link') for p in index)
+    gridnames = sorted({p.gridname for p in index if p.gridname is not None})
+    if gridnames:
+        grid_index = {name: i for i, name in enumerate(gridnames)}
+        yield 'gridnames', gridnames
+        yield 'grid', (grid_index[p.gridname] if p.gridname is not None else -1 for p in index)
+
+    def link_start() -> Iterable[int]:
+        start = 0
+        for cell in maze._grid.values():
+            yield start
+            start += len(cell.links)
+        yield start
+    yield 'link_start', link_start()
+    yield 'link_cells', (
+        index[link] for cell in maze._grid.values() for link in sorted(cell.links)
+    )
+    if path:
+        yield 'path', (index[p] for p in path)
+    if field:
+        distance = {p: d for d, frontier in enumerate(field) for p in frontier}
+        yield 'distance', (distance.get(p, -1) for p in index)
+    yield 'self', maze.maze_type
+
+def write_json(
+        maze: 'BaseGrid',
+        stream: IO[str],
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        json_format: str = 'nested',
+) -> None:
+    if json_format == 'columnar':
+        write_fields(stream, columnar_fields(maze, path, field))
+    else:
+        write_fields(stream, nested_fields(maze, path, field))
+
+def print_json(
+        maze: 'BaseGrid',
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+) -> None:
+    'write to stdout, gzipped if the maze asks for it'
+    if maze.json_gzip:
+        with gzip.open(sys.stdout.buffer, 'wt') as stream:
+            write_json(maze, stream, path, field, maze.json_format)
+    else:
+        write_json(maze, sys.stdout, path, field, maze.json_format)
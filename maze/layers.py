@@ -0,0 +1,110 @@
+# render png output as separate fill, wall and path layers, cached on disk
+# so a maze drawn again with a different path or field only redraws that layer
+
+from collections.abc import Iterable
+import hashlib
+import os
+import tempfile
+from typing import Any, TYPE_CHECKING
+
+from .positions import Position
+from .ghostscript import render_band
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+# bottom to top
+LAYERS = ('fill', 'walls', 'path')
+
+def digest(parts: Iterable[Any]) -> str:
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(repr(part).encode())
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+def structure_key(maze: 'BaseGrid') -> str:
+    'hash of the link structure and everything else that changes the walls'
+    settings = (
+        type(maze).__name__, maze.pixels, maze.png_alignment, maze.linewidth,
+        maze.inset, maze.hyper, maze.drawlist, maze.grid_position,
+    )
+    cells = (
+        (k.ps_rep, sorted(link.ps_rep for link in maze._grid[k].links))
+        for k in sorted(maze._grid)
+    )
+    return digest([settings, *cells])
+
+def layer_keys(
+        maze: 'BaseGrid',
+        path: list[Position],
+        field: list[set[Position]],
+) -> dict[str, str]:
+    structure = structure_key(maze)
+    field_key = digest(sorted(p.ps_rep for p in frontier) for frontier in field)
+    path_key = digest(p.ps_rep for p in path)
+    return {
+        'fill': digest(['fill', structure, field_key, maze.pathcolor, maze.bg]),
+        'walls': digest(['walls', structure]),
+        # the path is white over a field and red otherwise
+        'path': digest(['path', structure, path_key, bool(field)]),
+    }
+
+def render_layer(
+        maze: 'BaseGrid',
+        layer: str,
+        path: list[Position],
+        field: list[set[Position]],
+) -> bytes:
+    'png with transparency of one layer, laid out as pstopng would'
+    left, bottom, right, top = alignment = [float(a) for a in maze.png_alignment]
+    pixels = maze.pixels
+    size = (int((right - left) * pixels) + 1, int((top - bottom) * pixels) + 1)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'layer.ps')
+        with open(filename, 'w') as f:
+            f.write(maze.ps_prologue)
+            f.write("/layer {")
+            f.write(maze.ps_instructions(path=path, field=field, layer=layer))
+            f.write("\n } def\n")
+            f.write("%%EndProlog\n")
+        return render_band(filename, 'layer', alignment, pixels, size, (0, size[1]),
+            maze.gs_options, device='pngalpha')
+
+def layered_png(
+        maze: 'BaseGrid',
+        output: str,
+        cache: str,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+) -> None:
+    'composite the cached or freshly drawn layers into output'
+    import png
+    import numpy as np
+    if maze.weave:
+        raise ValueError("woven mazes can't be drawn in layers")
+    os.makedirs(cache, exist_ok=True)
+    keys = layer_keys(maze, path, field)
+    image: Any = None
+    for layer in LAYERS:
+        if layer == 'path' and not path:
+            continue
+        # cached as arrays since decoding png in python is slower than gs
+        cached = os.path.join(cache, keys[layer] + '.npz')
+        if os.path.exists(cached):
+            rgba = np.load(cached)['rgba']
+        else:
+            data = render_layer(maze, layer, path, field)
+            width, height, rows, _ = png.Reader(bytes=data).asRGBA8()
+            rgba = np.vstack([np.frombuffer(bytes(row), dtype=np.uint8) for row in rows])
+            rgba = rgba.reshape(height, width, 4)
+            with open(cached + '.tmp', 'wb') as f:
+                np.savez_compressed(f, rgba=rgba)
+            os.replace(cached + '.tmp', cached)
+        if image is None:
+            image = np.full(rgba.shape[:2] + (3,), 255.0)
+        alpha = rgba[:, :, 3:] / 255.0
+        image = image * (1 - alpha) + rgba[:, :, :3] * alpha
+    rows_out = np.rint(image).astype(np.uint8).reshape(image.shape[0], -1)
+    with open(output, 'wb') as f:
+        png.Writer(image.shape[1], image.shape[0], greyscale=False).write(f, rows_out)
@@ -0,0 +1,330 @@
+# binary maze files: a json header describing the grid, then fixed-width
+# arrays of cells and links that can be memory-mapped without parsing
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+import json
+import mmap
+import struct
+import sys
+from types import TracebackType
+from typing import Any, BinaryIO, Optional, TYPE_CHECKING
+
+from .positions import Position, IntPosition, LinkPosition, Coordinates
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+MAGIC = b'MAZEGRID'
+VERSION = 1
+# magic, version, header length
+PREAMBLE = struct.Struct('<8sII')
+ALIGN = 8
+
+# cell kinds, in the order positions sort in
+LINK_KIND = 0
+INT_KIND = 1
+
+# name: typecode, all native byte order as noted in the header
+ARRAYS = {
+    'coordinates': 'i',     # dimensions per cell
+    'kind': 'B',
+    'grid': 'H',            # index into gridnames, for multigrids
+    'order': 'I',           # cell indices in sorted position order
+    'link_start': 'I',      # cell i links to link_cells[link_start[i]:link_start[i + 1]]
+    'link_cells': 'I',
+}
+
+def encode_subgrids(maze: 'BaseGrid') -> Optional[dict[str, Any]]:
+    specs = getattr(maze, 'subgrid_specs', None)
+    if specs is None:
+        return None
+    return {
+        gridname: {
+            'grid_class': spec.grid_class.__name__,
+            'args': list(spec.args),
+            'edges': [None if edge is None else vars(edge) for edge in spec.edges],
+            'location': list(spec.location),
+            'rotation': spec.rotation,
+            'scale': spec.scale,
+            'kwargs': spec.kwargs,
+        }
+        for gridname, spec in specs.items()
+    }
+
+def decode_subgrids(subgrids: dict[str, Any]) -> dict[str, Any]:
+    from .grid import BaseGrid
+    from .multigrid import EdgeSpec, GridSpec
+    return {
+        gridname: GridSpec(
+            BaseGrid.grid_type(spec['grid_class']),
+            tuple(spec['args']),
+            tuple(None if edge is None else EdgeSpec(**edge) for edge in spec['edges']),
+            location=tuple(spec['location']),
+            rotation=spec['rotation'],
+            scale=spec['scale'],
+            kwargs=spec['kwargs'],
+        )
+        for gridname, spec in subgrids.items()
+    }
+
+def grid_header(maze: 'BaseGrid') -> dict[str, Any]:
+    'what it takes to build the grid again, before any cells are linked'
+    init_args, init_kwargs = maze.init_args
+    try:
+        size: Optional[dict[str, Any]] = maze.size_dict
+    except NotImplementedError:
+        size = None
+    return {
+        'grid_type': type(maze).__name__,
+        'args': list(init_args),
+        'kwargs': init_kwargs,
+        'subgrids': encode_subgrids(maze),
+        'size': size,
+        'hyper': maze.hyper,
+        'weave': bool(maze.weave),
+    }
+
+def build_grid(
+        header: dict[str, Any],
+        coordinates: list[Coordinates],
+        kinds: list[int],
+        gridnames: list[Optional[str]],
+        link_start: list[int],
+        link_cells: list[int],
+        **kwargs: Any,
+) -> 'BaseGrid':
+    'build the grid in header and give it these cells and links'
+    from .grid import BaseGrid
+    grid_class = BaseGrid.grid_type(header['grid_type'])
+    kwargs.update(header['kwargs'])
+    if header['hyper']:
+        kwargs['hyper'] = header['hyper']
+    if header['weave']:
+        kwargs['weave'] = True
+    if header['subgrids'] is not None:
+        kwargs['subgrids'] = decode_subgrids(header['subgrids'])
+    maze = grid_class(*header['args'], **kwargs)
+
+    saved = [
+        (kind == LINK_KIND, position, gridname)
+        for kind, position, gridname in zip(kinds, coordinates, gridnames)
+    ]
+    built = [(p.position_type == 'link', p.coordinates, p.gridname) for p in maze._grid]
+    if saved == built:
+        # usually the grid comes out with the same cells, so keep them
+        positions = list(maze._grid)
+    else:
+        positions = [
+            (LinkPosition if link else IntPosition)(position, gridname)
+            for link, position, gridname in saved
+        ]
+        maze._clear()
+        for position in positions:
+            maze._add_cell(position)
+    for i, position in enumerate(positions):
+        if link_start[i] < link_start[i + 1]:
+            # through _cell, so implicit grids keep the linked cells
+            maze._cell(position).links = {
+                positions[j] for j in link_cells[link_start[i]:link_start[i + 1]]}
+    return maze
+
+def save_maze(maze: 'BaseGrid', filename: str) -> None:
+    positions = list(maze._grid)
+    index = {position: i for i, position in enumerate(positions)}
+    dimensions = len(positions[0].coordinates) if positions else 0
+    if any(len(p.coordinates) != dimensions for p in positions):
+        raise ValueError("cells have different numbers of coordinates")
+    gridnames = sorted({p.gridname for p in positions if p.gridname is not None})
+    grid_index = {name: i for i, name in enumerate(gridnames)}
+    if len(gridnames) > 0xffff:
+        raise ValueError("too many subgrids")
+
+    arrays: dict[str, array[Any]] = {name: array(code) for name, code in ARRAYS.items()}
+    for p in positions:
+        arrays['coordinates'].extend(p.coordinates)
+        arrays['kind'].append(LINK_KIND if p.position_type == 'link' else INT_KIND)
+    if gridnames:
+        arrays['grid'].extend(grid_index[p.gridname] for p in positions)    # type: ignore [index]
+
+    def sort_key(i: int) -> tuple[int, int, Coordinates]:
+        p = positions[i]
+        return (
+            grid_index[p.gridname] if p.gridname is not None else 0,
+            LINK_KIND if p.position_type == 'link' else INT_KIND,
+            p.coordinates,
+        )
+    arrays['order'].extend(sorted(range(len(positions)), key=sort_key))
+    start = 0
+    for cell in maze._grid.values():
+        arrays['link_start'].append(start)
+        arrays['link_cells'].extend(sorted(index[link] for link in cell.links))
+        start += len(cell.links)
+    arrays['link_start'].append(start)
+
+    header = grid_header(maze)
+    header.update({
+        'cell_count': len(positions),
+        'dimensions': dimensions,
+        'gridnames': gridnames,
+        'byteorder': sys.byteorder,
+        'arrays': {},
+    })
+    # offsets depend on the header length, which depends on the offsets
+    sizes = {name: len(values) * values.itemsize for name, values in arrays.items()}
+    header_length = 0
+    while True:
+        offset = align(PREAMBLE.size + header_length)
+        for name, values in arrays.items():
+            header['arrays'][name] = [offset, values.typecode, len(values)]
+            offset = align(offset + sizes[name])
+        header_bytes = json.dumps(header).encode()
+        if len(header_bytes) <= header_length:
+            break
+        header_length = len(header_bytes) + 32
+    header_bytes = header_bytes.ljust(header_length)
+
+    with open(filename, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, header_length))
+        f.write(header_bytes)
+        for name, values in arrays.items():
+            pad(f, header['arrays'][name][0])
+            values.tofile(f)
+
+def align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+def pad(f: BinaryIO, offset: int) -> None:
+    f.write(b'\0' * (offset - f.tell()))
+
+class MazeView:
+    '''
+    read-only view of a saved maze, memory-mapped so opening it costs
+    the same whatever the size; cells are referred to by their index
+    '''
+    def __init__(self, filename: str) -> None:
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = PREAMBLE.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a maze file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} is version {version}, not {VERSION}")
+        self.header: dict[str, Any] = json.loads(
+            self.map[PREAMBLE.size:PREAMBLE.size + header_length])
+        if self.header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{filename} was written on a {self.header['byteorder']} endian machine")
+        self.dimensions: int = self.header['dimensions']
+        self.gridnames: list[str] = self.header['gridnames']
+        buffer = memoryview(self.map)
+        self.arrays: dict[str, memoryview] = {}
+        for name, (offset, typecode, count) in self.header['arrays'].items():
+            size = count * struct.calcsize(typecode)
+            self.arrays[name] = buffer[offset:offset + size].cast(typecode)
+        buffer.release()
+
+    def close(self) -> None:
+        try:
+            for values in getattr(self, 'arrays', {}).values():
+                values.release()
+            self.map.close()
+        except BufferError:
+            # arrays from to_arrays still use the map, it goes with them
+            pass
+        self.arrays = {}
+        self.file.close()
+
+    def __enter__(self) -> 'MazeView':
+        return self
+
+    def __exit__(self,
+            exc_type: Optional[type[BaseException]],
+            exc: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self.header['cell_count'])
+
+    def coordinates(self, i: int) -> Coordinates:
+        start = i * self.dimensions
+        return tuple(self.arrays['coordinates'][start:start + self.dimensions])
+
+    def gridname(self, i: int) -> Optional[str]:
+        return self.gridnames[self.arrays['grid'][i]] if self.gridnames else None
+
+    def position(self, i: int) -> Position:
+        if self.arrays['kind'][i] == LINK_KIND:
+            return LinkPosition(self.coordinates(i), self.gridname(i))
+        return IntPosition(self.coordinates(i), self.gridname(i))
+
+    def links(self, i: int) -> list[int]:
+        link_start = self.arrays['link_start']
+        return list(self.arrays['link_cells'][link_start[i]:link_start[i + 1]])
+
+    def sort_key(self, i: int) -> tuple[int, int, Coordinates]:
+        return (
+            self.arrays['grid'][i] if self.gridnames else 0,
+            self.arrays['kind'][i],
+            self.coordinates(i),
+        )
+
+    def index(self, position: Position) -> int:
+        'index of the cell at position, found by bisecting the sorted order'
+        if position.gridname is not None and position.gridname not in self.gridnames:
+            raise KeyError(position)
+        key = (
+            self.gridnames.index(position.gridname) if position.gridname is not None else 0,
+            LINK_KIND if position.position_type == 'link' else INT_KIND,
+            position.coordinates,
+        )
+        order = self.arrays['order']
+        found = bisect_left(order, key, key=self.sort_key)
+        if found == len(order) or self.sort_key(order[found]) != key:
+            raise KeyError(position)
+        return int(order[found])
+
+    def __contains__(self, position: Position) -> bool:
+        try:
+            self.index(position)
+        except KeyError:
+            return False
+        return True
+
+    def neighbors(self, position: Position) -> list[Position]:
+        'the positions the cell at position links to'
+        return [self.position(i) for i in self.links(self.index(position))]
+
+    def __iter__(self) -> Iterator[Position]:
+        return (self.position(i) for i in range(len(self)))
+
+    def grid(self, **kwargs: Any) -> 'BaseGrid':
+        'build the grid again and link its cells as they were saved'
+        coordinates = self.arrays['coordinates'].tolist()
+        d = self.dimensions
+        gridnames: list[Optional[str]] = (
+            [self.gridnames[g] for g in self.arrays['grid'].tolist()]
+            if self.gridnames else [None] * len(self))
+        return build_grid(
+            self.header,
+            [tuple(coordinates[i:i + d]) for i in range(0, len(coordinates), d)],
+            self.arrays['kind'].tolist(),
+            gridnames,
+            self.arrays['link_start'].tolist(),
+            self.arrays['link_cells'].tolist(),
+            **kwargs,
+        )
+
+    def to_arrays(self) -> dict[str, Any]:
+        'numpy arrays over the mapped file, without copying'
+        import numpy as np
+        arrays: dict[str, Any] = {'header': self.header}
+        for name, values in self.arrays.items():
+            arrays[name] = np.frombuffer(values, dtype=values.format)
+        arrays['coordinates'] = arrays['coordinates'].reshape(len(self), self.dimensions)
+        return arrays
@@ -0,0 +1,308 @@
+# rectangular mazes too big for memory, kept in a memory-mapped file as two
+# bits per cell and generated and drawn a band of rows at a time
+
+from collections.abc import Callable, Iterator
+from functools import cache
+import mmap
+import random
+import struct
+from types import TracebackType
+from typing import Any, Optional, TYPE_CHECKING
+
+from .positions import IntPosition
+from .textmaze import Row, TextCell
+
+if TYPE_CHECKING:
+    from .rectgrid import RectGrid
+
+MAGIC = b'MAZEBITS'
+VERSION = 1
+# magic, version, height, width, padded out to HEADER_SIZE
+HEADER = struct.Struct('<8sIQQ')
+HEADER_SIZE = 64
+
+# the bits of each cell, four cells to a byte from the low bits up
+EAST = 1
+NORTH = 2
+CELLS_PER_BYTE = 4
+
+# about how many bytes of cells to generate or draw at once
+BAND_BYTES = 1 << 16
+
+MmapFunction = Callable[['MmapGrid'], None]
+
+@cache
+def unpack_table() -> Any:
+    'the four cell values in each byte'
+    import numpy as np
+    shifts = np.arange(0, 8, 2, dtype=np.uint8)
+    return (np.arange(256, dtype=np.uint8)[:, None] >> shifts) & 3
+
+class MmapGrid:
+    '''
+    a RectGrid's passages in a memory-mapped file: each cell has a bit for
+    a passage east and one for a passage north, rows go from the bottom up
+    '''
+    algorithms: dict[str, MmapFunction] = {}
+
+    @classmethod
+    def algo(cls, mf: MmapFunction) -> MmapFunction:
+        cls.algorithms[mf.__name__] = mf
+        return mf
+
+    def __init__(self, filename: str, writable: bool = False) -> None:
+        self.writable = writable
+        self.file = open(filename, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+        magic, version, height, width = HEADER.unpack_from(self.map)
+        self.height: int = height
+        self.width: int = width
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a maze bit file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} is version {version}, not {VERSION}")
+        self.stride: int = -(-width // CELLS_PER_BYTE)
+
+    @classmethod
+    def create(cls, filename: str, height: int, width: int) -> 'MmapGrid':
+        'a new file with every wall up, sparse where the filesystem allows'
+        with open(filename, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, height, width).ljust(HEADER_SIZE, b'\0'))
+            f.truncate(HEADER_SIZE + height * -(-width // CELLS_PER_BYTE))
+        return cls(filename, writable=True)
+
+    def close(self) -> None:
+        if not self.map.closed:
+            if self.writable:
+                self.map.flush()
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'MmapGrid':
+        return self
+
+    def __exit__(self,
+            exc_type: Optional[type[BaseException]],
+            exc: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.height * self.width
+
+    @property
+    def band_rows(self) -> int:
+        return max(1, BAND_BYTES // max(1, self.stride))
+
+    def bands(self) -> Iterator[tuple[int, int]]:
+        'row ranges from the bottom up'
+        for start in range(0, self.height, self.band_rows):
+            yield start, min(start + self.band_rows, self.height)
+
+    def cell(self, i: int, j: int) -> int:
+        byte: int = self.map[HEADER_SIZE + j * self.stride + i // CELLS_PER_BYTE]
+        return (byte >> (2 * (i % CELLS_PER_BYTE))) & 3
+
+    def read_rows(self, start: int, stop: int) -> Any:
+        'a numpy array of the cells in rows start to stop, one value per cell'
+        import numpy as np
+        offset = HEADER_SIZE + start * self.stride
+        packed = np.frombuffer(self.map[offset:offset + (stop - start) * self.stride], dtype=np.uint8)
+        cells = np.take(unpack_table(), packed.reshape(stop - start, self.stride), axis=0)
+        return cells.reshape(stop - start, -1)[:, :self.width]
+
+    def write_rows(self, start: int, cells: Any) -> None:
+        'store an array of cell values as rows from start up'
+        import numpy as np
+        rows = len(cells)
+        padded = np.zeros((rows, self.stride * CELLS_PER_BYTE), dtype=np.uint8)
+        padded[:, :self.width] = cells
+        quads = padded.reshape(rows, self.stride, CELLS_PER_BYTE)
+        self.write_packed(start, quads[..., 0] | quads[..., 1] << 2 | quads[..., 2] << 4 | quads[..., 3] << 6)
+
+    def write_packed(self, start: int, packed: Any) -> None:
+        'store rows that are already packed four cells to a byte'
+        offset = HEADER_SIZE + start * self.stride
+        self.map[offset:offset + len(packed) * self.stride] = packed.tobytes()
+
+    def generate_maze(self, maze_algorithm: str) -> None:
+        self.algorithms[maze_algorithm](self)
+
+    def text_rows(self) -> Iterator[Row]:
+        'rows of TextCells from the top down, for textmaze.text_lines'
+        for start, stop in reversed(list(self.bands())):
+            cells = self.read_rows(start, stop).tolist()
+            for row in reversed(cells):
+                yield [TextCell(True, bool(cell & EAST), bool(cell & NORTH)) for cell in row]
+
+    def image_rows(self, cell_pixels: int) -> Iterator[Any]:
+        'greyscale pixel rows from the top down, with one pixel walls'
+        import numpy as np
+        if cell_pixels < 2:
+            raise ValueError("cells need at least two pixels")
+        width = self.width * cell_pixels + 1
+        for start, stop in reversed(list(self.bands())):
+            cells = self.read_rows(start, stop)[::-1]
+            rows = len(cells)
+            block = np.full((rows, cell_pixels, width), 255, dtype=np.uint8)
+            # each row of cells starts with its north walls
+            block[:, 0, :-1] = np.where(np.repeat(cells & NORTH, cell_pixels, axis=1), 255, 0)
+            block[:, 0, ::cell_pixels] = 0
+            west_open = np.zeros(cells.shape, dtype=bool)
+            west_open[:, 1:] = cells[:, :-1] & EAST
+            block[:, 1:, :-1:cell_pixels] = np.where(west_open, 255, 0)[:, None, :]
+            block[:, :, -1] = 0
+            yield from block.reshape(rows * cell_pixels, width)
+        yield np.zeros(width, dtype=np.uint8)
+
+    def write_png(self, filename: str, cell_pixels: int = 4) -> None:
+        'draw the maze straight from the file, a band of rows at a time'
+        import numpy as np
+        import png
+        size = (self.width * cell_pixels + 1, self.height * cell_pixels + 1)
+        # one bit a pixel leaves zlib an eighth of the bytes to compress
+        rows = (np.packbits(row) for row in self.image_rows(cell_pixels))
+        with open(filename, 'wb') as f:
+            png.Writer(size[0], size[1], greyscale=True, bitdepth=1).write_packed(f, rows)
+
+    @classmethod
+    def from_grid(cls, maze: 'RectGrid', filename: str) -> 'MmapGrid':
+        'a file with the passages of maze, with masked out cells walled in'
+        grid = cls.create(filename, maze.height, maze.width)
+        for j in range(maze.height):
+            for i in range(maze.width):
+                position = IntPosition((i, j))
+                if position not in maze:
+                    continue
+                links = maze[position].links
+                cell = (EAST if IntPosition((i + 1, j)) in links else 0) | (
+                    NORTH if IntPosition((i, j + 1)) in links else 0)
+                if cell:
+                    offset = HEADER_SIZE + j * grid.stride + i // CELLS_PER_BYTE
+                    grid.map[offset] |= cell << (2 * (i % CELLS_PER_BYTE))
+        return grid
+
+    def to_grid(self, **kwargs: Any) -> 'RectGrid':
+        'a RectGrid with the same passages, for mazes small enough to build'
+        from .rectgrid import RectGrid
+        maze = RectGrid(self.height, self.width, **kwargs)
+        maze.set_passages(self.read_rows(0, self.height))
+        return maze
+
+def numpy_random() -> Any:
+    'a numpy generator seeded from random, so random.seed picks the maze'
+    import numpy as np
+    return np.random.default_rng(random.getrandbits(64))
+
+def binary_rows(rng: Any, rows: int, width: int, top: bool = True) -> Any:
+    'cells of a binary tree maze from one random array, the last row the top one if top'
+    import numpy as np
+    cells = rng.integers(EAST, NORTH + 1, (rows, width), dtype=np.uint8)
+    cells[:, -1] = NORTH
+    if top:
+        cells[-1] = EAST
+        cells[-1, -1] = 0
+    return cells
+
+def sidewinder_rows(rng: Any, rows: int, width: int, top: bool = True) -> Any:
+    'cells of a sidewinder maze, the last row the top one if top'
+    import numpy as np
+    count = rows * width
+    # each cell either carries the run east or closes it
+    bits = rng.integers(0, 256, -(-count // 8), dtype=np.uint8)
+    close = np.unpackbits(bits, count=count).view(bool).reshape(rows, width)
+    close[:, -1] = True
+    if top:
+        close[-1] = False
+    cells = (~close).view(np.uint8)
+    cells[:, -1] = 0
+    # every row but the top ends a run, so runs never span rows;
+    # carve north from a random cell of each
+    ends = np.flatnonzero(close)
+    lengths = np.diff(ends, prepend=-1)
+    chosen = ends - (rng.random(len(ends)) * lengths).astype(ends.dtype)
+    cells.reshape(-1)[chosen] |= NORTH
+    return cells
+
+@MmapGrid.algo
+def binary(maze: MmapGrid) -> None:
+    # one random bit a cell picks north or east, so each random byte
+    # packs straight into four cells
+    import numpy as np
+    rng = numpy_random()
+    last_byte, last_cell = divmod(maze.width - 1, CELLS_PER_BYTE)
+    before_last = (1 << 2 * last_cell) - 1
+    for start, stop in maze.bands():
+        bits = rng.integers(0, 256, (stop - start, maze.stride), dtype=np.uint8)
+        packed = bits & 0xaa | ~bits >> 1 & 0x55
+        if stop == maze.height:
+            packed[-1] = 0x55
+        # the last column can only go north, and the padding nowhere
+        packed[:, last_byte] &= before_last
+        packed[:-1 if stop == maze.height else None, last_byte] |= NORTH << 2 * last_cell
+        maze.write_packed(start, packed)
+
+@MmapGrid.algo
+def sidewinder(maze: MmapGrid) -> None:
+    rng = numpy_random()
+    for start, stop in maze.bands():
+        maze.write_rows(start, sidewinder_rows(rng, stop - start, maze.width, stop == maze.height))
+
+@MmapGrid.algo
+def eller(maze: MmapGrid) -> None:
+    '''
+    eller's algorithm a row at a time, keeping only the sets of the row
+    being carved; unlike binary and sidewinder each row is a python loop
+    '''
+    import numpy as np
+    rng = numpy_random()
+    width = maze.width
+    set_for_cell = list(range(width))
+    members: dict[int, list[int]] = {i: [i] for i in range(width)}
+    next_set = width
+    for start, stop in maze.bands():
+        cells = np.zeros((stop - start, width), dtype=np.uint8)
+        for j in range(start, stop):
+            row = [0] * width
+            top = j == maze.height - 1
+            joins = rng.integers(0, 2, width).tolist()
+            for i in range(width - 1):
+                first, second = set_for_cell[i], set_for_cell[i + 1]
+                if first != second and (top or joins[i]):
+                    row[i] |= EAST
+                    if len(members[first]) < len(members[second]):
+                        first, second = second, first
+                    for k in members[second]:
+                        set_for_cell[k] = first
+                    members[first] += members.pop(second)
+            if top:
+                cells[j - start] = row
+                break
+            # carve north at least once from each set
+            set_for_cell = [-1] * width
+            carves = rng.integers(0, 2, width).tolist()
+            for cell_set, columns in members.items():
+                north = [i for i in columns if carves[i]] or [columns[int(rng.integers(len(columns)))]]
+                for i in north:
+                    row[i] |= NORTH
+                    set_for_cell[i] = cell_set
+            members = {}
+            for i in range(width):
+                if set_for_cell[i] < 0:
+                    set_for_cell[i] = next_set
+                    next_set += 1
+                members.setdefault(set_for_cell[i], []).append(i)
+            cells[j - start] = row
+        maze.write_rows(start, cells)
+
+def generate_file(filename: str, height: int, width: int, maze_algorithm: str) -> MmapGrid:
+    'a new maze in filename, open for drawing'
+    if maze_algorithm not in MmapGrid.algorithms:
+        raise ValueError(f"{maze_algorithm} can't generate into a file, only {', '.join(MmapGrid.algorithms)}")
+    maze = MmapGrid.create(filename, height, width)
+    maze.generate_maze(maze_algorithm)
+    return maze
@@ -3,10 +3,11 @@
 from dataclasses import dataclass
 from .positions import Position, IntPosition, Direction, cardinal_directions, add_direction, manhattan, Coordinates
 from typing import Optional, Any, Callable, Sequence, NamedTuple
+from collections.abc import Set
 import random
 from math import atan2, sqrt, degrees, cos, sin, radians
 
-from .grid import BaseGrid, ps_list, GridPosition
+from .grid import BaseGrid, ps_list, GridPosition, field_by_grid
 
 @dataclass
 class EdgeSpec:
@@ -31,13 +32,14 @@ class MultiGrid(BaseGrid):
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
+        self.subgrid_specs = subgrids
         self._subgrids: dict[str, BaseGrid] = {}
         self._edge_map: dict[Position, Position] = {}
         grid_positions: dict[str, GridPosition] = {}
         linewidth = kwargs.get('linewidth', 0.1)
         inset = kwargs.get('inset', 0.1)
         for gridname, grid_spec in subgrids.items():
-            grid_kwargs = grid_spec.kwargs or {}
+            grid_kwargs = dict(grid_spec.kwargs or {})
             grid_kwargs.update(kwargs)
             if grid_spec.scale != 1.0:
                 grid_kwargs['linewidth'] = linewidth / grid_spec.scale
@@ -48,19 +50,21 @@ class MultiGrid(BaseGrid):
                 *grid_spec.args,
                 grid=self._grid,
                 gridname=gridname,
+                cells_for_grid=self._cells_for_grid,
                 edge_map=self._edge_map,
                 **grid_kwargs
             )
-        # now that all grids exist, go through it again to deal with edges
+        # now that all grids exist, go through it again to deal with edges,
+        # which are worked out afresh each time they're asked for
+        edges = {gridname: grid.edges for gridname, grid in self._subgrids.items()}
         for gridname, grid_spec in subgrids.items():
-            source_grid = self._subgrids[gridname]
-            if len(grid_spec.edges) != len(source_grid.edges):
-                raise ValueError(f"edges mismatch between grid and spec for {gridname} ({len(source_grid.edges)} != {len(grid_spec.edges)})")
+            source_edges = edges[gridname]
+            if len(grid_spec.edges) != len(source_edges):
+                raise ValueError(f"edges mismatch between grid and spec for {gridname} ({len(source_edges)} != {len(grid_spec.edges)})")
             for i, edge in enumerate(grid_spec.edges):
                 if edge is not None:
-                    target_grid = self._subgrids[edge.target]
-                    source_edge = source_grid.edges[i].outer
-                    target_edge = target_grid.edges[edge.side].inner
+                    source_edge = source_edges[i].outer
+                    target_edge = edges[edge.target][edge.side].inner
                     if edge.flip:
                         target_edge = tuple(reversed(target_edge))
                     if len(source_edge) != len(target_edge):
@@ -137,6 +141,16 @@ class MultiGrid(BaseGrid):
             if not progress:
                 raise ValueError("unalignable multigrid")
 
+    def generate_parallel(self, maze_algorithm: str, jobs: Optional[int] = None) -> None:
+        'generate each subgrid in its own process, then join them with a spanning tree of doors'
+        from .parallel import generate_subgrids
+        generate_subgrids(self, maze_algorithm, jobs)
+
+    # the subgrids are rebuilt from subgrid_specs
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (), {}
+
     def pos_adjacents(self, start: Position) -> Sequence[Position]:
         gridname = start.gridname
         subgrid = self._subgrids[gridname]      # type: ignore [index]
@@ -150,12 +164,41 @@ class MultiGrid(BaseGrid):
                 points.append(point)
         return points
 
+    @property
+    def ps_entry_points(self) -> set[str]:
+        entry_points: set[str] = set()
+        for subgrid in self._subgrids.values():
+            entry_points |= subgrid.ps_entry_points
+        return entry_points
+
     def ps_instructions(self,
             path: list[Position] = [],
             field: list[set[Position]] = [],
+            only: Optional[Set[Position]] = None,
+            layer: Optional[str] = None,
+            field_for_position: Optional[dict[Position, int]] = None,
     ) -> str:
+        # one pass over the field for all the subgrids
+        fields = field_by_grid(field)
         output: list[str] = []
         for gridname in self._subgrids.keys():
             output.append(f"% grid {gridname}")
-            output.append(self._subgrids[gridname].ps_instructions(path=path, field=field))
+            output.append(self._subgrids[gridname].ps_instructions(path=path, field=field, only=only, layer=layer,
+                field_for_position=fields.get(gridname, {})))
         return "\n".join(output)
+
+    @property
+    def has_flat_geometry(self) -> bool:
+        return all(subgrid.has_flat_geometry for subgrid in self._subgrids.values())
+
+    def cell_centers(self) -> dict[Position, tuple[float, float]]:
+        centers: dict[Position, tuple[float, float]] = {}
+        for subgrid in self._subgrids.values():
+            centers.update(subgrid.cell_centers())
+        return centers
+
+    def cell_bounds(self) -> dict[Position, tuple[float, float, float, float]]:
+        bounds: dict[Position, tuple[float, float, float, float]] = {}
+        for subgrid in self._subgrids.values():
+            bounds.update(subgrid.cell_bounds())
+        return bounds
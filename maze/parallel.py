@@ -0,0 +1,210 @@
+# generate parts of a maze in separate processes, then join the parts
+# with a spanning tree of doors so the whole is still a perfect maze
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+import random
+from typing import Any, Optional, TYPE_CHECKING
+
+from .positions import Position, IntPosition, LinkPosition, Coordinates
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+    from .multigrid import MultiGrid
+    from .rectgrid import RectGrid
+
+# share of the links touching a block's edges to cut when hiding seams
+SEAM_CUT_FRACTION = 0.5
+
+# (grid class name, init args, init kwargs, algorithm, seed)
+Task = tuple[str, tuple[Any, ...], dict[str, Any], str, int]
+# link cells added by the algorithm, then pairs of linked cell indices,
+# counting the grid's own cells first
+Result = tuple[list[tuple[str, Coordinates]], bytes]
+
+def generate_part(task: Task) -> Result:
+    'build a grid on its own, generate its maze and hand back the links'
+    from .grid import BaseGrid
+    grid_type, args, kwargs, algorithm, seed = task
+    maze = BaseGrid.grid_type(grid_type)(*args, **kwargs)
+    count = len(maze)
+    random.seed(seed)
+    maze.generate_maze(algorithm)
+    positions = list(maze._grid)
+    index = {position: i for i, position in enumerate(positions)}
+    links = array('I')
+    for i, cell in enumerate(maze._grid.values()):
+        links.extend(j for link in cell.links for j in (i, index[link]) if i < index[link])
+    added = [(p.position_type, p.coordinates) for p in positions[count:]]
+    return added, links.tobytes()
+
+def merge_part(
+        maze: 'BaseGrid',
+        positions: Sequence[Position],
+        result: Result,
+        gridname: Optional[str] = None,
+        offset: Coordinates = (),
+) -> None:
+    '''
+    link the cells at positions as a part came back, adding its link
+    cells moved by offset
+    '''
+    added, link_bytes = result
+    positions = list(positions)
+    for position_type, coordinates in added:
+        if offset:
+            coordinates = tuple(c + o for c, o in zip(coordinates, offset))
+        position_class = LinkPosition if position_type == 'link' else IntPosition
+        position = position_class(coordinates, gridname)
+        maze._add_cell(position)
+        positions.append(position)
+    links = array('I')
+    links.frombytes(link_bytes)
+    for k in range(0, len(links), 2):
+        first, second = positions[links[k]], positions[links[k + 1]]
+        maze._cell(first).add_link(second)
+        maze._cell(second).add_link(first)
+
+def part_options(maze: 'BaseGrid') -> dict[str, Any]:
+    'the options that change how a maze is generated'
+    options: dict[str, Any] = {'room_size': maze.room_size}
+    if maze.weave:
+        options['weave'] = True
+    if maze.hyper:
+        options['hyper'] = maze.hyper
+    return options
+
+class PartJoiner:
+    'union-find over the parts, connecting parts with one door each'
+    def __init__(self, maze: 'BaseGrid') -> None:
+        self.maze = maze
+        self.parent: dict[Any, Any] = {}
+
+    def find(self, part: Any) -> Any:
+        root = part
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while part != root:
+            self.parent[part], part = root, self.parent.get(part, part)
+        return root
+
+    def join(self, first: Any, second: Any, door: tuple[Position, Position]) -> bool:
+        'connect door if it joins two parts that are still apart'
+        first_root, second_root = self.find(first), self.find(second)
+        if first_root == second_root:
+            return False
+        self.parent[second_root] = first_root
+        self.maze.connect(*door)
+        return True
+
+def generate_subgrids(maze: 'MultiGrid', algorithm: str, jobs: Optional[int] = None) -> None:
+    '''
+    generate each subgrid's maze in its own process, then open one door
+    for each edge of a random spanning tree over the subgrids
+    '''
+    gridnames = list(maze._subgrids)
+    tasks: list[Task] = []
+    for gridname in gridnames:
+        subgrid = maze._subgrids[gridname]
+        args, kwargs = subgrid.init_args
+        kwargs = dict(kwargs, **part_options(subgrid))
+        tasks.append((type(subgrid).__name__, args, kwargs, algorithm, random.getrandbits(64)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(generate_part, tasks))
+    for gridname, result in zip(gridnames, results):
+        merge_part(maze, list(maze._cells_for_grid[gridname]), result, gridname)
+
+    doors: dict[tuple[str, str], list[tuple[Position, Position]]] = {}
+    for gridname in gridnames:
+        for position in maze._cells_for_grid[gridname]:
+            if position.position_type == 'link':
+                continue
+            for neighbor in maze.pos_adjacents(position):
+                if neighbor.gridname is None or neighbor.gridname <= gridname or neighbor not in maze:
+                    continue
+                doors.setdefault((gridname, neighbor.gridname), []).append((position, neighbor))
+    joiner = PartJoiner(maze)
+    pairs = sorted(doors)
+    random.shuffle(pairs)
+    for first, second in pairs:
+        joiner.join(first, second, random.choice(doors[(first, second)]))
+
+def generate_blocks(
+        maze: 'RectGrid',
+        algorithm: str,
+        blocks: int,
+        jobs: Optional[int] = None,
+        random_doors: bool = False,
+) -> None:
+    '''
+    generate blocks by blocks pieces of the maze in separate processes and
+    join them with a random spanning tree of doors across the block edges.
+    with random_doors, some links along the inside of each block's edges
+    are cut first, so the doors fall all along the seams; cuts that turn
+    out to be needed are put back
+    '''
+    if maze.hyper or len(maze) != maze.width * maze.height:
+        raise ValueError("tiled generation needs a whole rectangular grid")
+    if not 1 <= blocks <= min(maze.width, maze.height):
+        raise ValueError(f"blocks must be between 1 and {min(maze.width, maze.height)}")
+    xs = [maze.width * k // blocks for k in range(blocks + 1)]
+    ys = [maze.height * k // blocks for k in range(blocks + 1)]
+    tasks: list[Task] = []
+    boxes: list[tuple[int, int, int, int]] = []
+    for x0, x1 in zip(xs, xs[1:]):
+        for y0, y1 in zip(ys, ys[1:]):
+            if x1 > x0 and y1 > y0:
+                tasks.append(('RectGrid', (y1 - y0, x1 - x0), part_options(maze),
+                    algorithm, random.getrandbits(64)))
+                boxes.append((x0, y0, x1, y1))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for (x0, y0, x1, y1), result in zip(boxes, executor.map(generate_part, tasks)):
+            positions = [IntPosition((x, y)) for x in range(x0, x1) for y in range(y0, y1)]
+            merge_part(maze, positions, result, offset=(x0, y0))
+
+    def block_of(position: Position) -> int:
+        x, y = position.coordinates[:2]
+        return (bisect_right(xs, x) - 1) * blocks + bisect_right(ys, y) - 1
+
+    doors: list[tuple[Position, Position]] = []
+    for x in xs[1:-1]:
+        doors += [(IntPosition((x - 1, y)), IntPosition((x, y))) for y in range(maze.height)]
+    for y in ys[1:-1]:
+        doors += [(IntPosition((x, y - 1)), IntPosition((x, y))) for x in range(maze.width)]
+
+    part_of: dict[Position, int] = {}
+    if random_doors:
+        for x0, y0, x1, y1 in boxes:
+            edge_links = sorted({
+                tuple(sorted((position, link)))
+                for x in range(x0, x1) for y in range(y0, y1)
+                if x in (x0, x1 - 1) or y in (y0, y1 - 1)
+                for position in [IntPosition((x, y))]
+                for link in maze[position].links
+                if link.position_type != 'link' and block_of(link) == block_of(position)
+            })
+            for first, second in random.sample(edge_links, int(len(edge_links) * SEAM_CUT_FRACTION)):
+                maze.disconnect(first, second)
+                doors.append((first, second))
+        # number the pieces the cuts left
+        part = 0
+        for start in maze._grid:
+            if start in part_of:
+                continue
+            part += 1
+            stack = [start]
+            while stack:
+                position = stack.pop()
+                if position not in part_of:
+                    part_of[position] = part
+                    stack.extend(maze[position].links)
+
+    def part_for(position: Position) -> int:
+        return part_of[position] if part_of else block_of(position)
+
+    joiner = PartJoiner(maze)
+    random.shuffle(doors)
+    for first, second in doors:
+        joiner.join(part_for(first), part_for(second), (first, second))
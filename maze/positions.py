@@ -16,11 +16,14 @@ class Position(Hashable):
     __position_type: str
     __coordinates: Coordinates
     __gridname: Optional[str]
+    __hash: int
 
     def __init__(self, position_type: str, coordinates: Coordinates, gridname: Optional[str] = None) -> None:
         self.__position_type = position_type
         self.__coordinates = coordinates
         self.__gridname = gridname
+        # positions are hashed over and over as dict and set keys
+        self.__hash = hash(position_type) ^ hash(coordinates) ^ hash(gridname)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Position):
@@ -42,7 +45,14 @@ class Position(Hashable):
         )
 
     def __hash__(self) -> int:
-        return hash(self.position_type) ^ hash(self.coordinates) ^ hash(self.gridname)
+        return self.__hash
+
+    # positions never change, so copies of grids can share them
+    def __copy__(self) -> 'Position':
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> 'Position':
+        return self
 
     def __repr__(self) -> str:
         class_name = type(self).__name__
@@ -79,6 +89,10 @@ class IntPosition(Position):
     def __init__(self, coordinates: Coordinates, gridname: Optional[str] = None) -> None:
         super().__init__("int", coordinates, gridname)
 
+    # pickled by value, since the cached hash changes from one run to the next
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (IntPosition, (self.coordinates, self.gridname))
+
     @property
     def ps_rep(self) -> str:
         return "[" + " ".join([str(x) for x in self.coordinates]) + "]"
@@ -92,6 +106,9 @@ class LinkPosition(Position):
     def __init__(self, coordinates: Coordinates, gridname: Optional[str] = None) -> None:
         super().__init__("link", coordinates, gridname)
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (LinkPosition, (self.coordinates, self.gridname))
+
     @property
     def ps_rep(self) -> str:
         return "[" + " ".join([str(x) for x in self.coordinates]) + " /link]"
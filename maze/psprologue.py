@@ -0,0 +1,110 @@
+# trimmed copies of draw_maze.ps holding only the procedures a maze calls
+
+from collections.abc import Iterable
+from functools import cache
+from typing import NamedTuple
+import os
+import re
+
+# words that finish a top-level statement in draw_maze.ps
+statement_ends = {'def', 'defaultdef', 'put', 'safefunc', 'simplefunc', 'dict_safe_func'}
+
+class Statement(NamedTuple):
+    text: str           # the statement with comments and layout removed
+    defines: set[str]   # top-level names the statement sets
+    uses: set[str]      # every other name it mentions
+
+token_pattern = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>%[^\n]*)
+  | (?P<dict><<|>>)
+  | (?P<hex><~.*?~>|<[0-9a-fA-F\s]*>)
+  | (?P<brace>[{}\[\]])
+  | (?P<string>\()
+  | (?P<name>/?/?[^\s{}\[\]()<>/%]+)
+''', re.VERBOSE | re.DOTALL)
+
+def ps_tokens(text: str) -> Iterable[str]:
+    position = 0
+    while position < len(text):
+        match = token_pattern.match(text, position)
+        if not match:
+            raise ValueError(f"can't tokenize ps at {text[position:position + 20]!r}")
+        kind = match.lastgroup
+        if kind == 'string':
+            # strings can hold balanced or escaped parens
+            depth = 0
+            end = position
+            while True:
+                char = text[end]
+                if char == '\\':
+                    end += 1
+                elif char == '(':
+                    depth += 1
+                elif char == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            yield text[position:end + 1]
+            position = end + 1
+            continue
+        if kind not in ('space', 'comment'):
+            yield match.group()
+        position = match.end()
+
+def ps_statements(text: str) -> list[Statement]:
+    statements: list[Statement] = []
+    tokens: list[str] = []
+    defines: set[str] = set()
+    depth = 0
+    block_depth = 0
+    for token in ps_tokens(text):
+        if depth == 0 and token.startswith('/') and not token.startswith('//'):
+            if not tokens or block_depth:
+                defines.add(token[1:])
+        tokens.append(token)
+        if token in ('{', '[', '<<'):
+            depth += 1
+        elif token in ('}', ']', '>>'):
+            depth -= 1
+        if depth:
+            continue
+        if token == 'begin':
+            block_depth += 1
+        elif token == 'end' and block_depth:
+            block_depth -= 1
+        elif token not in statement_ends or block_depth:
+            continue
+        if block_depth == 0:
+            if not tokens[0].startswith('/'):
+                # filling in a dictionary, as in "ellipsedict begin ... end"
+                defines.add(tokens[0])
+            uses = {t.lstrip('/') for t in tokens if re.match(r'/*[A-Za-z_]', t)}
+            statements.append(Statement(' '.join(tokens), defines, uses - defines))
+            tokens = []
+            defines = set()
+    if tokens:
+        raise ValueError(f"unfinished ps statement: {' '.join(tokens)[:60]}")
+    return statements
+
+@cache
+def draw_maze_statements() -> list[Statement]:
+    draw_maze = os.path.dirname(__file__) + '/../includes/draw_maze.ps'
+    with open(draw_maze, 'r') as f:
+        return ps_statements(f.read())
+
+@cache
+def minimal_prologue(entry_points: frozenset[str]) -> str:
+    statements = draw_maze_statements()
+    needed: set[str] = set()
+    pending = set(entry_points)
+    while pending:
+        name = pending.pop()
+        needed.add(name)
+        for statement in statements:
+            if name in statement.defines:
+                pending |= statement.uses - needed
+    # keep file order so redefinitions still win
+    kept = [statement.text for statement in statements if statement.defines & needed]
+    return "%!\n" + "\n".join(kept) + "\n"
@@ -2,16 +2,13 @@
 
 from .positions import Position, IntPosition, Direction, cardinal_directions, add_direction, manhattan, Coordinates
 from typing import Optional, Any, Callable, Sequence
+from collections.abc import Iterator
+from itertools import islice
 import random
 
-from .grid import BaseGrid, ps_list, Division, Edge
-
-TEXT_CELL_WIDTH = 4
-TEXT_CELL_HEIGHT = 3
-
-WALL = '#'
-SPACE = ' '
-PATH = '.'
+from .grid import BaseGrid, GridCell, ps_list, Division, Edge, Point, rotate_point, dot_outline
+from .mmapgrid import EAST, NORTH, binary_rows, numpy_random, sidewinder_rows
+from .textmaze import rect_rows, text_lines
 
 GridMask = set[Coordinates]
 
@@ -24,6 +21,22 @@ class RectBaseGrid(BaseGrid):
     def neighbor_directions_for_start(self, start:Position) -> tuple[Direction, ...]:
         raise ValueError("not overridden")
 
+    def column_coordinates(self) -> Iterator[Coordinates]:
+        for i in range(self.width):
+            for j in range(self.height):
+                yield (i, j)
+
+    def has_column(self, coordinates: Coordinates) -> bool:
+        i, j = coordinates
+        return 0 <= i < self.width and 0 <= j < self.height
+
+    @property
+    def column_count(self) -> int:
+        return self.width * self.height
+
+    def column_at(self, index: int) -> Coordinates:
+        return divmod(index, self.height)
+
     def pos_adjacents(self, start: Position) -> Sequence[Position]:
         neighbors: list[Position] = [
             add_direction(start, dir)
@@ -42,21 +55,115 @@ class RectBaseGrid(BaseGrid):
     def size_dict(self) -> dict[str, int | float | bool | list[int]]:
         return {"width": self.width, "height": self.height}
 
+    @property
+    def init_args(self) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        return (self.height, self.width), {}
+
+    def flat_center(self, position: Position) -> Point:
+        return (position.coordinates[0] + 0.5, position.coordinates[1] + 0.5)
+
+    def place(self, position: Position, points: list[Point], angle: float = 0.0) -> list[Point]:
+        # rotate points around the cell center, then move them there
+        cx, cy = self.flat_center(position)
+        return [(cx + x, cy + y) for x, y in (rotate_point(p, angle) for p in points)]
+
 class RectGrid(RectBaseGrid):
     outputs = dict(BaseGrid.outputs)
 
     def __init__(self, height: int, width: int, mask: Optional[GridMask]=None, **kwargs: Any) -> None:
         super().__init__(height, width, **kwargs)
-        for i in range(width):
-            for j in range(height):
-                if mask and (i, j) not in mask:
-                    continue
-                self._add_column((i, j))
+        self.mask = mask or None
+        # what set_passages gave an implicit grid, to link cells from
+        self.passages: Optional[Any] = None
+        self._add_columns()
+
+    def column_coordinates(self) -> Iterator[Coordinates]:
+        for coordinates in super().column_coordinates():
+            if self.mask is None or coordinates in self.mask:
+                yield coordinates
+
+    def has_column(self, coordinates: Coordinates) -> bool:
+        return super().has_column(coordinates) and (self.mask is None or coordinates in self.mask)
+
+    @property
+    def column_count(self) -> int:
+        if self.mask is None:
+            return super().column_count
+        return sum(1 for coordinates in self.mask if RectBaseGrid.has_column(self, coordinates))
+
+    def column_at(self, index: int) -> Coordinates:
+        if self.mask is None:
+            return super().column_at(index)
+        return next(islice(self.column_coordinates(), index, None))
+
+    def set_passages(self, passages: Any) -> None:
+        '''
+        link the cells as a numpy array of EAST and NORTH bits gives them,
+        indexed by row from the bottom and then column, replacing any links;
+        an implicit grid keeps the array and links cells as they're looked up
+        '''
+        if self.hyper or self.mask is not None:
+            raise ValueError("passages need a whole rectangular grid")
+        if passages.shape != (self.height, self.width):
+            raise ValueError(f"passages are {passages.shape}, not {(self.height, self.width)}")
+        self.reset()
+        if self.implicit:
+            self.passages = passages
+            return
+        # open sides in pos_adjacents order, east, north, west and south,
+        # in the order the cells were added
+        columns = passages.T
+        sides = columns & (EAST | NORTH)
+        sides[1:] |= (columns[:-1] & EAST) << 2
+        sides[:, 1:] |= (columns[:, :-1] & NORTH) << 2
+        steps = (self.height, 1, -self.height, -1)
+        offsets = [[step for bit, step in enumerate(steps) if side >> bit & 1] for side in range(16)]
+        positions = list(self._grid)
+        for k, (cell, side) in enumerate(zip(self._grid.values(), sides.reshape(-1).tolist())):
+            cell.links = {positions[k + offset] for offset in offsets[side]}
+
+    def _new_cell(self, position: Position) -> GridCell:
+        cell = super()._new_cell(position)
+        if self.passages is not None and position.position_type == 'int':
+            i, j = position.coordinates
+            links: set[Position] = set()
+            if self.passages[j, i] & EAST:
+                links.add(IntPosition((i + 1, j)))
+            if self.passages[j, i] & NORTH:
+                links.add(IntPosition((i, j + 1)))
+            if i > 0 and self.passages[j, i - 1] & EAST:
+                links.add(IntPosition((i - 1, j)))
+            if j > 0 and self.passages[j - 1, i] & NORTH:
+                links.add(IntPosition((i, j - 1)))
+            cell.links = links
+        return cell
+
+    def reset(self) -> None:
+        self.passages = None
+        super().reset()
+
+    def fresh_copy(self) -> BaseGrid:
+        # leave the passages out rather than copy them only to drop them
+        passages, self.passages = self.passages, None
+        try:
+            return super().fresh_copy()
+        finally:
+            self.passages = passages
 
     algorithms = dict(BaseGrid.algorithms)
 
     maze_type = "rectmaze"
 
+    def generate_tiled(self,
+            maze_algorithm: str,
+            blocks: int,
+            jobs: Optional[int] = None,
+            random_doors: bool = False,
+    ) -> None:
+        'generate blocks x blocks pieces in separate processes, then join them with a spanning tree of doors'
+        from .parallel import generate_blocks
+        generate_blocks(self, maze_algorithm, blocks, jobs, random_doors)
+
     @classmethod
     def from_mask_txt(cls, filename: str) -> 'RectGrid':
         space_characters = {' ', '.'}
@@ -90,6 +197,30 @@ class RectGrid(RectBaseGrid):
     def neighbor_directions_for_start(self, start:Position) -> tuple[Direction, ...]:
         return cardinal_directions
 
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        near = 0.5 - self.weave_inset
+        points: list[Point] = []
+        for i, wall in enumerate(walls):
+            side = [(near, -near)]
+            if not wall:
+                side += [(0.5, -near), (0.5, near)]
+            points += self.place(position, side, 90 * i)
+        return points
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        inset = self.weave_inset
+        near = 0.5 - inset
+        lines: list[list[Point]] = []
+        for i, wall in enumerate(walls):
+            if wall:
+                # don't draw walls for link cells
+                if position.position_type != "link":
+                    lines.append(self.place(position, [(near, -near), (near, near)], 90 * i))
+            elif inset > 0:
+                lines.append(self.place(position, [(near, -near), (0.5, -near)], 90 * i))
+                lines.append(self.place(position, [(near, near), (0.5, near)], 90 * i))
+        return lines
+
     def region_divisions(self, region: set[Position]) -> list[Division]:
         result: list[Division] = []
         # we assert that any region is rectangular
@@ -123,61 +254,16 @@ def ascii_print(maze: RectGrid,
         field: list[set[Position]] = [],
         **kwargs: str
 ) -> None:
-    def door_for_positions(a: Position, b: Position) -> str:
-        if a in maze and b in maze and b in maze[a].links:
-            if a in path and b in path:
-                return PATH
-            return SPACE
-        else:
-            return WALL
-    field_for_position: dict[Position, int] = {}
-    for distance, positions in enumerate(field):
-        for position in positions:
-            field_for_position[position] = distance
-    output: list[str] = []
-    output.append(WALL * ((TEXT_CELL_WIDTH + 1) * maze.width + 1))
-    for j in range(maze.height):
-        across_output = WALL
-        down_output = WALL
-        center_output = across_output
-        for i in range(maze.width):
-            position = IntPosition((i, j))
-            if position not in maze:
-                interior = WALL
-            elif position in path:
-                interior = PATH
-            else:
-                interior = SPACE
-            if position in field_for_position:
-                field_str = str(field_for_position[position])
-                extra_space = TEXT_CELL_WIDTH - len(field_str)
-                interior_output = interior * (extra_space // 2)
-                interior_output += field_str
-                interior_output += interior * (TEXT_CELL_WIDTH - len(interior_output))
-                center_output += interior_output
-            else:
-                center_output += interior * TEXT_CELL_WIDTH
-            across_output += interior * TEXT_CELL_WIDTH
-
-            across_position = IntPosition((i + 1, j))
-            door = door_for_positions(position, across_position)
-            across_output += door
-            center_output += door
-
-            down_position = IntPosition((i, j + 1))
-            door = door_for_positions(position, down_position)
-            down_output += door * TEXT_CELL_WIDTH
-            down_output += WALL
-
-        for i in range(TEXT_CELL_HEIGHT):
-            if i == TEXT_CELL_HEIGHT // 2:
-                output.append(center_output)
-            else:
-                output.append(across_output)
-        output.append(down_output)
-
-    output.reverse()
-    for line in output:
+    for line in text_lines(rect_rows(maze, path, field), maze.width):
+        print(line)
+
+@RectGrid.printer       # type: ignore [arg-type]
+def unicode_print(maze: RectGrid,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        **kwargs: str
+) -> None:
+    for line in text_lines(rect_rows(maze, path, field), maze.width, style='unicode'):
         print(line)
 
 
@@ -227,18 +313,44 @@ def sidewinder(maze: RectGrid) -> None:
                     maze.connect(position, next_position)
 
 
+@RectGrid.algo  # type: ignore [arg-type]
+def numpy_binary(maze: RectGrid) -> None:
+    'binary with every cell choosing at once, for whole grids'
+    maze.set_passages(binary_rows(numpy_random(), maze.height, maze.width))
+
+@RectGrid.algo  # type: ignore [arg-type]
+def numpy_sidewinder(maze: RectGrid) -> None:
+    'sidewinder with every run worked out at once, for whole grids'
+    maze.set_passages(sidewinder_rows(numpy_random(), maze.height, maze.width))
+
+
 class ZetaGrid(RectBaseGrid):
     def __init__(self, height: int, width: int, **kwargs: Any) -> None:
         super().__init__(height, width, **kwargs)
-        for i in range(width):
-            for j in range(height):
-                self._add_column((i, j))
+        self._add_columns()
 
     def neighbor_directions_for_start(self, start:Position) -> tuple[Direction, ...]:
         return ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
 
     maze_type = "zetamaze"
 
+    def flat_outline(self, position: Position, walls: list[bool]) -> list[Point]:
+        return self.place(position, [(0.5, -0.5), (0.5, 0.5), (-0.5, 0.5), (-0.5, -0.5)])
+
+    def flat_walls(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        return [
+            self.place(position, [(0.5, -0.5), (0.5, 0.5)], 45 * i)
+            for i in range(0, 8, 2) if walls[i]
+        ]
+
+    def flat_marks(self, position: Position, walls: list[bool]) -> list[list[Point]]:
+        # diagonal passages are shown as dots
+        radius = (self.linewidth or 0.1) * 0.75
+        return [
+            self.place(position, dot_outline((0.5, 0.0), radius), 45 * i)
+            for i in range(1, 8, 2) if not walls[i]
+        ]
+
 class UpsilonGrid(RectBaseGrid):
     def __init__(self, height: int, width: int, **kwargs: Any) -> None:
         super().__init__(height, width, **kwargs)
@@ -0,0 +1,171 @@
+# text renderings of rectangular mazes, written a row at a time from the
+# top down so only two rows of cells are needed at once
+
+from collections.abc import Iterable, Iterator, Sequence
+from typing import NamedTuple, Optional, TYPE_CHECKING
+
+from .positions import Position, IntPosition
+
+if TYPE_CHECKING:
+    from .rectgrid import RectGrid
+
+TEXT_CELL_WIDTH = 4
+TEXT_CELL_HEIGHT = 3
+
+WALL = '#'
+SPACE = ' '
+PATH = '.'
+
+UNICODE_PATH = '·'
+HORIZONTAL = '─'
+VERTICAL = '│'
+# box drawing characters by which of up, down, left and right have walls
+CORNERS = {
+    (False, False, False, False): ' ',
+    (True, False, False, False): '╵',
+    (False, True, False, False): '╷',
+    (False, False, True, False): '╴',
+    (False, False, False, True): '╶',
+    (True, True, False, False): '│',
+    (False, False, True, True): '─',
+    (False, True, False, True): '┌',
+    (False, True, True, False): '┐',
+    (True, False, False, True): '└',
+    (True, False, True, False): '┘',
+    (True, True, False, True): '├',
+    (True, True, True, False): '┤',
+    (False, True, True, True): '┬',
+    (True, False, True, True): '┴',
+    (True, True, True, True): '┼',
+}
+
+class TextCell(NamedTuple):
+    present: bool               # false for cells masked out of the grid
+    east: bool = False          # linked to the cell to the right
+    north: bool = False         # linked to the cell above
+    on_path: bool = False
+    distance: Optional[int] = None
+
+Row = Sequence[TextCell]
+
+MISSING = TextCell(False)
+
+def rect_rows(
+        maze: 'RectGrid',
+        path: Iterable[Position] = (),
+        field: Sequence[Iterable[Position]] = (),
+) -> Iterator[Row]:
+    'rows of a RectGrid from the top down'
+    path_set = set(path)
+    distance_for_position: dict[Position, int] = {}
+    for distance, positions in enumerate(field):
+        for position in positions:
+            distance_for_position[position] = distance
+    for j in reversed(range(maze.height)):
+        row: list[TextCell] = []
+        for i in range(maze.width):
+            position = IntPosition((i, j))
+            if position not in maze:
+                row.append(MISSING)
+                continue
+            links = maze[position].links
+            row.append(TextCell(
+                True,
+                IntPosition((i + 1, j)) in links,
+                IntPosition((i, j + 1)) in links,
+                position in path_set,
+                distance_for_position.get(position),
+            ))
+        yield row
+
+def cell_at(row: Optional[Row], i: int) -> TextCell:
+    if row is None or i < 0 or i >= len(row):
+        return MISSING
+    return row[i]
+
+def door(first: TextCell, second: TextCell, linked: bool) -> str:
+    'what goes between two cells in the # style'
+    if first.present and second.present and linked:
+        if first.on_path and second.on_path:
+            return PATH
+        return SPACE
+    return WALL
+
+def opening(first: TextCell, second: TextCell, linked: bool) -> str:
+    'what goes between two cells without a wall in the unicode style'
+    if first.present and second.present and linked and first.on_path and second.on_path:
+        return UNICODE_PATH
+    return SPACE
+
+def is_wall(first: TextCell, second: TextCell, linked: bool) -> bool:
+    'whether to draw a line between two cells, with none between missing cells'
+    if first.present and second.present:
+        return not linked
+    return first.present or second.present
+
+def interior(cell: TextCell, width: int, center: bool, style: str) -> str:
+    if style == 'unicode':
+        fill = UNICODE_PATH if cell.on_path else SPACE
+    elif not cell.present:
+        fill = WALL
+    else:
+        fill = PATH if cell.on_path else SPACE
+    if center and cell.distance is not None:
+        distance = str(cell.distance)
+        output = fill * ((width - len(distance)) // 2) + distance
+        return output + fill * (width - len(output))
+    return fill * width
+
+def wall_line(upper: Optional[Row], lower: Optional[Row], width: int, style: str) -> str:
+    'the line between two rows, or a border when one of them is None'
+    output: list[str] = []
+    for i in range(width + 1):
+        below = cell_at(lower, i)
+        above = cell_at(upper, i)
+        if style == 'unicode':
+            below_left = cell_at(lower, i - 1)
+            above_left = cell_at(upper, i - 1)
+            output.append(CORNERS[(
+                is_wall(above_left, above, above_left.east),
+                is_wall(below_left, below, below_left.east),
+                is_wall(below_left, above_left, below_left.north),
+                is_wall(below, above, below.north),
+            )])
+            if i < width:
+                if is_wall(below, above, below.north):
+                    output.append(HORIZONTAL * TEXT_CELL_WIDTH)
+                else:
+                    output.append(opening(below, above, below.north) * TEXT_CELL_WIDTH)
+        else:
+            output.append(WALL)
+            if i < width:
+                output.append(door(below, above, below.north) * TEXT_CELL_WIDTH)
+    return "".join(output)
+
+def cell_line(row: Row, width: int, center: bool, style: str) -> str:
+    output: list[str] = []
+    for i in range(width + 1):
+        left = cell_at(row, i - 1)
+        cell = cell_at(row, i)
+        if style == 'unicode':
+            if is_wall(left, cell, left.east):
+                output.append(VERTICAL)
+            else:
+                output.append(opening(left, cell, left.east))
+        else:
+            output.append(door(left, cell, left.east))
+        if i < width:
+            output.append(interior(cell, TEXT_CELL_WIDTH, center, style))
+    return "".join(output)
+
+def text_lines(rows: Iterable[Row], width: int, style: str = 'ascii') -> Iterator[str]:
+    'lines of text for rows of cells given from the top down'
+    if style not in ('ascii', 'unicode'):
+        raise ValueError(f"unknown text style {style}")
+    upper: Optional[Row] = None
+    for row in rows:
+        yield wall_line(upper, row, width, style)
+        for i in reversed(range(TEXT_CELL_HEIGHT)):
+            yield cell_line(row, width, i == TEXT_CELL_HEIGHT // 2, style)
+        upper = row
+    yield wall_line(upper, None, width, style)
@@ -0,0 +1,222 @@
+# deep zoom tile pyramid: the png pstopng would draw, cut into tiles at every
+# power-of-two zoom level, each tile drawing only the cells that touch it
+
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from math import ceil, floor, log2
+import os
+import shutil
+from typing import Optional, TYPE_CHECKING
+
+from .positions import Position
+from .ghostscript import stream_pages
+
+if TYPE_CHECKING:
+    from .grid import BaseGrid
+
+TILE_SIZE = 256
+# pages per gs run
+BATCH_SIZE = 64
+# extra room around a cell for line width and path dots
+MARGIN = 0.5
+
+Box = tuple[float, float, float, float]
+
+class CellIndex:
+    'uniform bucket index over cell bounding boxes'
+    def __init__(self, bounds: dict[Position, Box], bucket: float) -> None:
+        self.bucket = bucket
+        self.buckets: defaultdict[tuple[int, int], list[Position]] = defaultdict(list)
+        for position, box in bounds.items():
+            for key in self.keys(box):
+                self.buckets[key].append(position)
+        self.bounds = bounds
+
+    def keys(self, box: Box) -> Iterator[tuple[int, int]]:
+        left, bottom, right, top = box
+        for i in range(floor(left / self.bucket), floor(right / self.bucket) + 1):
+            for j in range(floor(bottom / self.bucket), floor(top / self.bucket) + 1):
+                yield (i, j)
+
+    def query(self, box: Box) -> set[Position]:
+        left, bottom, right, top = box
+        found: set[Position] = set()
+        for key in self.keys(box):
+            for position in self.buckets.get(key, ()):
+                c_left, c_bottom, c_right, c_top = self.bounds[position]
+                if (c_left <= right and left <= c_right
+                        and c_bottom <= top and bottom <= c_top):
+                    found.add(position)
+        return found
+
+class Tile:
+    def __init__(self, level: int, column: int, row: int,
+            size: tuple[int, int], box: Box, cells: set[Position]) -> None:
+        self.level = level
+        self.column = column
+        self.row = row
+        self.size = size
+        self.box = box
+        self.cells = cells
+
+def level_tiles(
+        index: CellIndex,
+        alignment: Sequence[float],
+        pixels: float,
+        size: tuple[int, int],
+) -> Iterator[Tile]:
+    'every tile of every level, largest level first'
+    left, bottom = alignment[:2]
+    width, height = size
+    image_top = bottom + height / pixels
+    max_level = ceil(log2(max(width, height)))
+    for level in range(max_level, -1, -1):
+        factor = 2 ** (max_level - level)
+        scale = pixels / factor
+        level_width, level_height = ceil(width / factor), ceil(height / factor)
+        for row in range(ceil(level_height / TILE_SIZE)):
+            tile_height = min(TILE_SIZE, level_height - row * TILE_SIZE)
+            top = image_top - row * TILE_SIZE / scale
+            for column in range(ceil(level_width / TILE_SIZE)):
+                tile_width = min(TILE_SIZE, level_width - column * TILE_SIZE)
+                x0 = left + column * TILE_SIZE / scale
+                box = (x0, top - tile_height / scale, x0 + tile_width / scale, top)
+                margin_box = (box[0] - MARGIN, box[1] - MARGIN, box[2] + MARGIN, box[3] + MARGIN)
+                yield Tile(level, column, row, (tile_width, tile_height),
+                    box, index.query(margin_box))
+
+class Overlay:
+    'the path and field, indexed by position so each tile takes only its own part'
+    def __init__(self, path: list[Position], field: list[set[Position]]) -> None:
+        self.path = path
+        self.steps: dict[Position, list[int]] = {}
+        for i, position in enumerate(path):
+            self.steps.setdefault(position, []).append(i)
+        self.field_length = len(field)
+        self.field_for_position = {position: i for i, frontier in enumerate(field) for position in frontier}
+
+    def path_runs(self, cells: set[Position]) -> list[list[Position]]:
+        '''
+        the stretches of path through cells, with a step either side so lines
+        leaving the tile are drawn; the end dots drawn at those extra steps
+        fall outside the tile
+        '''
+        spans: list[list[int]] = []
+        for i in sorted(i for position in cells for i in self.steps.get(position, ())):
+            start, stop = max(0, i - 1), min(len(self.path), i + 2)
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = stop
+            else:
+                spans.append([start, stop])
+        return [self.path[start:stop] for start, stop in spans]
+
+    def field(self, cells: set[Position]) -> list[set[Position]]:
+        'the frontiers cut down to cells, still as many of them'
+        # most frontiers miss the tile, and share one set that stays empty
+        empty: set[Position] = set()
+        frontiers = [empty] * self.field_length
+        for position in cells:
+            if (i := self.field_for_position.get(position)) is not None:
+                if frontiers[i] is empty:
+                    frontiers[i] = set()
+                frontiers[i].add(position)
+        return frontiers
+
+def tile_page(
+        maze: 'BaseGrid',
+        tile: Tile,
+        pixels: float,
+        overlay: Overlay,
+) -> tuple[tuple[int, int], str]:
+    scale = tile.size[0] / (tile.box[2] - tile.box[0])
+    # only the tile's own cells, path and frontiers go into its page
+    field = overlay.field(tile.cells)
+    runs = overlay.path_runs(tile.cells) or [[]]
+    drawing = [maze.ps_instructions(path=runs[0], field=field, only=tile.cells)]
+    # each further run is a path of its own; the drawlist cuts paths to
+    # only itself, the engine would draw the cells again
+    path_only = tile.cells if maze.drawlist else set()
+    drawing += [maze.ps_instructions(path=run, field=field, layer='path', only=path_only)
+        for run in runs[1:]]
+    return tile.size, "\n".join([
+        # linewidth stays one pixel of the deepest level, as in pstopng
+        f"1 {pixels} div setlinewidth",
+        f"{scale} dup scale",
+        f"{tile.box[0]} neg {tile.box[1]} neg translate",
+        *drawing,
+    ])
+
+def blank_png(size: tuple[int, int], grey: int = 255) -> bytes:
+    import png
+    import io
+    width, height = size
+    row = bytearray([grey] * (width * 3))
+    output = io.BytesIO()
+    png.Writer(width, height, greyscale=False).write(output, (row for _ in range(height)))
+    return output.getvalue()
+
+def write_tile_pyramid(
+        maze: 'BaseGrid',
+        name: str,
+        path: list[Position] = [],
+        field: list[set[Position]] = [],
+        jobs: Optional[int] = None,
+) -> None:
+    'write name.dzi and name_files/level/column_row.png'
+    alignment = [float(a) for a in maze.png_alignment]
+    left, bottom, right, top = alignment
+    pixels = maze.pixels
+    size = (int((right - left) * pixels) + 1, int((top - bottom) * pixels) + 1)
+    index = CellIndex(maze.cell_bounds(), TILE_SIZE / pixels)
+
+    tile_dir = name + '_files'
+    if os.path.exists(tile_dir):
+        shutil.rmtree(tile_dir)
+    tiles = list(level_tiles(index, alignment, pixels, size))
+    for level in {tile.level for tile in tiles}:
+        os.makedirs(os.path.join(tile_dir, str(level)))
+
+    # identical tiles, including all the empty ones, share a single file
+    written: dict[bytes, str] = {}
+
+    def store(tile: Tile, data: bytes) -> None:
+        filename = os.path.join(tile_dir, str(tile.level), f"{tile.column}_{tile.row}.png")
+        digest = hashlib.sha1(data).digest()
+        if digest in written:
+            os.link(written[digest], filename)
+        else:
+            with open(filename, 'wb') as f:
+                f.write(data)
+            written[digest] = filename
+
+    # a circle maze's background covers the whole image, but a multigrid's
+    # only covers parts of it, so there even the empty tiles are drawn
+    background = bool(maze.bg and maze.background_outline)
+    drawn: list[Tile] = []
+    for tile in tiles:
+        if tile.cells or (maze.bg and not background):
+            drawn.append(tile)
+        else:
+            store(tile, blank_png(tile.size, 0 if background else 255))
+
+    overlay = Overlay(path, field)
+    prologue = maze.ps_prologue
+    batches = [drawn[i:i + BATCH_SIZE] for i in range(0, len(drawn), BATCH_SIZE)]
+
+    def render_batch(batch: list[Tile]) -> list[bytes]:
+        pages = [tile_page(maze, tile, pixels, overlay) for tile in batch]
+        return list(stream_pages(prologue, pages, maze.gs_options))
+
+    with ThreadPoolExecutor(max_workers=jobs or maze.jobs or os.cpu_count()) as executor:
+        for batch, images in zip(batches, executor.map(render_batch, batches)):
+            for tile, data in zip(batch, images):
+                store(tile, data)
+
+    with open(name + '.dzi', 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"'
+            f' TileSize="{TILE_SIZE}" Overlap="0" Format="png">\n')
+        f.write(f'  <Size Width="{size[0]}" Height="{size[1]}"/>\n')
+        f.write('</Image>\n')
@@ -0,0 +1,51 @@
+# complex maze grids as they come out of MultiGrid, before any maze is made,
+# kept pickled in memory and on disk so the same layout is only built once
+
+import hashlib
+import os
+import pickle
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .multigrid import MultiGrid
+
+# change when pickled grids from older code can't be used
+CACHE_VERSION = 1
+
+topologies: dict[str, bytes] = {}
+
+def topology_key(mazetype: str, size: int, kwargs: dict[str, Any]) -> str:
+    key = repr((CACHE_VERSION, mazetype, size, sorted(kwargs.items())))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def cached_topology(
+        mazetype: str,
+        size: int,
+        kwargs: dict[str, Any],
+        build: Callable[[], 'MultiGrid'],
+        cache: Optional[str] = None,
+) -> 'MultiGrid':
+    '''
+    a fresh copy of the grid build makes, with cells, edge map and subgrid
+    positions loaded from memory or the cache directory when built before
+    '''
+    key = topology_key(mazetype, size, kwargs)
+    filename = os.path.join(cache or '', key + '.pickle')
+    on_disk = bool(cache) and os.path.exists(filename)
+    data = topologies.get(key)
+    if data is None and on_disk:
+        with open(filename, 'rb') as f:
+            data = f.read()
+    grid: Optional['MultiGrid'] = None
+    if data is None:
+        grid = build()
+        data = pickle.dumps(grid, pickle.HIGHEST_PROTOCOL)
+    topologies[key] = data
+    if cache and not on_disk:
+        os.makedirs(cache, exist_ok=True)
+        with open(filename + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(filename + '.tmp', filename)
+    if grid is None:
+        grid = pickle.loads(data)
+    return grid
@@ -0,0 +1,48 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.hexgrid import HexGrid
+from maze.batch import BatchEntry, batch_ps
+from maze.downscale import png_size
+from maze.grid import BaseGrid
+from maze.ghostscript import stream_pages
+from pathlib import Path
+import pytest
+import random
+import shutil
+
+def batch_entries() -> list[BatchEntry]:
+    random.seed(35)
+    mazes: list[BaseGrid] = [RectGrid(5, 7, pixels=10), HexGrid(4, pixels=7.5)]
+    entries: list[BatchEntry] = []
+    for i, maze in enumerate(mazes):
+        maze.generate_maze('backtrack')
+        path = maze.longest_path()
+        entries.append((maze, {'path': path}, f'maze{i}'))
+    return entries
+
+def test_batch_ps() -> None:
+    entries = batch_entries()
+    prologue, pages = batch_ps(entries)
+    assert len(pages) == len(entries)
+    for i, ((maze, _, _), (size, page)) in enumerate(zip(entries, pages), start=1):
+        assert prologue.count(f"/maze{i} {{") == 1
+        assert page.split()[-1] == f"maze{i}"
+        left, bottom, right, top = [float(a) for a in maze.png_alignment]
+        assert size == (png_size(right - left, maze.pixels), png_size(top - bottom, maze.pixels))
+    assert pages[0][0] != pages[1][0]
+
+def test_batch_png_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    png = pytest.importorskip('png')
+    if not shutil.which('gs'):
+        pytest.skip("needs ghostscript")
+    monkeypatch.chdir(tmp_path)
+    entries = batch_entries()
+    prologue, pages = batch_ps(entries)
+    for (maze, print_args, name), (size, _), data in zip(entries, pages, stream_pages(prologue, pages)):
+        assert png.Reader(bytes=data).read()[:2] == size
+        # png_print's own gs rendering
+        maze.bands = 1
+        maze.print('png', maze_name=name, **print_args)
+        assert png.Reader(filename=name + '.png').read()[:2] == size
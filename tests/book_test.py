@@ -0,0 +1,25 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.circlegrid import CircleGrid
+from maze.book import book_ps, layout_boxes
+
+def test_book() -> None:
+    assert layout_boxes(1) == [(0.25, 0.25, 8, 10.5)]
+    # two mazes go one above the other
+    top, bottom = layout_boxes(2)
+    assert top[0] == bottom[0] and top[1] > bottom[1]
+    assert len(layout_boxes(6)) == 6
+
+    mazes = [RectGrid(3, 3), RectGrid(4, 4), CircleGrid(3)]
+    for maze in mazes:
+        maze.generate_maze('backtrack')
+    book = book_ps([(maze, {}) for maze in mazes], nup=2)
+    assert book.startswith("%!PS-Adobe-3.0\n")
+    assert "%%Pages: 2\n" in book
+    assert book.count("%%Page: ") == 2
+    # one prologue for every kind of maze in the book
+    assert book.count("/mazeengine ") == 1
+    assert "/drawrectmaze " in book and "/drawcirclemaze " in book
+    assert book.index("%%EndProlog") < book.index("%%Page: 1 1")
@@ -0,0 +1,77 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.grid import BaseGrid
+from maze.rectgrid import RectGrid
+from maze.hexgrid import HexGrid
+from base64 import a85decode
+import random
+
+def decode_cell_table(lines: list[str], encoding: str) -> dict[tuple[bool, tuple[int, ...]], tuple[list[bool], int]]:
+    'the records of a ps_cell_table, keyed by (is link, coordinates)'
+    assert lines[0].startswith("/cellformat [") and lines[1] == "/cellcode [" and lines[-1] == "]"
+    dimensions, coordinate_bytes, offset, count_bytes, field_bytes = [int(x) for x in lines[0][13:-1].split()]
+    data = b''
+    for chunk in "\n".join(lines[2:-1]).split(">\n" if encoding == 'hex' else "~>\n"):
+        if encoding == 'hex':
+            data += bytes.fromhex(chunk.strip("<>\n").replace("\n", ""))
+        else:
+            data += a85decode(chunk.strip("\n") + ("" if chunk.endswith("~>") else "~>"), adobe=True)
+
+    index = 0
+
+    def take(size: int) -> int:
+        nonlocal index
+        index += size
+        return int.from_bytes(data[index - size:index], 'big')
+
+    records = {}
+    while index < len(data):
+        link = bool(take(1))
+        coordinates = tuple(take(coordinate_bytes) - offset for _ in range(dimensions))
+        count = take(count_bytes)
+        wall_bytes = (count + 7) // 8
+        wall_bits = take(wall_bytes)
+        walls = [bool(wall_bits >> (wall_bytes * 8 - 1 - i) & 1) for i in range(count)]
+        records[link, coordinates] = (walls, take(field_bytes))
+    return records
+
+def test_cell_table() -> None:
+    for make in (
+            lambda encoding: RectGrid(9, 11, weave=True, cell_encoding=encoding),
+            lambda encoding: HexGrid(4, cell_encoding=encoding)):
+        for encoding in ('hex', 'ascii85'):
+            random.seed(28)
+            maze: BaseGrid = make(encoding)
+            maze.generate_maze('backtrack')
+            positions = maze.ps_positions()
+            field_for_position = {k: 1 + n % 300 for n, k in enumerate(positions)}
+            records = decode_cell_table(maze.ps_cell_table(field_for_position), encoding)
+            assert len(records) == len(positions)
+            for k in positions:
+                cell = maze[k]
+                walls, field = records[k.position_type == 'link', k.coordinates]
+                assert walls == maze.walls_for_cell(cell)
+                assert field == field_for_position[k]
+                # an open side for each link
+                assert walls.count(False) == len(cell.links)
+
+    # past 64k the records are split over several strings
+    random.seed(28)
+    big = RectGrid(120, 120)
+    big.generate_maze('binary')
+    for encoding in ('hex', 'ascii85'):
+        big.cell_encoding = encoding
+        lines = big.ps_cell_table({})
+        assert len(lines) > 4
+        records = decode_cell_table(lines, encoding)
+        assert len(records) == len(big)
+        assert all(records[False, k.coordinates] == (big.walls_for_cell(big[k]), 0) for k in big.ps_positions())
+
+def test_shape_cache() -> None:
+    random.seed(29)
+    for shape_cache in (None, True):
+        maze = HexGrid(4, shape_cache=shape_cache)
+        maze.generate_maze('backtrack')
+        lines = maze.ps_instructions(path=maze.longest_path()).split("\n")
+        assert ("/shapecache true" in lines) == bool(shape_cache)
@@ -1,7 +1,7 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from maze.circlegrid import SemiCircleGrid
+from maze.circlegrid import SemiCircleGrid, ring_layout
 from maze.positions import IntPosition as IntPos
 import random
 
@@ -37,6 +37,11 @@ def test_semi() -> None:
     odd_semicircle = SemiCircleGrid(5)
     assert odd_semicircle.widths == [1, 6, 12]
     assert len(odd_semicircle) == 10
+    layout = ring_layout(2, 6, True, 180.0)
+    assert odd_semicircle.layout is layout
+    assert layout.counts == (1, 3, 6)
+    assert layout.offsets == (0, 1, 4, 10)
+    assert [layout.cell_index(*p.coordinates) for p in odd_semicircle._grid] == list(range(10))
     structure = odd_semicircle.structured_data()
     assert structure['radius'] == 2
     assert structure['degrees']  == 180.0
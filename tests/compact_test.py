@@ -0,0 +1,31 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.grid import CompactCell
+from maze.rectgrid import RectGrid
+from maze.positions import IntPosition as IntPos, LinkPosition as LinkPos
+import random
+
+def test_compact_cells() -> None:
+    mazes = []
+    for compact_cells in (False, True):
+        random.seed(47)
+        maze = RectGrid(8, 8, weave=True, compact_cells=compact_cells)
+        maze.generate_maze('kruskal')
+        mazes.append(maze)
+    loose, compact = mazes
+    assert any(p.position_type == 'link' for p in compact._grid)
+    assert list(compact._grid) == list(loose._grid)
+    for position, cell in loose._grid.items():
+        assert compact[position].links == cell.links
+
+    cell = compact[IntPos((3, 3))]
+    assert isinstance(cell, CompactCell)
+    cell.clear_links()
+    assert not cell.links
+    cell.links = {IntPos((4, 3)), LinkPos((3, 2))}
+    # pos_adjacents of a RectGrid go east, north, west, south
+    assert [cell.has_link(d) for d in range(4)] == [True, False, False, True]
+    assert cell.links == {IntPos((4, 3)), LinkPos((3, 2))}
+    cell.remove_link(LinkPos((3, 2)))
+    assert cell.links == {IntPos((4, 3))}
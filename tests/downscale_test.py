@@ -0,0 +1,58 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from maze.downscale import AreaScaler, png_size
+from typing import Any
+
+def area_weights(size: int, source_size: int, ratio: float) -> Any:
+    'how much of each source pixel each output pixel covers'
+    import numpy as np
+    weights = np.zeros((size, source_size))
+    for i in range(size):
+        for j in range(source_size):
+            weights[i, j] = max(0.0, min((i + 1) * ratio, j + 1) - max(i * ratio, j))
+    return weights
+
+def scale(image: Any, size: tuple[int, int], ratio: float) -> Any:
+    import numpy as np
+    scaler = AreaScaler(size, ratio, image.shape[0])
+    for row in image:
+        scaler.add(row.astype(float))
+    return np.array(scaler.finish()).reshape(size[1], size[0], 3)
+
+def check_scale(image: Any, size: tuple[int, int], ratio: float) -> None:
+    import numpy as np
+    across = area_weights(size[0], image.shape[1], ratio)
+    down = area_weights(size[1], image.shape[0], ratio)
+    expected = np.einsum('yi,ijc,xj->yxc', down, image.astype(float), across) / ratio ** 2
+    assert np.abs(scale(image, size, ratio).astype(float) - expected).max() <= 0.5
+
+def test_png_size() -> None:
+    assert png_size(5, 10) == 51
+    assert png_size(2.5, 3) == 8
+    assert png_size(0, 20) == 1
+
+def test_integer_ratio() -> None:
+    np = pytest.importorskip('numpy')
+    image = np.random.default_rng(1).integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    check_scale(image, (4, 3), 2.0)
+    scaled = scale(image, (4, 3), 2.0)
+    assert scaled[0, 0, 0] == round(image[:2, :2, 0].astype(float).mean())
+
+def test_fractional_ratio() -> None:
+    np = pytest.importorskip('numpy')
+    image = np.random.default_rng(2).integers(0, 256, (9, 9, 3), dtype=np.uint8)
+    check_scale(image, (6, 6), 1.5)
+    image = np.zeros((3, 3, 3), dtype=np.uint8)
+    image[:, 1] = 255
+    # the first output column covers one black and half a white source column
+    assert scale(image, (2, 2), 1.5)[0, 0, 0] == 85
+
+def test_bottom_aligned() -> None:
+    np = pytest.importorskip('numpy')
+    # an extra source row at the top is dropped, a missing one is white
+    image = np.zeros((5, 4, 3), dtype=np.uint8)
+    image[0] = 255
+    assert (scale(image, (2, 2), 2.0) == 0).all()
+    assert (scale(image[2:], (2, 2), 2.0)[0] == 128).all()
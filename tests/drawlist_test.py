@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.complex_maze import complex_grid
+from maze.grid import Point, merge_segments
+from maze.rectgrid import RectGrid, UpsilonGrid
+from maze.circlegrid import CircleGrid
+import random
+
+def segments(lines: list[list[Point]]) -> list[tuple[Point, ...]]:
+    'the unit steps of lines along a square grid, which merge_segments joins when straight'
+    steps: list[tuple[Point, ...]] = []
+    for line in lines:
+        for a, b in zip(line, line[1:]):
+            length = round(abs(b[0] - a[0]) + abs(b[1] - a[1]))
+            dx, dy = (b[0] - a[0]) / length, (b[1] - a[1]) / length
+            steps += [tuple(sorted(((a[0] + dx * i, a[1] + dy * i), (a[0] + dx * (i + 1), a[1] + dy * (i + 1)))))
+                for i in range(length)]
+    return steps
+
+def test_merge_segments() -> None:
+    # two squares sharing a side, drawn twice over, and a stray point
+    left: list[Point] = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+    right: list[Point] = [(1, 0), (2, 0), (2, 1), (1, 1.0000001), (1, 0)]
+    merged = merge_segments([left, right, [(2, 0), (2, 0)]])
+    found = segments(merged)
+    assert len(found) == len(set(found)) == 7
+    assert set(found) == set(segments([left, [(1, 0), (2, 0), (2, 1), (1, 1)]]))
+    # only the ends of the shared side meet an odd number of walls, so
+    # one chain between them draws the lot
+    assert len(merged) == 1
+    # a loop of loose segments comes back as one closed chain
+    square = merge_segments([[(0, 0), (1, 0)], [(1, 1), (1, 0)], [(0, 1), (1, 1)], [(0, 0), (0, 1)]])
+    assert len(square) == 1 and len(square[0]) == 5 and square[0][0] == square[0][-1]
+
+def test_drawlist_output() -> None:
+    random.seed(26)
+    maze = RectGrid(5, 7, drawlist=True)
+    maze.generate_maze('backtrack')
+    path = maze.longest_path()
+    lines = maze.ps_instructions(path=path).split("\n")
+    walls_start = lines.index("0 setgray")
+    path_start = lines.index("1 0 0 setrgbcolor")
+    assert sum(line.endswith("closepath fill") for line in lines[:walls_start]) == len(maze)
+    # the end dots
+    assert sum(line.endswith("closepath fill") for line in lines[path_start:]) == 2
+
+    def points(line: str) -> list[Point]:
+        numbers = [float(x) for x in line.split() if x not in ('moveto', 'lineto', 'stroke')]
+        return list(zip(numbers[::2], numbers[1::2]))
+
+    # each wall once, between each cell and the neighbors it isn't linked to
+    drawn = segments([points(line) for line in lines[walls_start + 1:path_start]])
+    expected = set()
+    for position in maze._grid:
+        x, y = position.coordinates
+        for neighbor, wall in zip(maze.pos_adjacents(position), maze.walls_for_cell(maze[position])):
+            nx, ny = neighbor.coordinates
+            if wall:
+                corner = (float(max(x, nx)), float(max(y, ny)))
+                other = (corner[0] + (nx == x), corner[1] + (ny == y))
+                expected.add((corner, other))
+    assert len(drawn) == len(set(drawn))
+    assert set(drawn) == expected
+
+def test_multigrid_path() -> None:
+    for mazetype, size in (('heart', 3), ('slender_star', 2)):
+        random.seed(26)
+        maze = complex_grid(mazetype, size)
+        maze.generate_maze('backtrack')
+        path = maze.longest_path()
+        # each subgrid draws its own runs out to its edges, where they meet
+        # the runs of the next subgrid, so only the ends of the path are left
+        ends: list[Point] = []
+        for subgrid in maze._subgrids.values():
+            assert "stroke" in subgrid.ps_drawlist(path=path)
+            for line in subgrid.path_lines(path):
+                ends += [subgrid.page_point(line[0]), subgrid.page_point(line[-1])]
+        loose = [p for p in ends if sum(abs(p[0] - q[0]) + abs(p[1] - q[1]) < 1e-6 for q in ends) == 1]
+        assert len(loose) == 2
+
+def test_flat_geometry() -> None:
+    assert RectGrid(3, 3, weave=True).has_flat_geometry
+    assert CircleGrid(3).has_flat_geometry
+    assert not CircleGrid(3, weave=True).has_flat_geometry
+    assert not UpsilonGrid(3, 3).has_flat_geometry
+    assert complex_grid('heart', 2).has_flat_geometry
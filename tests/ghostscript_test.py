@@ -0,0 +1,154 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze import ghostscript
+from maze.ghostscript import GhostscriptPool, GhostscriptWorker, active_pool, band_ranges, read_png
+from io import BytesIO
+from pathlib import Path
+import pytest
+import subprocess
+import struct
+import zlib
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def tiny_png(grey: int) -> bytes:
+    'a 1x1 rgb png'
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        png_chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0)),
+        png_chunk(b'IDAT', zlib.compress(bytes([0, grey, grey, grey]))),
+        png_chunk(b'IEND', b''),
+    ])
+
+def test_band_ranges() -> None:
+    assert band_ranges(3, 10) == [(0, 1), (1, 2), (2, 3)]
+    assert band_ranges(7, 1) == [(0, 7)]
+    assert band_ranges(7, 0) == [(0, 7)]
+    for height, bands in ((10, 3), (101, 7), (5, 4)):
+        ranges = band_ranges(height, bands)
+        assert len(ranges) == bands
+        rows = [row for top, bottom in ranges for row in range(top, bottom)]
+        assert rows == list(range(height))
+        sizes = [bottom - top for top, bottom in ranges]
+        assert max(sizes) - min(sizes) <= 1
+
+def test_read_png() -> None:
+    first, second = tiny_png(0), tiny_png(255)
+    stream = BytesIO(first + second)
+    assert read_png(stream) == first
+    assert read_png(stream) == second
+    assert read_png(stream) is None
+    assert read_png(BytesIO(b'')) is None
+    # the caller may already have read the signature
+    stream = BytesIO(first)
+    assert read_png(stream, stream.read(4)) == first
+
+def test_read_png_truncated() -> None:
+    data = tiny_png(0)
+    with pytest.raises(EOFError):
+        read_png(BytesIO(data[:20]))
+    with pytest.raises(EOFError):
+        read_png(BytesIO(data[:-12]))
+    with pytest.raises(EOFError):
+        read_png(BytesIO(data[:-2]))
+
+# stands in for gs: answers each page with a fixed png, MAZEERR for a page
+# that mentions MAZEFAIL, and exits on MAZECRASH until the crash file exists
+STUB_GS = '''
+import os, sys
+png, crash_file = bytes.fromhex(sys.argv[1]), sys.argv[2]
+out = sys.stdout.buffer
+page = []
+for line in sys.stdin:
+    if line.strip() == 'quit':
+        break
+    if 'MAZEPONG' in line:
+        out.write(b'MAZEPONG')
+        out.flush()
+        continue
+    page.append(line)
+    if not line.rstrip().endswith('mazejob restore'):
+        continue
+    text = ''.join(page)
+    page = []
+    if 'MAZECRASH' in text and not os.path.exists(crash_file):
+        if 'MAZEONCE' in text:
+            open(crash_file, 'w').close()
+        sys.exit(1)
+    out.write(b'MAZEERR\\nundefined\\n' if 'MAZEFAIL' in text else png)
+    out.flush()
+'''
+
+class StubWorker(GhostscriptWorker):
+    crash_file = ''
+
+    def start(self) -> None:
+        command = [sys.executable, '-c', STUB_GS, tiny_png(128).hex(), self.crash_file]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.send(self.prologue)
+
+@pytest.fixture
+def stub_gs(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    crash_file = tmp_path / 'crashed'
+    monkeypatch.setattr(StubWorker, 'crash_file', str(crash_file))
+    monkeypatch.setattr(ghostscript, 'GhostscriptWorker', StubWorker)
+    return crash_file
+
+def test_active_pool() -> None:
+    assert active_pool() is None
+    with GhostscriptPool(1, prologue='') as outer:
+        assert active_pool() is outer
+        with GhostscriptPool(1, prologue='') as inner:
+            assert active_pool() is inner
+        assert active_pool() is outer
+        # closing an inner pool again is harmless
+        inner.close()
+    assert active_pool() is None
+    outer.close()
+    assert outer.workers == [] and outer.idle.empty()
+
+def test_worker_render(stub_gs: Path) -> None:
+    worker = StubWorker('')
+    try:
+        assert worker.render((1, 1), 'page') == tiny_png(128)
+        with pytest.raises(RuntimeError, match='undefined'):
+            worker.render((1, 1), 'MAZEFAIL')
+        # the worker still answers after a failed page
+        assert worker.healthy()
+        assert worker.render((1, 1), 'page') == tiny_png(128)
+        with pytest.raises(EOFError):
+            worker.render((1, 1), 'MAZECRASH')
+        assert not worker.healthy()
+    finally:
+        worker.stop()
+
+def test_pool_render(stub_gs: Path) -> None:
+    with GhostscriptPool(1, prologue='') as pool:
+        assert pool.render((1, 1), 'page') == tiny_png(128)
+        worker = pool.workers[0]
+        first_process = worker.process
+        with pytest.raises(RuntimeError):
+            pool.render((1, 1), 'MAZEFAIL')
+        assert pool.idle.qsize() == 1 and worker.process is first_process
+        # a crash restarts gs and retries the page once
+        assert pool.render((1, 1), 'MAZECRASH MAZEONCE') == tiny_png(128)
+        assert stub_gs.exists()
+        assert pool.idle.qsize() == 1 and worker.process is not first_process
+        assert pool.workers == [worker]
+        stub_gs.unlink()
+        # a page that crashes gs twice gives up, leaving a fresh worker idle
+        crashed_process = worker.process
+        with pytest.raises(EOFError):
+            pool.render((1, 1), 'MAZECRASH')
+        assert pool.idle.qsize() == 1 and worker.process is not crashed_process
+        assert worker.healthy()
+        assert pool.render((1, 1), 'page') == tiny_png(128)
+        assert pool.check() == 0
+        worker.process.kill()
+        worker.process.wait()
+        assert pool.check() == 1
+        assert pool.render((1, 1), 'page') == tiny_png(128)
+    assert pool.workers == []
+    assert worker.process.poll() is not None
@@ -0,0 +1,16 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.grid import BaseGrid
+
+def assert_perfect_maze(maze: BaseGrid) -> None:
+    'every cell reachable, and one fewer link than cells'
+    assert sum(len(maze[position].links) for position in maze._grid) == 2 * (len(maze) - 1)
+    reached = set()
+    stack = [next(iter(maze._grid))]
+    while stack:
+        position = stack.pop()
+        if position not in reached:
+            reached.add(position)
+            stack.extend(maze[position].links)
+    assert len(reached) == len(maze)
@@ -0,0 +1,32 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.hexgrid import HexGrid
+from maze.rectgrid import RectGrid
+from maze.positions import IntPosition as IntPos
+import random
+
+def test_implicit_grid() -> None:
+    mask: set[tuple[int, ...]] = {(i, j) for i in range(9) for j in range(7) if (i + j) % 4 != 1}
+    for make in (
+            lambda **kwargs: RectGrid(7, 9, mask=mask, **kwargs),
+            lambda **kwargs: RectGrid(3, 4, hyper=[2], **kwargs),
+            lambda **kwargs: HexGrid(4, **kwargs)):
+        mazes = []
+        for implicit in (False, True):
+            random.seed(48)
+            maze = make(implicit=implicit)
+            assert len(maze) == len(make())
+            maze.generate_maze('backtrack')
+            mazes.append(maze)
+        explicit, implicit_maze = mazes
+        assert list(implicit_maze._grid) == list(explicit._grid)
+        for position, cell in explicit._grid.items():
+            assert implicit_maze[position].links == cell.links
+
+    huge = RectGrid(20000, 20000, implicit=True)
+    assert len(huge) == 400000000
+    assert IntPos((19999, 19999)) in huge and IntPos((20000, 0)) not in huge
+    huge.connect(IntPos((0, 0)), IntPos((1, 0)))
+    assert huge[IntPos((1, 0))].links == {IntPos((0, 0))}
+    assert not huge[IntPos((5, 5))].links
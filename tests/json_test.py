@@ -0,0 +1,46 @@
+import io
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.complex_maze import complex_grid
+from maze.rectgrid import RectGrid
+from maze.jsonstream import write_json
+import random
+
+def test_json() -> None:
+    random.seed(41)
+    grid = RectGrid(5, 6)
+    grid.generate_maze('backtrack')
+    path = grid.longest_path()
+    field = grid.dijkstra(path[0])
+
+    # streamed output is the structured_data document
+    nested = io.StringIO()
+    write_json(grid, nested, path, field)
+    assert json.loads(nested.getvalue()) == grid.structured_data(path, field)
+
+    columnar = io.StringIO()
+    write_json(grid, columnar, path, field, 'columnar')
+    data = json.loads(columnar.getvalue())
+    assert data['format'] == 'columnar'
+    assert data['cell_count'] == len(grid)
+    cells: list[tuple[int, ...]] = [(x, y) for x, y in zip(data['coordinate_0'], data['coordinate_1'])]
+    assert cells == [p.coordinates for p in grid._grid]
+    start = data['link_start']
+    for i, position in enumerate(grid._grid):
+        links = {cells[j] for j in data['link_cells'][start[i]:start[i + 1]]}
+        assert links == {p.coordinates for p in grid._grid[position].links}
+    assert [cells[i] for i in data['path']] == [p.coordinates for p in path]
+    assert data['distance'][cells.index(path[0].coordinates)] == 0
+    assert max(data['distance']) == len(field) - 1
+
+    # a complex maze has every subgrid's cells and no size
+    random.seed(41)
+    cube = complex_grid('cube', 2)
+    cube.generate_maze('backtrack')
+    data = cube.structured_data()
+    assert len(data['cells']) == len(cube) > 0
+    nested = io.StringIO()
+    write_json(cube, nested)
+    assert json.loads(nested.getvalue()) == data
@@ -0,0 +1,68 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.layers import LAYERS, layer_keys, layered_png
+from pathlib import Path
+import pytest
+import random
+
+def changed(before: dict[str, str], after: dict[str, str]) -> set[str]:
+    return {layer for layer in LAYERS if before[layer] != after[layer]}
+
+def test_layer_keys() -> None:
+    random.seed(33)
+    maze = RectGrid(8, 8)
+    maze.generate_maze('backtrack')
+    path = maze.longest_path()
+    field = maze.dijkstra(path[0])
+    keys = layer_keys(maze, path, field)
+    assert layer_keys(maze, list(path), [set(frontier) for frontier in field]) == keys
+
+    other_path = path[:len(path) // 2]
+    assert changed(keys, layer_keys(maze, other_path, field)) == {'path'}
+    # the path is drawn white over a field, so it only changes when the field comes or goes
+    assert changed(keys, layer_keys(maze, path, [])) == {'fill', 'path'}
+    assert changed(keys, layer_keys(maze, path, maze.dijkstra(path[-1]))) == {'fill'}
+
+    maze.linewidth = 0.2
+    assert changed(keys, layer_keys(maze, path, field)) == set(LAYERS)
+    maze.linewidth = None
+
+    random.seed(34)
+    maze.reset()
+    maze.generate_maze('backtrack')
+    assert changed(keys, layer_keys(maze, path, field)) == set(LAYERS)
+
+def test_layer_composite(tmp_path: Path) -> None:
+    np = pytest.importorskip('numpy')
+    png = pytest.importorskip('png')
+    random.seed(35)
+    maze = RectGrid(2, 2)
+    maze.generate_maze('backtrack')
+    path = maze.longest_path()
+    keys = layer_keys(maze, path, [])
+    # layers already in the cache are composited without running gs
+    shape = (3, 2)
+    layers = {
+        'fill': (np.array([200, 100, 0]), np.array([[255, 0], [128, 255], [0, 0]])),
+        'walls': (np.array([0, 0, 0]), np.array([[0, 255], [128, 0], [255, 0]])),
+        'path': (np.array([255, 0, 0]), np.array([[0, 0], [255, 128], [0, 0]])),
+    }
+    for layer, (color, alpha) in layers.items():
+        rgba = np.zeros(shape + (4,), dtype=np.uint8)
+        rgba[:, :, :3] = color
+        rgba[:, :, 3] = alpha
+        np.savez_compressed(tmp_path / (keys[layer] + '.npz'), rgba=rgba)
+    output = str(tmp_path / 'maze.png')
+    layered_png(maze, output, str(tmp_path), path=path)
+
+    expected = np.full(shape + (3,), 255.0)
+    for color, alpha in layers.values():
+        expected = expected * (1 - alpha[:, :, None] / 255) + color * alpha[:, :, None] / 255
+    width, height, rows, _ = png.Reader(filename=output).asRGB8()
+    image = np.vstack([np.frombuffer(bytes(row), dtype=np.uint8) for row in rows]).reshape(height, width, 3)
+    assert (width, height) == (2, 3)
+    assert np.abs(image - expected).max() <= 0.5
+    assert image[0, 0].tolist() == [200, 100, 0]
+    assert image[2, 0].tolist() == [0, 0, 0]
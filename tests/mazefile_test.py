@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.grid import BaseGrid
+from maze.rectgrid import RectGrid
+from maze.complex_maze import complex_grid
+from maze.mazefile import MazeView
+from maze.positions import IntPosition as IntPos
+import random
+
+def test_mazefile() -> None:
+    random.seed(23)
+    woven = RectGrid(8, 8, weave=True)
+    woven.generate_maze('backtrack')
+    star = complex_grid('slender_star', 3)
+    star.generate_maze('backtrack')
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'test.maze')
+        for maze in (woven, star):
+            maze.save(filename)
+            loaded = BaseGrid.load(filename)
+            assert type(loaded) is type(maze)
+            assert list(loaded._grid) == list(maze._grid)
+            for position, cell in maze._grid.items():
+                assert loaded[position].links == cell.links
+            assert loaded.ps_instructions() == maze.ps_instructions()
+
+        woven.save(filename)
+        with MazeView(filename) as view:
+            assert len(view) == len(woven)
+            assert view.header['weave']
+            assert set(view.neighbors(IntPos((3, 4)))) == woven[IntPos((3, 4))].links
+            assert IntPos((8, 0)) not in view
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze import mmapgrid
+from maze.mmapgrid import EAST, NORTH, MmapGrid, generate_file
+from maze.rectgrid import RectGrid
+from maze.positions import IntPosition as IntPos
+from tests.helpers import assert_perfect_maze
+from pathlib import Path
+import random
+import pytest
+
+def test_from_grid(tmp_path: Path) -> None:
+    filename = str(tmp_path / 'walls.bits')
+    with MmapGrid.create(filename, 3, 6) as grid:
+        assert len(grid) == 18
+        assert all(grid.cell(i, j) == 0 for i in range(6) for j in range(3))
+
+    random.seed(49)
+    maze = RectGrid(7, 9)
+    maze.generate_maze('backtrack')
+    with MmapGrid.from_grid(maze, filename) as grid:
+        assert (grid.height, grid.width) == (7, 9)
+        for j in range(7):
+            for i in range(9):
+                links = maze[IntPos((i, j))].links
+                assert grid.cell(i, j) == (EAST if IntPos((i + 1, j)) in links else 0) | (
+                    NORTH if IntPos((i, j + 1)) in links else 0)
+    with MmapGrid(filename) as grid:
+        assert grid.cell(8, 6) == 0
+
+def test_generate_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip('numpy')
+    # a band a row, so every row meets the next at a band seam
+    monkeypatch.setattr(mmapgrid, 'BAND_BYTES', 2)
+    for algorithm in MmapGrid.algorithms:
+        random.seed(49)
+        filename = str(tmp_path / f'{algorithm}.bits')
+        with generate_file(filename, 11, 13, algorithm) as grid:
+            assert grid.band_rows == 1
+            maze = grid.to_grid()
+        assert_perfect_maze(maze)
+        # and back again
+        with MmapGrid.from_grid(maze, str(tmp_path / 'copy.bits')) as copy, MmapGrid(filename) as grid:
+            assert (copy.read_rows(0, 11) == grid.read_rows(0, 11)).all()
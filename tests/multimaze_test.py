@@ -21,9 +21,11 @@ def test_two_square() -> None:
         ),
     }
 
-    multigrid = MultiGrid( subgrids )
+    multigrid = MultiGrid( subgrids, cell_comments=True )
 
     assert len(multigrid) == 32
+    assert set(multigrid._cells_for_grid) == {'A', 'B'}
+    assert len(multigrid._subgrids['B']._own_cells) == 16
 
     b_adjacents = multigrid.pos_adjacents(IntPosition((0, 0), 'B'))
     assert IntPosition((3, 0), 'A') in b_adjacents
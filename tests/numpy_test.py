@@ -0,0 +1,24 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from tests.helpers import assert_perfect_maze
+import random
+import pytest
+
+pytest.importorskip('numpy')
+
+def test_numpy_algorithms() -> None:
+    for algorithm in ('numpy_binary', 'numpy_sidewinder'):
+        mazes = []
+        for implicit in (False, True):
+            random.seed(50)
+            maze = RectGrid(13, 17, implicit=implicit)
+            maze.generate_maze(algorithm)
+            links = {position: maze[position].links for position in maze._grid}
+            assert_perfect_maze(maze)
+            mazes.append(links)
+        assert mazes[0] == mazes[1]
+
+        with pytest.raises(ValueError):
+            RectGrid(4, 4, mask={(0, 0), (1, 0)}).generate_maze(algorithm)
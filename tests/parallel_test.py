@@ -0,0 +1,12 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.complex_maze import complex_grid
+from tests.helpers import assert_perfect_maze
+import random
+
+def test_parallel_subgrids() -> None:
+    random.seed(31)
+    cube = complex_grid('cube', 4)
+    cube.generate_parallel('backtrack', jobs=2)
+    assert_perfect_maze(cube)
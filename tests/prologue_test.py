@@ -0,0 +1,31 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.circlegrid import CircleGrid
+from maze.psprologue import ps_statements
+
+def test_prologue() -> None:
+    statements = ps_statements("""
+        /a { b (not % a comment) show } def % trailing comment
+        /b 2 def
+        /c_dict 2 dict def
+        c_dict begin /d { a } def end
+    """)
+    assert [s.text for s in statements] == [
+        "/a { b (not % a comment) show } def",
+        "/b 2 def",
+        "/c_dict 2 dict def",
+        "c_dict begin /d { a } def end",
+    ]
+    assert statements[0].uses == {'b', 'show', 'def'}
+    assert statements[3].defines == {'c_dict', 'd'}
+
+    rect_prologue = RectGrid(3, 3).ps_prologue
+    assert "/drawrectmaze " in rect_prologue
+    assert "/mazeengine " in rect_prologue
+    assert "/drawcirclemaze " not in rect_prologue
+    assert "%" not in rect_prologue.replace("%!", "", 1)
+    # built once per set of entry points
+    assert RectGrid(4, 4).ps_prologue is rect_prologue
+    assert "/drawcirclemaze " in CircleGrid(3).ps_prologue
@@ -0,0 +1,38 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.circlegrid import CircleGrid
+from maze.complex_maze import complex_grid
+import gc
+import random
+
+def test_reset() -> None:
+    for make in (lambda: RectGrid(8, 8, weave=True), lambda: RectGrid(3, 4, hyper=[2]), lambda: complex_grid('cube', 3)):
+        random.seed(46)
+        built = make()
+        built.generate_maze('kruskal')
+        grid = make()
+        grid.generate_maze('kruskal')
+        copy = grid.fresh_copy()
+        assert len(copy) == len(make())
+        assert all(not cell.links for cell in copy._grid.values())
+        grid.reset()
+        for maze in (grid, copy):
+            random.seed(46)
+            maze.generate_maze('kruskal')
+            assert list(maze._grid) == list(built._grid)
+            for position, cell in built._grid.items():
+                assert maze[position].links == cell.links
+
+def test_fresh_copies_freed() -> None:
+    random.seed(46)
+    template = CircleGrid(5)
+    for _ in range(20):
+        maze = template.fresh_copy()
+        maze.generate_maze('backtrack')
+    # copies share the neighbour cache, without it keeping them alive
+    assert isinstance(maze, CircleGrid) and maze._adjacents is template._adjacents
+    del maze
+    gc.collect()
+    assert sum(isinstance(o, CircleGrid) for o in gc.get_objects()) == 1
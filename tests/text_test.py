@@ -0,0 +1,26 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.textmaze import TextCell, text_lines
+
+def test_text() -> None:
+    # two rows from the top down: a room on top, a corridor below
+    rows = [
+        [TextCell(True, east=True), TextCell(True)],
+        [TextCell(True, north=True, on_path=True), TextCell(True)],
+    ]
+    assert list(text_lines(iter(rows), 2, style='unicode')) == [
+        "┌─────────┐",
+        "│         │",
+        "│         │",
+        "│         │",
+        "│    ┌────┤",
+        "│····│    │",
+        "│····│    │",
+        "│····│    │",
+        "└────┴────┘",
+    ]
+    assert list(text_lines(iter(rows), 2))[4:6] == [
+        "#    ######",
+        "#....#    #",
+    ]
@@ -0,0 +1,22 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from tests.helpers import assert_perfect_maze
+import random
+import pytest
+
+def test_tiled_rectgrid() -> None:
+    mazes = []
+    for jobs in (1, 2):
+        random.seed(43)
+        maze = RectGrid(9, 11)
+        maze.generate_tiled('kruskal', 3, jobs=jobs, random_doors=True)
+        assert_perfect_maze(maze)
+        mazes.append({position: cell.links for position, cell in maze._grid.items()})
+    assert mazes[0] == mazes[1]
+
+def test_tiled_block_count() -> None:
+    for blocks in (0, 4):
+        with pytest.raises(ValueError):
+            RectGrid(3, 3).generate_tiled('backtrack', blocks)
@@ -0,0 +1,29 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.rectgrid import RectGrid
+from maze.positions import IntPosition as IntPos, Position
+from maze.tiles import Overlay
+import random
+
+def test_overlay() -> None:
+    random.seed(31)
+    maze = RectGrid(12, 12)
+    maze.generate_maze('backtrack')
+    path = maze.longest_path()
+    field = maze.dijkstra(path[0])
+    overlay = Overlay(path, field)
+    cells: set[Position] = {IntPos((i, j)) for i in range(4, 8) for j in range(4, 8)}
+
+    runs = overlay.path_runs(cells)
+    # every step through the cells is in a run, and each run is a piece of the path
+    assert {position for run in runs for position in run} >= cells & set(path)
+    for run in runs:
+        start = path.index(run[0])
+        assert path[start:start + len(run)] == run
+        assert run[0] in cells or start == 0 or path[start + 1] in cells
+    assert overlay.path_runs(set()) == []
+
+    tile_field = overlay.field(cells)
+    assert len(tile_field) == len(field)
+    assert [frontier & cells for frontier in field] == tile_field
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from maze.complex_maze import complex_grid
+from maze import topology
+
+def test_topology_cache() -> None:
+    built = complex_grid('fat_star', 4)
+    with tempfile.TemporaryDirectory() as directory:
+        first = complex_grid('fat_star', 4, topology_cache=directory)
+        assert len(os.listdir(directory)) == 1
+        # a maze made in one copy doesn't show up in the next
+        first.generate_maze('backtrack')
+        topology.topologies.clear()
+        loaded = complex_grid('fat_star', 4, topology_cache=directory)
+    assert list(loaded._grid) == list(built._grid)
+    assert all(not cell.links for cell in loaded._grid.values())
+    assert loaded._edge_map == built._edge_map
+    assert loaded.ps_instructions() == built.ps_instructions()